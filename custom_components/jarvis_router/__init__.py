@@ -1,12 +1,54 @@
 """Jarvis Router - Smart Conversation Agent Router."""
 import logging
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+
+from .admission import LLMAdmission
+from .cache import ResponseCache
+from .const import (
+    CONF_CACHE_ENABLED,
+    CONF_CACHE_EXCLUDE,
+    CONF_CACHE_SIZE,
+    CONF_CACHE_TTL,
+    CONF_KEEPALIVE_INTERVAL,
+    CONF_KEEPALIVE_QUIET_END,
+    CONF_KEEPALIVE_QUIET_START,
+    CONF_KEEPALIVE_SLEEP_ENTITY,
+    CONF_LLM_AGENTS,
+    CONF_MAX_INFLIGHT,
+    CONF_MEMO_SIZE,
+    CONF_WARMUP,
+    CONF_WARMUP_TEXT,
+    DATA_ADMISSION,
+    DATA_CACHE,
+    DATA_KEEPALIVE,
+    DATA_MEMO,
+    DATA_STATS,
+    DEFAULT_CACHE_ENABLED,
+    DEFAULT_CACHE_EXCLUDE,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_KEEPALIVE_INTERVAL,
+    DEFAULT_KEEPALIVE_QUIET_END,
+    DEFAULT_KEEPALIVE_QUIET_START,
+    DEFAULT_LLM_AGENTS,
+    DEFAULT_MAX_INFLIGHT,
+    DEFAULT_MEMO_SIZE,
+    DEFAULT_WARMUP,
+    DEFAULT_WARMUP_TEXT,
+    DOMAIN,
+    SENTENCES_PATH,
+    SIGNAL_STATS_UPDATED,
+)
+from .keepalive import LLMKeepAlive
+from .memo import RouteMemo, hash_sentences
+from .stats import LatencyStats
 
 _LOGGER = logging.getLogger(__name__)
-DOMAIN = "jarvis_router"
-PLATFORMS = ["conversation"]
+PLATFORMS = ["conversation", "sensor"]
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
@@ -23,11 +65,72 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Jarvis Router from a config entry."""
+    options = entry.options
+    cache = None
+    if options.get(CONF_CACHE_ENABLED, DEFAULT_CACHE_ENABLED):
+        cache = ResponseCache(
+            options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+            options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+            options.get(CONF_CACHE_EXCLUDE, DEFAULT_CACHE_EXCLUDE),
+        )
+
+    memo = RouteMemo(hass, options.get(CONF_MEMO_SIZE, DEFAULT_MEMO_SIZE))
+    sentences_hash = await hass.async_add_executor_job(
+        hash_sentences, hass.config.path(*SENTENCES_PATH)
+    )
+    await memo.async_load(sentences_hash)
+
+    keepalive = LLMKeepAlive(
+        hass,
+        options.get(CONF_LLM_AGENTS, DEFAULT_LLM_AGENTS),
+        options.get(CONF_WARMUP_TEXT, DEFAULT_WARMUP_TEXT),
+        options.get(CONF_KEEPALIVE_INTERVAL, DEFAULT_KEEPALIVE_INTERVAL),
+        options.get(CONF_KEEPALIVE_QUIET_START, DEFAULT_KEEPALIVE_QUIET_START),
+        options.get(CONF_KEEPALIVE_QUIET_END, DEFAULT_KEEPALIVE_QUIET_END),
+        options.get(CONF_KEEPALIVE_SLEEP_ENTITY),
+    )
+
+    # Queue-Sensor soll auch beim Einreihen/Freigeben aktualisieren, nicht erst am Ende
+    admission = LLMAdmission(
+        options.get(CONF_MAX_INFLIGHT, DEFAULT_MAX_INFLIGHT),
+        lambda: async_dispatcher_send(hass, SIGNAL_STATS_UPDATED.format(entry.entry_id)),
+    )
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        DATA_ADMISSION: admission,
+        DATA_CACHE: cache,
+        DATA_KEEPALIVE: keepalive,
+        DATA_MEMO: memo,
+        DATA_STATS: LatencyStats(),
+    }
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Warm-up erst wenn HA (und damit der Ollama-Agent) komplett gestartet ist
+    warmup = options.get(CONF_WARMUP, DEFAULT_WARMUP)
+
+    @callback
+    def _async_ha_started(_hass: HomeAssistant) -> None:
+        if warmup and not keepalive.is_asleep():
+            entry.async_create_background_task(
+                hass, keepalive.async_warm_up(), "jarvis_router_llm_warmup"
+            )
+        entry.async_on_unload(keepalive.async_start())
+
+    entry.async_on_unload(async_at_started(hass, _async_ha_started))
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     _LOGGER.info("Jarvis Router setup complete (entry_id=%s)", entry.entry_id)
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload after the options flow changed the agent chain or settings."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+    return unloaded
@@ -0,0 +1,95 @@
+"""Admission control and request coalescing for LLM calls."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LLMAdmission:
+    """Begrenzt parallele LLM-Aufrufe und fasst identische Anfragen zusammen.
+
+    Gleiche Frage von zwei Satelliten gleichzeitig → eine Generierung, beide
+    bekommen dasselbe Ergebnis. Die geteilte Generierung wird erst
+    abgebrochen, wenn kein Aufrufer mehr darauf wartet.
+    """
+
+    def __init__(
+        self, max_inflight: int, on_change: Callable[[], None] | None = None
+    ) -> None:
+        self.max_inflight = max(int(max_inflight), 1)
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self._inflight: dict[Hashable, tuple[asyncio.Task, list[int]]] = {}
+        self._on_change = on_change
+        self.waiting = 0
+        self.active = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.coalesced = 0
+
+    async def run(
+        self, key: Hashable | None, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run factory() under the limit, sharing it with identical in-flight keys.
+
+        key=None: nicht zusammenfassen (Folgefragen, gestreamte Antworten).
+        """
+        entry = self._inflight.get(key) if key is not None else None
+        if entry is not None:
+            self.coalesced += 1
+            _LOGGER.debug("LLM request coalesced: %s", key)
+        else:
+            task = asyncio.get_running_loop().create_task(self._admit(factory))
+            entry = (task, [0])
+            if key is not None:
+                self._inflight[key] = entry
+                task.add_done_callback(lambda _task: self._forget(key, entry))
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                # Niemand wartet mehr (Deadline, spekulativ abgebrochen)
+                task.cancel()
+
+    async def _admit(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        self._changed()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        self._changed()
+        try:
+            return await factory()
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self._changed()
+
+    def _forget(self, key: Hashable, entry: tuple) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def as_dict(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "active": self.active,
+            "max_inflight": self.max_inflight,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "coalesced": self.coalesced,
+        }
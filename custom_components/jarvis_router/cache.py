@@ -0,0 +1,86 @@
+"""LRU/TTL response cache for the Ollama fallback."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import re
+import time
+
+from .matcher import normalize_text
+
+# Füllwörter, die die Antwort nicht ändern ("was ist denn ein quasar")
+_FILLER_WORDS = frozenset({"bitte", "mal", "doch", "denn", "eigentlich", "eben", "jarvis"})
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry TTL, keyed by normalized text + language."""
+
+    def __init__(self, max_size: int, ttl: float, exclude: list[str] | None = None) -> None:
+        self._max_size = max(int(max_size), 0)
+        self._ttl = float(ttl)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        words = [re.escape(normalize_text(w)) for w in (exclude or []) if normalize_text(w)]
+        self._exclude = re.compile(rf"\b(?:{'|'.join(words)})\b") if words else None
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    def key(
+        self, text: str, language: str, follow_up: bool = False
+    ) -> tuple[str, str] | None:
+        """Cache key, or None for time-/state-dependent questions and follow-ups.
+
+        follow_up: nicht der erste Turn der Conversation. Die Antwort hängt
+        am Verlauf ("und sein Vater?") und passt in keine andere Conversation.
+        """
+        normalized = normalize_text(text)
+        if not normalized or self._max_size == 0:
+            return None
+        if follow_up:
+            self.skipped += 1
+            return None
+        if self._exclude is not None and self._exclude.search(normalized):
+            self.skipped += 1
+            return None
+        words = [w for w in normalized.split() if w not in _FILLER_WORDS]
+        return (" ".join(words) or normalized, language)
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, speech = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return speech
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple[str, str], speech: str, ttl: float | None = None) -> None:
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0 or not speech:
+            return
+        self._entries[key] = (time.monotonic() + ttl, speech)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+        }
@@ -1,13 +1,92 @@
 """Config flow for Jarvis Router."""
+import voluptuous as vol
+
 from homeassistant import config_entries
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.config_entries import ConfigFlow, OptionsFlow
+from homeassistant.core import callback
+from homeassistant.helpers import selector
+
+from .const import (
+    CONF_CACHE_ENABLED,
+    CONF_CACHE_EXCLUDE,
+    CONF_CACHE_SIZE,
+    CONF_CACHE_TTL,
+    CONF_DEADLINE,
+    CONF_FAST_PATH,
+    CONF_FAST_PATH_PREFIXES,
+    CONF_KEEPALIVE_INTERVAL,
+    CONF_KEEPALIVE_QUIET_END,
+    CONF_KEEPALIVE_QUIET_START,
+    CONF_KEEPALIVE_SLEEP_ENTITY,
+    CONF_LLM_AGENTS,
+    CONF_LLM_TIMEOUTS,
+    CONF_LOCAL_AGENT,
+    CONF_LOCAL_TIMEOUT,
+    CONF_MAX_INFLIGHT,
+    CONF_MEMO_SIZE,
+    CONF_NO_MATCH_PHRASES,
+    CONF_SPECULATIVE,
+    CONF_SPECULATIVE_THRESHOLD,
+    CONF_STREAMING,
+    CONF_TIMEOUT_ANSWER,
+    CONF_WARMUP,
+    CONF_WARMUP_TEXT,
+    DEFAULT_CACHE_ENABLED,
+    DEFAULT_CACHE_EXCLUDE,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DEADLINE,
+    DEFAULT_FAST_PATH,
+    DEFAULT_FAST_PATH_PREFIXES,
+    DEFAULT_KEEPALIVE_INTERVAL,
+    DEFAULT_KEEPALIVE_QUIET_END,
+    DEFAULT_KEEPALIVE_QUIET_START,
+    DEFAULT_LLM_AGENTS,
+    DEFAULT_LLM_TIMEOUT,
+    DEFAULT_LLM_TIMEOUTS,
+    DEFAULT_LOCAL_AGENT,
+    DEFAULT_LOCAL_TIMEOUT,
+    DEFAULT_MAX_INFLIGHT,
+    DEFAULT_MEMO_SIZE,
+    DEFAULT_NO_MATCH_PHRASES,
+    DEFAULT_SPECULATIVE,
+    DEFAULT_SPECULATIVE_THRESHOLD,
+    DEFAULT_STREAMING,
+    DEFAULT_TIMEOUT_ANSWER,
+    DEFAULT_WARMUP,
+    DEFAULT_WARMUP_TEXT,
+    DOMAIN,
+)
+from .conversation import parse_timeouts
+
+_AGENT_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="conversation")
+)
+_AGENTS_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="conversation", multiple=True)
+)
+_TEXT_LIST_SELECTOR = selector.TextSelector(selector.TextSelectorConfig(multiple=True))
+
+
+def _seconds(maximum: float) -> selector.NumberSelector:
+    return selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=1, max=maximum, step=1, unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    )
 
-DOMAIN = "jarvis_router"
 
 class JarvisRouterConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Jarvis Router."""
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return JarvisRouterOptionsFlow()
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         if self._async_current_entries():
@@ -21,3 +100,156 @@ class JarvisRouterConfigFlow(ConfigFlow, domain=DOMAIN):
         if self._async_current_entries():
             return self.async_abort(reason="already_configured")
         return self.async_create_entry(title="Jarvis Router", data={})
+
+
+class JarvisRouterOptionsFlow(OptionsFlow):
+    """Agent chain, timeouts and routing tweaks."""
+
+    # Eingabe, deren Überschreitung der Deadline schon gemeldet wurde: erneut
+    # unverändert gespeichert → übernehmen (nur Warnung, kein harter Fehler)
+    _budget_warned: dict | None = None
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        placeholders = {"agents": "", "budget": ""}
+        if user_input is not None:
+            errors = self._validate_chain(user_input, placeholders)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        schema = vol.Schema(
+            {
+                # Agent-Kette
+                vol.Required(
+                    CONF_LOCAL_AGENT,
+                    default=options.get(CONF_LOCAL_AGENT, DEFAULT_LOCAL_AGENT),
+                ): _AGENT_SELECTOR,
+                vol.Required(
+                    CONF_LOCAL_TIMEOUT,
+                    default=options.get(CONF_LOCAL_TIMEOUT, DEFAULT_LOCAL_TIMEOUT),
+                ): _seconds(60),
+                vol.Required(
+                    CONF_LLM_AGENTS,
+                    default=options.get(CONF_LLM_AGENTS, DEFAULT_LLM_AGENTS),
+                ): _AGENTS_SELECTOR,
+                vol.Optional(
+                    CONF_LLM_TIMEOUTS,
+                    default=options.get(CONF_LLM_TIMEOUTS, DEFAULT_LLM_TIMEOUTS),
+                ): str,
+                vol.Required(
+                    CONF_DEADLINE,
+                    default=options.get(CONF_DEADLINE, DEFAULT_DEADLINE),
+                ): _seconds(300),
+                vol.Required(
+                    CONF_TIMEOUT_ANSWER,
+                    default=options.get(CONF_TIMEOUT_ANSWER, DEFAULT_TIMEOUT_ANSWER),
+                ): str,
+                vol.Required(
+                    CONF_MAX_INFLIGHT,
+                    default=options.get(CONF_MAX_INFLIGHT, DEFAULT_MAX_INFLIGHT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                # Routing
+                vol.Required(
+                    CONF_FAST_PATH,
+                    default=options.get(CONF_FAST_PATH, DEFAULT_FAST_PATH),
+                ): bool,
+                vol.Required(
+                    CONF_FAST_PATH_PREFIXES,
+                    default=options.get(CONF_FAST_PATH_PREFIXES, DEFAULT_FAST_PATH_PREFIXES),
+                ): _TEXT_LIST_SELECTOR,
+                vol.Required(
+                    CONF_NO_MATCH_PHRASES,
+                    default=options.get(CONF_NO_MATCH_PHRASES, DEFAULT_NO_MATCH_PHRASES),
+                ): _TEXT_LIST_SELECTOR,
+                vol.Required(
+                    CONF_SPECULATIVE,
+                    default=options.get(CONF_SPECULATIVE, DEFAULT_SPECULATIVE),
+                ): bool,
+                vol.Required(
+                    CONF_SPECULATIVE_THRESHOLD,
+                    default=options.get(CONF_SPECULATIVE_THRESHOLD, DEFAULT_SPECULATIVE_THRESHOLD),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                vol.Required(
+                    CONF_STREAMING,
+                    default=options.get(CONF_STREAMING, DEFAULT_STREAMING),
+                ): bool,
+                vol.Required(
+                    CONF_MEMO_SIZE,
+                    default=options.get(CONF_MEMO_SIZE, DEFAULT_MEMO_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                # Cache
+                vol.Required(
+                    CONF_CACHE_ENABLED,
+                    default=options.get(CONF_CACHE_ENABLED, DEFAULT_CACHE_ENABLED),
+                ): bool,
+                vol.Required(
+                    CONF_CACHE_SIZE,
+                    default=options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(
+                    CONF_CACHE_TTL,
+                    default=options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(
+                    CONF_CACHE_EXCLUDE,
+                    default=options.get(CONF_CACHE_EXCLUDE, DEFAULT_CACHE_EXCLUDE),
+                ): _TEXT_LIST_SELECTOR,
+                # Warm-up / Keep-Alive
+                vol.Required(
+                    CONF_WARMUP,
+                    default=options.get(CONF_WARMUP, DEFAULT_WARMUP),
+                ): bool,
+                vol.Required(
+                    CONF_WARMUP_TEXT,
+                    default=options.get(CONF_WARMUP_TEXT, DEFAULT_WARMUP_TEXT),
+                ): str,
+                vol.Required(
+                    CONF_KEEPALIVE_INTERVAL,
+                    default=options.get(CONF_KEEPALIVE_INTERVAL, DEFAULT_KEEPALIVE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                vol.Required(
+                    CONF_KEEPALIVE_QUIET_START,
+                    default=options.get(CONF_KEEPALIVE_QUIET_START, DEFAULT_KEEPALIVE_QUIET_START),
+                ): selector.TimeSelector(),
+                vol.Required(
+                    CONF_KEEPALIVE_QUIET_END,
+                    default=options.get(CONF_KEEPALIVE_QUIET_END, DEFAULT_KEEPALIVE_QUIET_END),
+                ): selector.TimeSelector(),
+                vol.Optional(
+                    CONF_KEEPALIVE_SLEEP_ENTITY,
+                    description={
+                        "suggested_value": options.get(CONF_KEEPALIVE_SLEEP_ENTITY)
+                    },
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain=["input_boolean", "binary_sensor"])
+                ),
+            }
+        )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=schema,
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    def _validate_chain(self, user_input: dict, placeholders: dict) -> dict[str, str]:
+        """Per-tier timeouts prüfen und vor unerreichbaren Stufen warnen."""
+        agents = user_input.get(CONF_LLM_AGENTS) or []
+        try:
+            timeouts = parse_timeouts(user_input.get(CONF_LLM_TIMEOUTS, ""))
+        except ValueError:
+            return {CONF_LLM_TIMEOUTS: "invalid_timeouts"}
+        if timeouts and len(timeouts) != len(agents):
+            placeholders["agents"] = str(len(agents))
+            return {CONF_LLM_TIMEOUTS: "timeout_count"}
+
+        budget = float(user_input[CONF_LOCAL_TIMEOUT]) + (
+            sum(timeouts) if timeouts else DEFAULT_LLM_TIMEOUT * len(agents)
+        )
+        if budget > float(user_input[CONF_DEADLINE]) and user_input != self._budget_warned:
+            self._budget_warned = dict(user_input)
+            placeholders["budget"] = f"{budget:g}"
+            return {CONF_DEADLINE: "budget_exceeds_deadline"}
+        return {}
@@ -0,0 +1,140 @@
+"""Constants for Jarvis Router."""
+
+DOMAIN = "jarvis_router"
+
+# hass.data[DOMAIN][entry_id]
+DATA_ADMISSION = "admission"
+DATA_CACHE = "cache"
+DATA_STATS = "stats"
+DATA_MEMO = "memo"
+DATA_KEEPALIVE = "keepalive"
+
+# Dispatcher-Signal für Sensor-Updates (format mit entry_id)
+SIGNAL_STATS_UPDATED = f"{DOMAIN}_stats_updated_{{}}"
+
+# Agent-Kette: lokaler Agent → LLM-Stufen (z.B. kleines, schnelles → großes LLM)
+CONF_LOCAL_AGENT = "local_agent"
+CONF_LOCAL_TIMEOUT = "local_timeout"
+CONF_LLM_AGENTS = "llm_agents"
+CONF_LLM_TIMEOUTS = "llm_timeouts"
+CONF_DEADLINE = "deadline"
+CONF_TIMEOUT_ANSWER = "timeout_answer"
+
+DEFAULT_LOCAL_AGENT = "conversation.home_assistant"
+DEFAULT_LOCAL_TIMEOUT = 5.0  # Sekunden
+DEFAULT_LLM_AGENTS = ["conversation.ollama_conversation"]
+# Kommagetrennt in Reihenfolge der LLM-Agents, fehlende Werte → Default
+DEFAULT_LLM_TIMEOUTS = ""
+DEFAULT_LLM_TIMEOUT = 20.0  # Sekunden
+DEFAULT_DEADLINE = 30.0  # Sekunden für den gesamten Turn
+DEFAULT_TIMEOUT_ANSWER = "Das dauert gerade zu lange, bitte frag mich gleich noch einmal."
+ERROR_ANSWER = "Entschuldigung, ich konnte keine Antwort finden."
+
+# Verzeichnis der Custom Sentences (relativ zu /config)
+SENTENCES_PATH = ("custom_sentences", "de")
+
+# Fast-Path Pre-Matcher
+CONF_FAST_PATH = "fast_path"
+CONF_FAST_PATH_PREFIXES = "fast_path_prefixes"
+
+DEFAULT_FAST_PATH = True
+# Freitext-Fragen, die kein Custom Sentence und kein Built-in Intent abdeckt.
+# Bewusst konservativ: "wie spät ist es" o.ä. bleibt beim lokalen Agent.
+# Keine Präfixe, mit denen auch Built-in Intents beginnen ("wie viele Lichter
+# sind an" → HassGetState, "wer ist zu Hause").
+DEFAULT_FAST_PATH_PREFIXES = [
+    "was ist ein",
+    "was ist eine",
+    "was sind",
+    "was bedeutet",
+    "was heißt",
+    "wer war",
+    "warum",
+    "wieso",
+    "weshalb",
+    "erkläre",
+    "erklär",
+    "erzähl",
+    "wie funktioniert",
+    "wann war",
+]
+
+# Spekulativer Modus: Ollama parallel zum lokalen Agent starten
+CONF_SPECULATIVE = "speculative"
+CONF_SPECULATIVE_THRESHOLD = "speculative_threshold"
+
+DEFAULT_SPECULATIVE = False
+# Pre-Match-Confidence ab der KEIN paralleler Ollama-Request gestartet wird
+DEFAULT_SPECULATIVE_THRESHOLD = 0.8
+
+# Antwort-Cache für den Ollama-Fallback
+CONF_CACHE_ENABLED = "cache_enabled"
+CONF_CACHE_SIZE = "cache_size"
+CONF_CACHE_TTL = "cache_ttl"
+CONF_CACHE_EXCLUDE = "cache_exclude"
+
+DEFAULT_CACHE_ENABLED = True
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 3600  # Sekunden
+# Zeit- oder zustandsabhängige Fragen werden nie gecacht
+DEFAULT_CACHE_EXCLUDE = [
+    "jetzt",
+    "heute",
+    "morgen",
+    "gestern",
+    "gerade",
+    "aktuell",
+    "momentan",
+    "uhr",
+    "uhrzeit",
+    "spät",
+    "datum",
+    "wochentag",
+    "wetter",
+    "temperatur",
+    "nachrichten",
+    "neueste",
+    "letzte",
+    "noch",
+]
+
+# Fehlermeldungen des lokalen Agents, die "nicht verstanden" bedeuten
+CONF_NO_MATCH_PHRASES = "no_match_phrases"
+
+DEFAULT_NO_MATCH_PHRASES = [
+    "das habe ich nicht verstanden",
+    "existiert nicht",
+    "kein bereich",
+    "nicht gefunden",
+    "konnte nicht",
+    "nicht vorhanden",
+    "tut mir leid",
+]
+
+# Route-Memo: Äußerung → local/llm, persistent (0 = aus)
+CONF_MEMO_SIZE = "memo_size"
+
+DEFAULT_MEMO_SIZE = 1000
+
+# Ollama-Antworten an die Pipeline durchstreamen (frühes TTS)
+CONF_STREAMING = "streaming"
+
+DEFAULT_STREAMING = True
+
+# Warm-up nach dem Start + Keep-Alive-Pings für die LLM-Stufen
+CONF_WARMUP = "warmup"
+CONF_WARMUP_TEXT = "warmup_text"
+CONF_KEEPALIVE_INTERVAL = "keepalive_interval"
+CONF_KEEPALIVE_QUIET_START = "keepalive_quiet_start"
+CONF_KEEPALIVE_QUIET_END = "keepalive_quiet_end"
+CONF_KEEPALIVE_SLEEP_ENTITY = "keepalive_sleep_entity"
+
+DEFAULT_WARMUP = True
+DEFAULT_WARMUP_TEXT = "Antworte nur mit OK."
+DEFAULT_KEEPALIVE_INTERVAL = 0  # Minuten, 0 = aus (Ollama entlädt nach 5 min)
+DEFAULT_KEEPALIVE_QUIET_START = "23:00:00"
+DEFAULT_KEEPALIVE_QUIET_END = "06:00:00"
+
+# Admission-Control: max. parallele LLM-Generierungen (CPU-Box)
+CONF_MAX_INFLIGHT = "max_inflight"
+DEFAULT_MAX_INFLIGHT = 1
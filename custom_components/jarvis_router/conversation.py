@@ -1,5 +1,9 @@
 """Conversation entity for Jarvis Router."""
+import asyncio
+from collections import OrderedDict
 import logging
+import math
+import time
 
 from homeassistant.components.conversation import (
     ConversationEntity,
@@ -8,20 +12,74 @@ from homeassistant.components.conversation import (
     async_converse,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_DOMAIN, ATTR_SERVICE, EVENT_CALL_SERVICE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.intent import IntentResponse, IntentResponseType
+
+from .const import (
+    CONF_DEADLINE,
+    CONF_FAST_PATH,
+    CONF_FAST_PATH_PREFIXES,
+    CONF_LLM_AGENTS,
+    CONF_LLM_TIMEOUTS,
+    CONF_LOCAL_AGENT,
+    CONF_LOCAL_TIMEOUT,
+    CONF_NO_MATCH_PHRASES,
+    CONF_SPECULATIVE,
+    CONF_SPECULATIVE_THRESHOLD,
+    CONF_STREAMING,
+    CONF_TIMEOUT_ANSWER,
+    DATA_ADMISSION,
+    DATA_CACHE,
+    DATA_KEEPALIVE,
+    DATA_MEMO,
+    DATA_STATS,
+    DEFAULT_DEADLINE,
+    DEFAULT_FAST_PATH,
+    DEFAULT_FAST_PATH_PREFIXES,
+    DEFAULT_LLM_AGENTS,
+    DEFAULT_LLM_TIMEOUT,
+    DEFAULT_LLM_TIMEOUTS,
+    DEFAULT_LOCAL_AGENT,
+    DEFAULT_LOCAL_TIMEOUT,
+    DEFAULT_NO_MATCH_PHRASES,
+    DEFAULT_SPECULATIVE,
+    DEFAULT_SPECULATIVE_THRESHOLD,
+    DEFAULT_STREAMING,
+    DEFAULT_TIMEOUT_ANSWER,
+    DOMAIN,
+    ERROR_ANSWER,
+    SENTENCES_PATH,
+    SIGNAL_STATS_UPDATED,
+)
+from .admission import LLMAdmission
+from .cache import ResponseCache
+from .keepalive import LLMKeepAlive
+from .matcher import ROUTE_LLM, ROUTE_LOCAL, SentenceMatcher, normalize_text
+from .memo import RouteMemo, hash_sentences
+from .no_match import NoMatchClassifier
+from .stats import (
+    STAGE_LLM,
+    STAGE_LOCAL,
+    STAGE_NO_MATCH,
+    STAGE_PREMATCH,
+    STAGE_TOTAL,
+    LatencyStats,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-NO_MATCH_PHRASES = [
-    "das habe ich nicht verstanden",
-    "existiert nicht",
-    "kein bereich",
-    "nicht gefunden",
-    "konnte nicht",
-    "nicht vorhanden",
-    "tut mir leid",
-]
+_STREAMING_SUPPORTED = hasattr(ConversationEntity, "_attr_supports_streaming")
+
+# Registry-Felder, die Entity-/Area-Namen betreffen
+_NAME_FIELDS = {"name", "original_name", "aliases", "area_id"}
+
+# HA verwirft Chat-Sessions nach 5 Minuten ohne Turn
+_CONVERSATION_TIMEOUT = 300  # Sekunden
+_MAX_CONVERSATIONS = 256
 
 
 async def async_setup_entry(
@@ -30,43 +88,282 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Jarvis Router conversation entity."""
-    async_add_entities([JarvisRouterEntity(config_entry)])
+    matcher = await _async_build_matcher(hass, config_entry)
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        [
+            JarvisRouterEntity(
+                config_entry,
+                data[DATA_STATS],
+                data[DATA_MEMO],
+                data[DATA_KEEPALIVE],
+                data[DATA_ADMISSION],
+                matcher,
+                data[DATA_CACHE],
+            )
+        ]
+    )
     _LOGGER.info("Jarvis Router conversation entity created")
 
 
+async def _async_build_matcher(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> SentenceMatcher | None:
+    """Compile custom_sentences in the executor (None if disabled or broken)."""
+    if not config_entry.options.get(CONF_FAST_PATH, DEFAULT_FAST_PATH):
+        return None
+    prefixes = config_entry.options.get(CONF_FAST_PATH_PREFIXES, DEFAULT_FAST_PATH_PREFIXES)
+    try:
+        matcher = await hass.async_add_executor_job(
+            SentenceMatcher.from_directory, hass.config.path(*SENTENCES_PATH), prefixes
+        )
+    except Exception as ex:
+        _LOGGER.warning("Pre-Matcher konnte nicht erstellt werden: %s", ex)
+        return None
+    _LOGGER.info("Jarvis Router Pre-Matcher: %d Intents", matcher.intent_count)
+    return matcher
+
+
+def parse_timeouts(timeouts: str) -> list[float]:
+    """Parse "8, 20" → [8.0, 20.0]; leer → [] (alle Stufen mit Standard-Timeout).
+
+    ValueError bei Einträgen, die keine endliche positive Zahl sind.
+    """
+    if not (timeouts or "").strip():
+        return []
+    values = []
+    for raw in timeouts.split(","):
+        value = float(raw.strip())
+        if not math.isfinite(value) or value <= 0:
+            raise ValueError(f"Ungültiges Timeout: {raw.strip()!r}")
+        values.append(value)
+    return values
+
+
+def parse_llm_tiers(agents: list[str], timeouts: str) -> list[tuple[str, float]]:
+    """Pair LLM agent ids with their timeout ("8, 20" → 8s, 20s).
+
+    Der Options-Flow prüft die Eingabe; ältere gespeicherte Optionen fallen
+    hier mit Warnung auf DEFAULT_LLM_TIMEOUT zurück.
+    """
+    try:
+        values = parse_timeouts(timeouts)
+    except ValueError as ex:
+        _LOGGER.warning("LLM-Timeouts %r ignoriert (%s), nutze %.0fs",
+                        timeouts, ex, DEFAULT_LLM_TIMEOUT)
+        values = []
+    if values and len(values) != len(agents):
+        _LOGGER.warning("%d LLM-Timeouts für %d LLM-Agents, fehlende mit %.0fs",
+                        len(values), len(agents), DEFAULT_LLM_TIMEOUT)
+    return [
+        (agent_id, values[idx] if idx < len(values) else DEFAULT_LLM_TIMEOUT)
+        for idx, agent_id in enumerate(agents)
+    ]
+
+
 class JarvisRouterEntity(ConversationEntity):
     """Conversation entity that routes between local intents and Ollama."""
 
     _attr_has_entity_name = True
     _attr_name = "Jarvis Router"
 
-    def __init__(self, config_entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        stats: LatencyStats,
+        memo: RouteMemo,
+        keepalive: LLMKeepAlive,
+        admission: LLMAdmission,
+        matcher: SentenceMatcher | None = None,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self._config_entry = config_entry
         self._attr_unique_id = config_entry.entry_id
+        self._stats = stats
+        self._memo = memo
+        self._keepalive = keepalive
+        self._admission = admission
+        self._matcher = matcher
+        self._cache = cache
+        self._known_names: set[str] = set()
+        # conversation_id → Zeitpunkt des letzten Turns (Folgefragen erkennen)
+        self._conversations: OrderedDict[str, float] = OrderedDict()
+        options = config_entry.options
+        self._local_agent = options.get(CONF_LOCAL_AGENT, DEFAULT_LOCAL_AGENT)
+        self._local_timeout = float(options.get(CONF_LOCAL_TIMEOUT, DEFAULT_LOCAL_TIMEOUT))
+        self._llm_tiers = parse_llm_tiers(
+            options.get(CONF_LLM_AGENTS, DEFAULT_LLM_AGENTS),
+            options.get(CONF_LLM_TIMEOUTS, DEFAULT_LLM_TIMEOUTS),
+        )
+        self._deadline = float(options.get(CONF_DEADLINE, DEFAULT_DEADLINE))
+        budget = self._local_timeout + sum(timeout for _, timeout in self._llm_tiers)
+        if budget > self._deadline:
+            _LOGGER.warning(
+                "Timeouts der Agent-Kette (%.0fs) übersteigen die Deadline (%.0fs): "
+                "spätere LLM-Stufen kommen womöglich nie zum Zug", budget, self._deadline,
+            )
+        self._timeout_answer = options.get(CONF_TIMEOUT_ANSWER, DEFAULT_TIMEOUT_ANSWER)
+        self._speculative = options.get(CONF_SPECULATIVE, DEFAULT_SPECULATIVE)
+        self._speculative_threshold = options.get(
+            CONF_SPECULATIVE_THRESHOLD, DEFAULT_SPECULATIVE_THRESHOLD
+        )
+        # Streaming braucht HA mit Chat-Log-Delta-API (2025.x)
+        self._streaming = _STREAMING_SUPPORTED and options.get(CONF_STREAMING, DEFAULT_STREAMING)
+        self._attr_supports_streaming = self._streaming
+        self._no_match = NoMatchClassifier(
+            options.get(CONF_NO_MATCH_PHRASES, DEFAULT_NO_MATCH_PHRASES)
+        )
 
     @property
     def supported_languages(self) -> list[str]:
         return ["de"]
 
+    async def async_added_to_hass(self) -> None:
+        """Register listeners for registry changes and sentence reloads."""
+        await super().async_added_to_hass()
+        if self._matcher is not None:
+            self._async_update_known_names()
+        for event_type in (er.EVENT_ENTITY_REGISTRY_UPDATED, ar.EVENT_AREA_REGISTRY_UPDATED):
+            self.async_on_remove(
+                self.hass.bus.async_listen(event_type, self._async_registry_updated)
+            )
+        self.async_on_remove(
+            self.hass.bus.async_listen(EVENT_CALL_SERVICE, self._async_service_called)
+        )
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        changes = event.data.get("changes")
+        if event.data.get("action") == "update" and changes is not None:
+            if not _NAME_FIELDS.intersection(changes):
+                return
+        if self._matcher is not None:
+            self._async_update_known_names()
+        # Neue/umbenannte Entities können Memo-Entscheidungen umdrehen
+        self._memo.async_invalidate()
+
+    @callback
+    def _async_service_called(self, event: Event) -> None:
+        if (
+            event.data.get(ATTR_DOMAIN) == "conversation"
+            and event.data.get(ATTR_SERVICE) == "reload"
+        ):
+            self.hass.async_create_task(self._async_sentences_reloaded())
+
+    async def _async_sentences_reloaded(self) -> None:
+        """conversation.reload: Memo und Pre-Matcher bei geänderten Sentences erneuern."""
+        sentences_hash = await self.hass.async_add_executor_job(
+            hash_sentences, self.hass.config.path(*SENTENCES_PATH)
+        )
+        if sentences_hash == self._memo.sentences_hash:
+            return
+        _LOGGER.info("custom_sentences geändert: Route-Memo verworfen, Pre-Matcher neu")
+        self._memo.async_invalidate(sentences_hash)
+        if self._matcher is not None:
+            matcher = await _async_build_matcher(self.hass, self._config_entry)
+            if matcher is not None:
+                self._matcher = matcher
+
+    @callback
+    def _async_update_known_names(self) -> None:
+        """Collect entity/area names and aliases for {name}/{area} slots."""
+        names = set()
+        for state in self.hass.states.async_all():
+            names.add(state.name)
+        for entry in er.async_get(self.hass).entities.values():
+            names.update(entry.aliases)
+        for area in ar.async_get(self.hass).async_list_areas():
+            names.add(area.name)
+            names.update(area.aliases)
+        self._known_names = {n for n in map(normalize_text, names) if n}
+
     async def async_process(self, user_input: ConversationInput) -> ConversationResult:
         """Route: try local intents first, fallback to Ollama."""
+        try:
+            with self._stats.measure(STAGE_TOTAL):
+                async with asyncio.timeout(self._deadline):
+                    return await self._async_route(user_input)
+        except TimeoutError:
+            self._stats.errors += 1
+            _LOGGER.warning("Deadline %.0fs überschritten: %s", self._deadline, user_input.text)
+            return self._error_result(user_input, self._timeout_answer)
+        finally:
+            self._async_stats_updated()
+
+    async def _async_route(self, user_input: ConversationInput) -> ConversationResult:
         text = user_input.text
         _LOGGER.debug("Router received: %s", text)
+        follow_up = self._async_is_follow_up(user_input.conversation_id)
+
+        # Step 0: Fast path — bekannte bzw. offensichtliche Freitext-Fragen
+        # direkt an Ollama
+        memo_route = self._memo.get(text)
+        if memo_route == ROUTE_LLM:
+            _LOGGER.debug("Memo → Ollama: %s", text)
+            return await self._async_fallback(user_input, follow_up, stream=self._streaming)
+
+        confidence = 1.0 if memo_route == ROUTE_LOCAL else 0.0
+        if self._matcher is not None and memo_route is None:
+            with self._stats.measure(STAGE_PREMATCH):
+                prematch = self._matcher.classify(text, self._known_names)
+            _LOGGER.debug("Pre-Match: %s", prematch)
+            if prematch.route == ROUTE_LLM:
+                _LOGGER.debug("Fast path → Ollama: %s", text)
+                return await self._async_fallback(
+                    user_input, follow_up, stream=self._streaming
+                )
+            confidence = prematch.confidence
+
+        # Spekulativ: Ollama schon parallel starten, außer der Pre-Matcher ist
+        # sich sicher, dass es ein lokaler Befehl ist. Nie streamen: sonst
+        # spricht TTS womöglich schon, während der lokale Agent noch matcht.
+        llm_task = None
+        if self._speculative and confidence < self._speculative_threshold:
+            _LOGGER.debug("Speculative Ollama start (confidence %.2f)", confidence)
+            llm_task = self.hass.async_create_task(
+                self._async_fallback(user_input, follow_up)
+            )
 
         # Step 1: Try HA local intents (custom_sentences + built-in)
         try:
-            local_result = await async_converse(
-                hass=self.hass,
-                text=text,
-                conversation_id=user_input.conversation_id,
-                context=user_input.context,
-                language=user_input.language or "de",
-                agent_id="conversation.home_assistant",
-            )
+            local_result = await self._async_local(user_input)
+        except asyncio.CancelledError:
+            if llm_task is not None:
+                llm_task.cancel()
+            raise
+
+        if local_result is not None:
+            if llm_task is not None:
+                llm_task.cancel()
+                _LOGGER.debug("Speculative Ollama request cancelled")
+            return local_result
+
+        # Step 2: Fallback to Ollama. Nicht streamen: das Chat-Log der Pipeline
+        # enthält jetzt den gescheiterten lokalen Turn, den Ollama sonst als
+        # Verlauf mitlesen würde. Der Memo schickt die Frage beim nächsten Mal
+        # direkt (und gestreamt) an Ollama.
+        if llm_task is not None:
+            return await llm_task
+        return await self._async_fallback(user_input, follow_up)
+
+    async def _async_local(self, user_input: ConversationInput) -> ConversationResult | None:
+        """Ask the local agent. Returns None when Ollama should answer instead."""
+        try:
+            with self._stats.measure(STAGE_LOCAL):
+                async with asyncio.timeout(self._local_timeout):
+                    local_result = await async_converse(
+                        hass=self.hass,
+                        text=user_input.text,
+                        conversation_id=user_input.conversation_id,
+                        context=user_input.context,
+                        language=user_input.language or "de",
+                        agent_id=self._local_agent,
+                    )
 
             response = local_result.response
-            if response.response_type.value != "error":
+            if response.response_type != IntentResponseType.ERROR:
                 _LOGGER.debug("Local intent matched: %s", response.response_type)
+                self._memo.async_set(user_input.text, ROUTE_LOCAL)
                 return local_result
 
             # Extract speech
@@ -74,34 +371,145 @@ class JarvisRouterEntity(ConversationEntity):
             if response.speech:
                 speech = response.speech.get("plain", {}).get("speech", "")
 
-            is_no_match = any(p in speech.lower() for p in NO_MATCH_PHRASES)
+            error_code = response.error_code.value if response.error_code else None
+            with self._stats.measure(STAGE_NO_MATCH):
+                is_no_match = self._no_match.is_no_match(error_code, speech)
             if not is_no_match:
-                _LOGGER.debug("Local intent error (keeping): %s", speech)
+                _LOGGER.debug("Local intent error (keeping, %s): %s", error_code, speech)
+                self._memo.async_set(user_input.text, ROUTE_LOCAL)
                 return local_result
 
             _LOGGER.debug("No match, routing to Ollama: %s", speech[:80])
+            self._memo.async_set(user_input.text, ROUTE_LLM)
 
+        except TimeoutError:
+            self._stats.errors += 1
+            _LOGGER.warning("Local agent: keine Antwort nach %.0fs", self._local_timeout)
         except Exception as ex:
+            self._stats.errors += 1
             _LOGGER.warning("Local intent failed: %s", ex)
 
-        # Step 2: Fallback to Ollama
-        try:
-            _LOGGER.debug("Ollama fallback for: %s", text)
-            ollama_result = await async_converse(
-                hass=self.hass,
-                text=text,
-                conversation_id=None,
-                context=user_input.context,
-                language=user_input.language or "de",
-                agent_id="conversation.ollama_conversation",
+        return None
+
+    async def _async_fallback(
+        self, user_input: ConversationInput, follow_up: bool, stream: bool = False
+    ) -> ConversationResult:
+        """Ask the LLM tiers in order (or the response cache).
+
+        Jede Stufe hat ihr eigenes Timeout; Timeout, Exception oder
+        Fehlerantwort → nächste Stufe. Canned error wenn keine antwortet.
+
+        stream=True: Ollama läuft in der Conversation der Pipeline. Dadurch
+        nutzt es deren aktives Chat-Log samt Delta-Listener, und TTS beginnt
+        schon beim ersten Satz statt nach der kompletten Antwort. Nur wenn der
+        lokale Agent in diesem Turn nicht gefragt wurde (Fast Path, Memo).
+
+        follow_up: Folgefrage in einer laufenden Conversation, nie aus dem
+        Cache beantworten und nie cachen.
+        """
+        language = user_input.language or "de"
+        cache_key = (
+            self._cache.key(user_input.text, language, follow_up) if self._cache else None
+        )
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                _LOGGER.debug("Ollama cache hit: %s", user_input.text)
+                response = IntentResponse(language=language)
+                response.async_set_speech(cached)
+                return ConversationResult(
+                    response=response, conversation_id=user_input.conversation_id
+                )
+
+        # Identische Fragen mehrerer Satelliten teilen sich eine Generierung.
+        # Nur ohne Verlauf: Folgefragen hängen an ihrer Conversation, und eine
+        # gestreamte Antwort landet im Chat-Log genau einer Pipeline.
+        coalesce_key = None
+        if not follow_up and not stream:
+            coalesce_key = (normalize_text(user_input.text), language)
+        leader = False
+
+        async def _ask() -> ConversationResult:
+            nonlocal leader
+            leader = True
+            return await self._async_llm_tiers(user_input, stream, cache_key)
+
+        result = await self._admission.run(coalesce_key, _ask)
+        if not leader:
+            return ConversationResult(
+                response=result.response, conversation_id=user_input.conversation_id
             )
-            _LOGGER.debug("Ollama responded")
-            return ollama_result
+        return result
 
-        except Exception as ex:
-            _LOGGER.error("Ollama fallback failed: %s", ex)
-            from homeassistant.helpers.intent import IntentResponse, IntentResponseType
-            err = IntentResponse(language=user_input.language or "de")
-            err.response_type = IntentResponseType.ERROR
-            err.async_set_speech("Entschuldigung, ich konnte keine Antwort finden.")
-            return ConversationResult(response=err, conversation_id=user_input.conversation_id)
+    async def _async_llm_tiers(
+        self,
+        user_input: ConversationInput,
+        stream: bool,
+        cache_key: tuple[str, str] | None,
+    ) -> ConversationResult:
+        """Ask the LLM tiers in order. Runs once per admitted (coalesced) request."""
+        language = user_input.language or "de"
+        last_result = None
+        for agent_id, timeout in self._llm_tiers:
+            try:
+                _LOGGER.debug("LLM fallback (%s) for: %s", agent_id, user_input.text)
+                with self._stats.measure(STAGE_LLM):
+                    async with asyncio.timeout(timeout):
+                        result = await async_converse(
+                            hass=self.hass,
+                            text=user_input.text,
+                            conversation_id=user_input.conversation_id if stream else None,
+                            context=user_input.context,
+                            language=language,
+                            agent_id=agent_id,
+                        )
+            except TimeoutError:
+                self._stats.errors += 1
+                _LOGGER.warning("LLM %s: keine Antwort nach %.0fs", agent_id, timeout)
+                continue
+            except Exception as ex:
+                self._stats.errors += 1
+                _LOGGER.error("LLM %s failed: %s", agent_id, ex)
+                continue
+
+            response = result.response
+            if response.response_type == IntentResponseType.ERROR:
+                _LOGGER.debug("LLM %s answered with an error, trying next tier", agent_id)
+                last_result = result
+                continue
+
+            _LOGGER.debug("LLM %s responded", agent_id)
+            self._keepalive.async_mark_used()
+            if cache_key is not None and response.speech:
+                speech = response.speech.get("plain", {}).get("speech", "")
+                self._cache.put(cache_key, speech)
+            return result
+
+        if last_result is not None:
+            return last_result
+        return self._error_result(user_input, ERROR_ANSWER)
+
+    @callback
+    def _async_is_follow_up(self, conversation_id: str | None) -> bool:
+        """True, wenn der Router in dieser Conversation schon einen Turn hatte."""
+        if not conversation_id:
+            return False
+        now = time.monotonic()
+        last_turn = self._conversations.pop(conversation_id, None)
+        self._conversations[conversation_id] = now
+        while len(self._conversations) > _MAX_CONVERSATIONS:
+            self._conversations.popitem(last=False)
+        return last_turn is not None and now - last_turn < _CONVERSATION_TIMEOUT
+
+    @staticmethod
+    def _error_result(user_input: ConversationInput, speech: str) -> ConversationResult:
+        err = IntentResponse(language=user_input.language or "de")
+        err.response_type = IntentResponseType.ERROR
+        err.async_set_speech(speech)
+        return ConversationResult(response=err, conversation_id=user_input.conversation_id)
+
+    @callback
+    def _async_stats_updated(self) -> None:
+        async_dispatcher_send(
+            self.hass, SIGNAL_STATS_UPDATED.format(self._config_entry.entry_id)
+        )
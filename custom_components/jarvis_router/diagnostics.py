@@ -0,0 +1,25 @@
+"""Diagnostics support for Jarvis Router."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_ADMISSION, DATA_CACHE, DATA_KEEPALIVE, DATA_MEMO, DATA_STATS, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return latency histograms and cache counters for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    cache = data[DATA_CACHE]
+    memo = data[DATA_MEMO]
+    return {
+        "options": dict(entry.options),
+        "latency_ms": data[DATA_STATS].as_dict(),
+        "cache": cache.as_dict() if cache is not None else None,
+        "route_memo": {"size": len(memo), "sentences_hash": memo.sentences_hash},
+        "admission": data[DATA_ADMISSION].as_dict(),
+        "keepalive": {
+            "pings": data[DATA_KEEPALIVE].pings,
+            "skipped": data[DATA_KEEPALIVE].skipped,
+        },
+    }
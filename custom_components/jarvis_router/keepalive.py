@@ -0,0 +1,121 @@
+"""Warm-up and keep-alive pings for the LLM tiers."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, time as dt_time, timedelta
+import logging
+import time
+
+from homeassistant.components.conversation import async_converse
+from homeassistant.const import STATE_ON
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Erstes Laden eines Modells kann auf CPU deutlich länger dauern als eine Antwort
+WARMUP_TIMEOUT = 120.0  # Sekunden
+
+
+def _parse_time(value: str | None) -> dt_time | None:
+    if not value:
+        return None
+    try:
+        return dt_time.fromisoformat(value)
+    except ValueError:
+        _LOGGER.warning("Keep-Alive: ungültige Uhrzeit '%s'", value)
+        return None
+
+
+class LLMKeepAlive:
+    """Hält die LLM-Modelle geladen: Warm-up nach dem Start, danach Pings.
+
+    Kein Ping während der Ruhezeit (quiet_start..quiet_end) oder solange die
+    Schlaf-Entity "on" ist. Nach der Ruhezeit wird beim ersten Tick sofort
+    gepingt, damit die erste Frage am Morgen nicht auf das Laden wartet.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        agent_ids: list[str],
+        text: str,
+        interval_minutes: float,
+        quiet_start: str | None = None,
+        quiet_end: str | None = None,
+        sleep_entity: str | None = None,
+    ) -> None:
+        self._hass = hass
+        self._agent_ids = list(agent_ids)
+        self._text = text
+        self._interval = timedelta(minutes=interval_minutes) if interval_minutes > 0 else None
+        self._quiet_start = _parse_time(quiet_start)
+        self._quiet_end = _parse_time(quiet_end)
+        self._sleep_entity = sleep_entity
+        self._last_used = 0.0
+        self._lock = asyncio.Lock()
+        self.pings = 0
+        self.skipped = 0
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start the ping schedule. Returns the unsubscribe callback."""
+        if self._interval is None:
+            return lambda: None
+        _LOGGER.info("Keep-Alive: LLM-Ping alle %s", self._interval)
+        return async_track_time_interval(self._hass, self._async_tick, self._interval)
+
+    @callback
+    def async_mark_used(self) -> None:
+        """Der Router hat gerade ein LLM benutzt → Modell ist ohnehin warm."""
+        self._last_used = time.monotonic()
+
+    def is_asleep(self, now: datetime | None = None) -> bool:
+        if self._sleep_entity:
+            state = self._hass.states.get(self._sleep_entity)
+            if state is not None and state.state == STATE_ON:
+                return True
+        if self._quiet_start is None or self._quiet_end is None:
+            return False
+        current = (now or dt_util.now()).time()
+        if self._quiet_start <= self._quiet_end:
+            return self._quiet_start <= current < self._quiet_end
+        # Über Mitternacht, z.B. 23:00–06:00
+        return current >= self._quiet_start or current < self._quiet_end
+
+    async def _async_tick(self, now: datetime) -> None:
+        if self.is_asleep(now):
+            self.skipped += 1
+            return
+        if time.monotonic() - self._last_used < self._interval.total_seconds():
+            # Seit dem letzten Tick echte Anfragen → kein zusätzlicher Ping nötig
+            self.skipped += 1
+            return
+        await self.async_warm_up()
+
+    async def async_warm_up(self) -> None:
+        """Send a tiny request to every LLM tier so the models get loaded."""
+        if self._lock.locked():
+            return
+        async with self._lock:
+            for agent_id in self._agent_ids:
+                start = time.monotonic()
+                try:
+                    async with asyncio.timeout(WARMUP_TIMEOUT):
+                        await async_converse(
+                            hass=self._hass,
+                            text=self._text,
+                            conversation_id=None,
+                            context=Context(),
+                            language="de",
+                            agent_id=agent_id,
+                        )
+                except Exception as ex:
+                    _LOGGER.warning("Keep-Alive: %s nicht erreichbar: %s", agent_id, ex)
+                    continue
+                self.pings += 1
+                _LOGGER.debug(
+                    "Keep-Alive: %s warm (%.1fs)", agent_id, time.monotonic() - start
+                )
+            self.async_mark_used()
@@ -0,0 +1,336 @@
+"""Compiled pre-matcher for custom_sentences.
+
+Übersetzt die Sentence-Templates (hassil-Syntax: (a|b), [optional],
+<expansion_rule>, {list}) einmalig in eine einzige Regex. Damit lässt sich
+eine Äußerung in Mikrosekunden klassifizieren, bevor der lokale Agent oder
+Ollama überhaupt angefragt wird.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import glob
+import logging
+import os
+import re
+
+import yaml
+
+_LOGGER = logging.getLogger(__name__)
+
+ROUTE_LOCAL = "local"
+ROUTE_LLM = "llm"
+ROUTE_UNKNOWN = "unknown"
+
+_RE_NON_WORD = re.compile(r"[^\w%]+")
+_WILDCARD = r"(?P<{group}>.+?)"
+_NUMBER = r"(?:\d+)"
+_SPACE = " *"
+# Von HA bereitgestellte Listen (Entity-/Area-Namen)
+_ENTITY_LISTS = {"name", "area", "floor"}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, Satzzeichen entfernen, Whitespace zusammenfassen."""
+    return _RE_NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class PreMatch:
+    """Ergebnis einer Pre-Match-Klassifikation."""
+
+    route: str
+    intent: str | None = None
+    confidence: float = 0.0
+
+
+class TemplateError(ValueError):
+    """Template konnte nicht übersetzt werden."""
+
+
+class _TemplateCompiler:
+    """Übersetzt hassil-Templates in Regex-Fragmente."""
+
+    def __init__(self, expansion_rules: dict, lists: dict) -> None:
+        self._rules = expansion_rules
+        self._lists = lists
+        self._rule_cache: dict[str, str] = {}
+        self._list_cache: dict[str, str] = {}
+        self._stack: set[str] = set()
+        self._slot_count = 0
+
+    def compile(self, template: str) -> str:
+        pattern, pos = self._parse_sequence(template, 0, end_chars="")
+        if pos != len(template):
+            raise TemplateError(f"Unerwartetes Zeichen an Position {pos}: {template}")
+        return pattern
+
+    def _parse_sequence(self, text: str, pos: int, end_chars: str) -> tuple[str, int]:
+        """Parst bis zu einem Zeichen aus end_chars. Gibt (regex, pos) zurück."""
+        alternatives: list[str] = []
+        parts: list[str] = []
+        literal: list[str] = []
+
+        def flush_literal() -> None:
+            if literal:
+                parts.append(self._literal("".join(literal)))
+                literal.clear()
+
+        while pos < len(text):
+            char = text[pos]
+            if char in end_chars:
+                break
+            if char == "|":
+                flush_literal()
+                alternatives.append("".join(parts))
+                parts = []
+                pos += 1
+            elif char in "([":
+                flush_literal()
+                close = ")" if char == "(" else "]"
+                inner, pos = self._parse_sequence(text, pos + 1, end_chars=close)
+                if pos >= len(text):
+                    raise TemplateError(f"Fehlendes '{close}': {text}")
+                parts.append(f"(?:{inner})" + ("?" if char == "[" else ""))
+                pos += 1
+            elif char in "<{":
+                flush_literal()
+                close = ">" if char == "<" else "}"
+                end = text.find(close, pos)
+                if end < 0:
+                    raise TemplateError(f"Fehlendes '{close}': {text}")
+                name = text[pos + 1:end].strip()
+                parts.append(self._rule(name) if char == "<" else self._list(name))
+                pos = end + 1
+            else:
+                literal.append(char)
+                pos += 1
+
+        flush_literal()
+        alternatives.append("".join(parts))
+        if len(alternatives) == 1:
+            return alternatives[0], pos
+        return "|".join(alternatives), pos
+
+    @staticmethod
+    def _literal(text: str) -> str:
+        words = normalize_text(text).split()
+        if not words:
+            return _SPACE
+        pattern = _SPACE.join(re.escape(word) for word in words)
+        # Whitespace an den Rändern flexibel halten ("[bitte] licht" → " *")
+        if text[:1].isspace() or not text[:1].isalnum():
+            pattern = _SPACE + pattern
+        if text[-1:].isspace() or not text[-1:].isalnum():
+            pattern = pattern + _SPACE
+        return pattern
+
+    def _rule(self, name: str) -> str:
+        if name in self._rule_cache:
+            return self._rule_cache[name]
+        if name not in self._rules:
+            raise TemplateError(f"Unbekannte Expansion-Rule <{name}>")
+        if name in self._stack:
+            raise TemplateError(f"Rekursive Expansion-Rule <{name}>")
+        self._stack.add(name)
+        try:
+            pattern = f"(?:{self.compile(str(self._rules[name]))})"
+        finally:
+            self._stack.discard(name)
+        # Rules mit Slots nicht cachen: jede Verwendung braucht eigene
+        # Group-Namen, sonst scheitert die kombinierte Regex an Duplikaten
+        if "(?P<" not in pattern:
+            self._rule_cache[name] = pattern
+        return pattern
+
+    def _list(self, name: str) -> str:
+        # {list:slot} → Liste "list"
+        name = name.split(":", 1)[0].strip()
+        if name in self._list_cache:
+            return self._list_cache[name]
+
+        definition = self._lists.get(name)
+        if name in _ENTITY_LISTS and definition is None:
+            # Entity-/Area-Slots: Namen sind zur Build-Zeit unbekannt und
+            # werden beim Klassifizieren nachgeprüft
+            return self._slot("e")
+        if not isinstance(definition, dict) or definition.get("wildcard"):
+            return self._slot("w")
+        if "range" in definition:
+            pattern = _NUMBER
+        else:
+            values = []
+            for value in definition.get("values") or []:
+                source = value.get("in") if isinstance(value, dict) else value
+                if source is None:
+                    continue
+                values.append(self.compile(str(source)))
+            if not values:
+                return self._slot("w")
+            pattern = f"(?:{'|'.join(values)})"
+
+        self._list_cache[name] = pattern
+        return pattern
+
+    def _slot(self, kind: str) -> str:
+        """Eindeutig benannte Capture-Group (e = Entity/Area, w = Wildcard)."""
+        self._slot_count += 1
+        return _WILDCARD.format(group=f"{kind}{self._slot_count}")
+
+
+def _slot_groups(pattern: re.Pattern) -> tuple[tuple[int, bool], ...]:
+    """(Gruppen-Index, ist Entity-Slot) für alle Slot-Groups eines Patterns."""
+    return tuple(
+        (idx, name[0] == "e")
+        for name, idx in pattern.groupindex.items()
+        if name[0] in "ew"
+    )
+
+
+class SentenceMatcher:
+    """Klassifiziert Äußerungen gegen alle Custom Sentences mit einer Regex."""
+
+    def __init__(
+        self,
+        pattern: re.Pattern | None,
+        intent_groups: dict[str, str],
+        entity_sentences: list[tuple[re.Pattern, str]] | None = None,
+        llm_prefixes: list[str] | None = None,
+    ) -> None:
+        self._pattern = pattern
+        self._intent_groups = intent_groups
+        self._slot_groups = _slot_groups(pattern) if pattern is not None else ()
+        # Einzel-Patterns aller Sätze mit Entity-Slot: nur nötig, wenn der
+        # kombinierte Match an einem unbekannten Namen scheitert
+        self._entity_sentences = [
+            (sentence, intent, _slot_groups(sentence))
+            for sentence, intent in entity_sentences or []
+        ]
+        prefixes = [normalize_text(p) for p in (llm_prefixes or []) if p]
+        self._llm_prefixes = tuple(p for p in prefixes if p)
+
+    @property
+    def intent_count(self) -> int:
+        return len(self._intent_groups)
+
+    @classmethod
+    def from_directory(
+        cls, path: str, llm_prefixes: list[str] | None = None
+    ) -> SentenceMatcher:
+        """Lädt custom_sentences/<lang>/*.yaml und kompiliert sie.
+
+        Blockierend (Datei-IO) → im Executor aufrufen.
+        """
+        documents = []
+        for file_path in sorted(glob.glob(os.path.join(path, "*.yaml"))):
+            try:
+                with open(file_path, encoding="utf-8") as handle:
+                    data = yaml.safe_load(handle) or {}
+            except (OSError, yaml.YAMLError) as ex:
+                _LOGGER.warning("Pre-Matcher: %s nicht lesbar: %s", file_path, ex)
+                continue
+            if isinstance(data, dict):
+                documents.append(data)
+        return cls.from_documents(documents, llm_prefixes)
+
+    @classmethod
+    def from_documents(
+        cls, documents: list[dict], llm_prefixes: list[str] | None = None
+    ) -> SentenceMatcher:
+        """Kompiliert bereits geladene Sentence-Dokumente.
+
+        Expansion-Rules und Listen gelten wie in HA dateiübergreifend.
+        """
+        expansion_rules: dict = {}
+        lists: dict = {}
+        for data in documents:
+            expansion_rules.update(data.get("expansion_rules") or {})
+            lists.update(data.get("lists") or {})
+
+        compiler = _TemplateCompiler(expansion_rules, lists)
+        intent_patterns: dict[str, list[str]] = {}
+        entity_sentences: list[tuple[re.Pattern, str]] = []
+        for data in documents:
+            for intent_name, intent in (data.get("intents") or {}).items():
+                for block in (intent or {}).get("data") or []:
+                    for sentence in block.get("sentences") or []:
+                        try:
+                            pattern = compiler.compile(str(sentence))
+                        except TemplateError as ex:
+                            _LOGGER.debug("Pre-Matcher: überspringe Template: %s", ex)
+                            continue
+                        intent_patterns.setdefault(intent_name, []).append(pattern)
+                        if "(?P<e" in pattern:
+                            entity_sentences.append(
+                                (re.compile(f"^ *(?:{pattern}) *$"), intent_name)
+                            )
+
+        intent_groups: dict[str, str] = {}
+        branches = []
+        for idx, (intent_name, patterns) in enumerate(intent_patterns.items()):
+            group = f"i{idx}"
+            intent_groups[group] = intent_name
+            branches.append(f"(?P<{group}>{'|'.join(patterns)})")
+
+        compiled = None
+        if branches:
+            compiled = re.compile(f"^ *(?:{'|'.join(branches)}) *$")
+        _LOGGER.debug("Pre-Matcher: %d Intents kompiliert", len(intent_groups))
+        return cls(compiled, intent_groups, entity_sentences, llm_prefixes)
+
+    def classify(self, text: str, known_names: set[str] | None = None) -> PreMatch:
+        """Klassifiziert eine Äußerung.
+
+        ROUTE_LOCAL:   ein Custom Sentence matcht (confidence = Anteil des
+                       Texts, der durch feste Wörter statt Slots gedeckt ist)
+        ROUTE_LLM:     kein (belastbarer) Match, beginnt mit einem Fragewort
+        ROUTE_UNKNOWN: kein Match, lokaler Agent (Built-in Intents) entscheidet
+
+        known_names: normalisierte Entity-/Area-Namen. Ein Match, dessen
+        Entity-Slot keinen bekannten Namen trifft ("was ist ein quasar" →
+        GetCoverState mit name="ein quasar"), zählt nicht als lokal.
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return PreMatch(ROUTE_UNKNOWN)
+
+        match = self._pattern.match(normalized) if self._pattern else None
+        if match is not None:
+            result = self._evaluate(
+                match, self._slot_groups,
+                self._intent_groups.get(match.lastgroup), known_names,
+            )
+            if result is None:
+                # Erster Treffer hing an einem unbekannten Namen → andere
+                # Sätze mit Entity-Slot einzeln prüfen
+                for sentence, intent, slot_groups in self._entity_sentences:
+                    sentence_match = sentence.match(normalized)
+                    if sentence_match is None:
+                        continue
+                    result = self._evaluate(sentence_match, slot_groups, intent, known_names)
+                    if result is not None:
+                        break
+            if result is not None:
+                return result
+
+        if normalized.startswith(self._llm_prefixes):
+            return PreMatch(ROUTE_LLM)
+        return PreMatch(ROUTE_UNKNOWN)
+
+    @staticmethod
+    def _evaluate(
+        match: re.Match,
+        slot_groups: tuple[tuple[int, bool], ...],
+        intent: str | None,
+        known_names: set[str] | None,
+    ) -> PreMatch | None:
+        slot_chars = 0
+        for idx, is_entity in slot_groups:
+            value = match.group(idx)
+            if value is None:
+                continue
+            value = value.strip()
+            if is_entity and known_names is not None and value not in known_names:
+                return None
+            slot_chars += len(value)
+        confidence = 1.0 - slot_chars / max(len(match.string), 1)
+        return PreMatch(ROUTE_LOCAL, intent=intent, confidence=round(max(confidence, 0.0), 3))
@@ -0,0 +1,101 @@
+"""Persistent memo of routing decisions (utterance → local/llm)."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import glob
+import hashlib
+import logging
+import os
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .matcher import normalize_text
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.route_memo"
+SAVE_DELAY = 30  # Sekunden
+
+
+def hash_sentences(path: str) -> str:
+    """SHA-256 über alle custom_sentences-Dateien. Blockierend (Datei-IO)."""
+    digest = hashlib.sha256()
+    for file_path in sorted(glob.glob(os.path.join(path, "*.yaml"))):
+        digest.update(os.path.basename(file_path).encode("utf-8"))
+        try:
+            with open(file_path, "rb") as handle:
+                digest.update(handle.read())
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+class RouteMemo:
+    """Size-bounded LRU of normalized utterance → route, stored via HA Store.
+
+    Gilt nur für einen Stand der custom_sentences: ändert sich deren Hash,
+    wird der Memo verworfen.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_size: int) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._max_size = max(int(max_size), 0)
+        self._routes: OrderedDict[str, str] = OrderedDict()
+        self.sentences_hash: str | None = None
+
+    async def async_load(self, sentences_hash: str) -> None:
+        data = await self._store.async_load() or {}
+        self.sentences_hash = sentences_hash
+        if data.get("sentences_hash") != sentences_hash:
+            if data:
+                _LOGGER.info("Route-Memo verworfen: custom_sentences haben sich geändert")
+                self._async_schedule_save()
+            return
+        routes = data.get("routes") or {}
+        self._routes = OrderedDict(list(routes.items())[-self._max_size:] if self._max_size else [])
+        _LOGGER.debug("Route-Memo geladen: %d Einträge", len(self._routes))
+
+    def get(self, text: str) -> str | None:
+        key = normalize_text(text)
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+        return route
+
+    @callback
+    def async_set(self, text: str, route: str) -> None:
+        key = normalize_text(text)
+        if not key or self._max_size == 0:
+            return
+        if self._routes.get(key) == route:
+            self._routes.move_to_end(key)
+            return
+        self._routes[key] = route
+        self._routes.move_to_end(key)
+        while len(self._routes) > self._max_size:
+            self._routes.popitem(last=False)
+        self._async_schedule_save()
+
+    @callback
+    def async_invalidate(self, sentences_hash: str | None = None) -> None:
+        """Alle Einträge verwerfen (z.B. neue Sentences oder Entities)."""
+        if sentences_hash is not None:
+            self.sentences_hash = sentences_hash
+        if not self._routes:
+            return
+        self._routes.clear()
+        self._async_schedule_save()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {"sentences_hash": self.sentences_hash, "routes": dict(self._routes)}
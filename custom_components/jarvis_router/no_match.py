@@ -0,0 +1,44 @@
+"""No-match detection for local agent responses.
+
+Entscheidet, ob eine Fehlerantwort des lokalen Agents "nicht verstanden"
+bedeutet (→ Ollama) oder ein echter Fehler ist, den der Nutzer hören soll.
+Reine Funktion über Strings, damit sie ohne HA testbar und messbar bleibt.
+"""
+from __future__ import annotations
+
+import re
+
+# Werte von homeassistant.helpers.intent.IntentResponseErrorCode
+ERROR_NO_INTENT_MATCH = "no_intent_match"
+ERROR_NO_VALID_TARGETS = "no_valid_targets"
+ERROR_FAILED_TO_HANDLE = "failed_to_handle"
+
+# Eindeutig: lokal gibt es dafür keinen Intent bzw. kein Ziel
+_NO_MATCH_CODES = frozenset({ERROR_NO_INTENT_MATCH, ERROR_NO_VALID_TARGETS})
+
+
+class NoMatchClassifier:
+    """Error code first, then one compiled regex over all phrases."""
+
+    def __init__(self, phrases: list[str]) -> None:
+        cleaned = sorted(
+            {p.strip().casefold() for p in phrases if p and p.strip()},
+            key=len,
+            reverse=True,
+        )
+        self._pattern = re.compile("|".join(map(re.escape, cleaned))) if cleaned else None
+
+    def is_no_match(self, error_code: str | None, speech: str) -> bool:
+        """True wenn Ollama übernehmen soll.
+
+        error_code: IntentResponse.error_code.value (oder None)
+        speech:     gesprochene Fehlermeldung des lokalen Agents
+        """
+        if error_code in _NO_MATCH_CODES:
+            return True
+        if error_code == ERROR_FAILED_TO_HANDLE:
+            # Intent erkannt, Ausführung fehlgeschlagen → Fehler vorlesen
+            return False
+        if self._pattern is None or not speech:
+            return False
+        return self._pattern.search(speech.casefold()) is not None
@@ -0,0 +1,141 @@
+"""Diagnostic sensors for Jarvis Router."""
+import logging
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DATA_ADMISSION, DATA_CACHE, DATA_STATS, DOMAIN, SIGNAL_STATS_UPDATED
+from .stats import (
+    STAGE_LLM,
+    STAGE_LOCAL,
+    STAGE_NO_MATCH,
+    STAGE_PREMATCH,
+    STAGE_TOTAL,
+    LatencyStats,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+LATENCY_SENSORS = {
+    STAGE_PREMATCH: "Latenz Pre-Match",
+    STAGE_LOCAL: "Latenz lokaler Agent",
+    STAGE_NO_MATCH: "Latenz No-Match-Entscheidung",
+    STAGE_LLM: "Latenz Ollama",
+    STAGE_TOTAL: "Latenz gesamt",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Jarvis Router sensors."""
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    entities = [
+        JarvisRouterLatencySensor(config_entry, data[DATA_STATS], stage, name)
+        for stage, name in LATENCY_SENSORS.items()
+    ]
+    if data[DATA_CACHE] is not None:
+        entities.append(JarvisRouterCacheSensor(config_entry, data[DATA_CACHE]))
+    entities.append(JarvisRouterQueueSensor(config_entry, data[DATA_ADMISSION]))
+    async_add_entities(entities)
+
+
+class JarvisRouterSensor(SensorEntity):
+    """Base class: updated via dispatcher after each routed request."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, config_entry: ConfigEntry, key: str) -> None:
+        self._config_entry = config_entry
+        self._attr_unique_id = f"{config_entry.entry_id}_{key}"
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_STATS_UPDATED.format(self._config_entry.entry_id),
+                self._async_stats_updated,
+            )
+        )
+
+    @callback
+    def _async_stats_updated(self) -> None:
+        self.async_write_ha_state()
+
+
+class JarvisRouterCacheSensor(JarvisRouterSensor):
+    """Cache hits (state) plus misses/size/hit rate as attributes."""
+
+    _attr_name = "Ollama Cache Hits"
+    _attr_icon = "mdi:cached"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, config_entry: ConfigEntry, cache) -> None:
+        super().__init__(config_entry, "cache")
+        self._cache = cache
+
+    @property
+    def native_value(self) -> int:
+        return self._cache.hits
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self._cache.as_dict()
+
+
+class JarvisRouterQueueSensor(JarvisRouterSensor):
+    """LLM requests waiting for a slot (state), in-flight/coalesced as attributes."""
+
+    _attr_name = "LLM Warteschlange"
+    _attr_icon = "mdi:tray-full"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, config_entry: ConfigEntry, admission) -> None:
+        super().__init__(config_entry, "queue_depth")
+        self._admission = admission
+
+    @property
+    def native_value(self) -> int:
+        return self._admission.waiting
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self._admission.as_dict()
+
+
+class JarvisRouterLatencySensor(JarvisRouterSensor):
+    """p95 latency of one routing stage, p50/p99 as attributes."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, config_entry: ConfigEntry, stats: LatencyStats, stage: str, name: str
+    ) -> None:
+        super().__init__(config_entry, f"latency_{stage}")
+        self._stats = stats
+        self._stage = stage
+        self._attr_name = f"{name} p95"
+
+    @property
+    def native_value(self) -> float | None:
+        summary = self._stats.summary(self._stage)
+        return summary["p95"] if summary["window"] else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self._stats.summary(self._stage)
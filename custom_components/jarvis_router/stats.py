@@ -0,0 +1,63 @@
+"""Rolling per-stage latency statistics for Jarvis Router."""
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+import math
+import time
+
+STAGE_PREMATCH = "prematch"
+STAGE_LOCAL = "local"
+STAGE_NO_MATCH = "no_match"
+STAGE_LLM = "llm"
+STAGE_TOTAL = "total"
+
+STAGES = (STAGE_PREMATCH, STAGE_LOCAL, STAGE_NO_MATCH, STAGE_LLM, STAGE_TOTAL)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LatencyStats:
+    """Keeps the last N durations (ms) per stage."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self._counts = dict.fromkeys(STAGES, 0)
+        self.errors = 0
+
+    def record(self, stage: str, duration_ms: float) -> None:
+        self._samples[stage].append(duration_ms)
+        self._counts[stage] += 1
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Time a block with time.monotonic() and record it."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.monotonic() - start) * 1000)
+
+    def summary(self, stage: str) -> dict:
+        samples = self._samples[stage]
+        values = sorted(samples)
+        return {
+            "count": self._counts[stage],
+            "window": len(values),
+            "last": round(samples[-1], 1) if samples else None,
+            "mean": round(sum(values) / len(values), 1) if values else None,
+            "p50": round(_percentile(values, 50), 1),
+            "p95": round(_percentile(values, 95), 1),
+            "p99": round(_percentile(values, 99), 1),
+        }
+
+    def as_dict(self) -> dict:
+        data = {stage: self.summary(stage) for stage in STAGES}
+        data["errors"] = self.errors
+        return data
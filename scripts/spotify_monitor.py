@@ -1,24 +1,43 @@
 #!/usr/bin/env python3
 """
-Spotify Track Monitor v3 — ADB MediaSession + Keep-Alive + Ducking
+Spotify Track Monitor v4 — ADB MediaSession + Keep-Alive + Ducking
 ===================================================================
 Alles-in-einem-Daemon für Jarvis (Echo Show 5 mit LineageOS):
 
 1. TRACK MONITOR — Erkennt Titelwechsel/Play/Pause via ADB MediaSession
+   → Persistenter ADB-Shell-Kanal meldet Änderungen (dumpsys-Poll als Fallback)
    → HA Entity-Update erzwingen, Display-Navigation
 
 2. KEEP-ALIVE — Hält Spotify App permanent im Hintergrund am Leben
-   → Prüft alle 30s ob Spotify-Prozess läuft, startet ihn falls nicht
+   → Erfährt vom Prozess-Tod per logcat (am_proc_died), startet Spotify neu
+     (pidof-Poll nur als Fallback ohne Kanal)
    → Doze-Whitelist → Android killt ihn nicht
    → VACA bleibt immer im Vordergrund (kein App-Stealing)
 
 3. DUCKING — Pausiert Musik bei Spracheingabe via ADB KeyEvent
-   → Pollt assist_satellite State via HA API
+   → Wake-Word-Event (assist_pipeline_wake_word_end bzw. run_start ab STT)
+     per WebSocket pausiert sofort
+   → assist_satellite State per HA WebSocket (subscribe_entities),
+     REST-Polling nur als Fallback
    → Bei Spracheingabe: KEYCODE_MEDIA_PAUSE (~100ms statt 2-3s)
-   → Bei Ende: KEYCODE_MEDIA_PLAY
+   → Bei Ende: KEYCODE_MEDIA_PLAY, sobald die Pipeline fertig ist
+     (assist_pipeline_run_end) — außer nach Stopp-Intent
+
+Mehrere Echo Shows: SPOTIFY_DEVICES_FILE (JSON) listet die Geräte; jedes bekommt
+eigene ADB-Verbindung und eigene Tasks, HA-Verbindungen teilen sich alle.
+
+Jeder Teil läuft als eigener asyncio-Task mit eigenem Takt; SIGTERM/SIGINT
+beenden alle Tasks geordnet (ADB trennen). Dass nur eine Instanz läuft, stellt
+spotify_monitor_supervisor.sh sicher (keine eigene PID-Datei mehr).
 
 Start:
   python3 /config/scripts/spotify_monitor.py &
+
+Parser-Benchmark (dumpsys-Mitschnitte, läuft ohne ADB/HA; ohne Datei die
+Blöcke aus fixtures/):
+  python3 /config/scripts/spotify_monitor.py --bench-parser [capture.txt ...]
+
+Aufzeichnen/Abspielen der ganzen Zustandsmaschine ohne ADB/HA: spotify_replay.py
 """
 
 import json
@@ -27,11 +46,16 @@ import re
 import sys
 import time
 import logging
-import urllib.request
+import collections
+import http.client
+import queue
 import urllib.parse
-import urllib.error
 import signal
 import threading
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
 from datetime import datetime, timezone
 
 # ============================================================================
@@ -43,8 +67,8 @@ POLL_INTERVAL_IDLE = float(os.getenv("SPOTIFY_POLL_INTERVAL_IDLE", "1.0"))
 ADB_RECONNECT_WAIT = 10    # Sekunden zwischen Reconnect-Versuchen
 ADB_TIMEOUT = 8            # ADB-Verbindungs-Timeout
 
-ECHO_HOST = "192.168.178.103"
-ECHO_PORT = 5555
+ECHO_HOST = os.getenv("ECHO_HOST", "192.168.178.103")
+ECHO_PORT = int(os.getenv("ECHO_PORT", "5555"))
 ADB_KEY_PATH = "/config/.storage/adbkey"
 
 
@@ -75,6 +99,11 @@ SPOTIFY_VOLUME_MAX_STEPS = int(os.getenv("SPOTIFY_VOLUME_MAX_STEPS", "15"))
 SPOTIFY_VOLUME_SYNC_ONLY_WHEN_PLAYING = env_bool("SPOTIFY_VOLUME_SYNC_ONLY_WHEN_PLAYING", default=True)
 SPOTIFY_VOLUME_SYNC_REQUIRE_SOURCE_MATCH = env_bool("SPOTIFY_VOLUME_SYNC_REQUIRE_SOURCE_MATCH", default=True)
 SPOTIFY_VOLUME_CACHE_FILE = os.getenv("SPOTIFY_VOLUME_CACHE_FILE", "/config/scripts/.spotify_last_volume")
+# Volume-Sync per WebSocket-Event: Slider-Züge erst nach Ruhe (spätestens nach MAX) übernehmen
+SPOTIFY_VOLUME_DEBOUNCE = float(os.getenv("SPOTIFY_VOLUME_DEBOUNCE", "0.3"))
+SPOTIFY_VOLUME_DEBOUNCE_MAX = float(os.getenv("SPOTIFY_VOLUME_DEBOUNCE_MAX", "1.0"))
+# Cache-Datei erst schreiben, wenn sich der Index so lange nicht geändert hat
+SPOTIFY_VOLUME_CACHE_DELAY = float(os.getenv("SPOTIFY_VOLUME_CACHE_DELAY", "5"))
 SPOTIFY_HA_FAST_REFRESH_ENABLED = env_bool("SPOTIFY_HA_FAST_REFRESH_ENABLED", default=True)
 SPOTIFY_HA_FAST_REFRESH_INTERVAL = float(os.getenv("SPOTIFY_HA_FAST_REFRESH_INTERVAL", "1.2"))
 SPOTIFY_USER_STOP_COOLDOWN_SECONDS = int(os.getenv("SPOTIFY_USER_STOP_COOLDOWN_SECONDS", "900"))
@@ -82,10 +111,44 @@ SPOTIFY_USER_STOP_MARKER_FILE = os.getenv("SPOTIFY_USER_STOP_MARKER_FILE", "/con
 SPOTIFY_ALWAYS_REACHABLE = env_bool("SPOTIFY_ALWAYS_REACHABLE", default=True)
 SPOTIFY_STOP_PAUSE_VIA_HA = env_bool("SPOTIFY_STOP_PAUSE_VIA_HA", default=True)
 SPOTIFY_DUCKING_CONTROL_VIA_HA = env_bool("SPOTIFY_DUCKING_CONTROL_VIA_HA", default=True)
+SPOTIFY_HA_WEBSOCKET_ENABLED = env_bool("SPOTIFY_HA_WEBSOCKET_ENABLED", default=True)
+SPOTIFY_ADB_STREAM_ENABLED = env_bool("SPOTIFY_ADB_STREAM_ENABLED", default=True)
+# Adaptives Polling: selten mitten im Titel, dicht ums erwartete Titelende
+SPOTIFY_ADAPTIVE_POLL_ENABLED = env_bool("SPOTIFY_ADAPTIVE_POLL_ENABLED", default=True)
+POLL_INTERVAL_MIDTRACK_MAX = float(os.getenv("SPOTIFY_POLL_INTERVAL_MIDTRACK_MAX", "10"))
+POLL_TRACK_END_WINDOW = float(os.getenv("SPOTIFY_POLL_TRACK_END_WINDOW", "3"))
+POLL_INTERVAL_IDLE_MAX = float(os.getenv("SPOTIFY_POLL_INTERVAL_IDLE_MAX", "8"))
+POLL_IDLE_BACKOFF_AFTER = float(os.getenv("SPOTIFY_POLL_IDLE_BACKOFF_AFTER", "60"))
+# Session-Flicker-Debounce: erst nach N aufeinanderfolgenden leeren Polls "keine Session"
+SESSION_NONE_THRESHOLD = int(os.getenv("SPOTIFY_SESSION_NONE_THRESHOLD", "3"))
+# Mehrere Echo Shows in einem Prozess (JSON-Liste, siehe spotify_devices.json.example).
+# Ohne Datei: ein Gerät aus ECHO_HOST/SATELLITE_ENTITY/... wie bisher.
+SPOTIFY_DEVICES_FILE = os.getenv("SPOTIFY_DEVICES_FILE", "/config/scripts/spotify_devices.json")
+# Status-Datei (JSON) für HA-Sensoren; leer = aus
+SPOTIFY_METRICS_FILE = os.getenv("SPOTIFY_METRICS_FILE", "/config/scripts/.spotify_monitor_status.json")
+SPOTIFY_METRICS_INTERVAL = float(os.getenv("SPOTIFY_METRICS_INTERVAL", "10"))
+# Vorausschauendes Ducking: HA-Bus-Events beim Wake-Word (per WebSocket) pausieren
+# sofort, statt auf den Satellite-State zu warten. Leer = nur Satellite-State.
+SPOTIFY_DUCKING_WAKE_EVENTS = tuple(
+    e.strip() for e in os.getenv(
+        "SPOTIFY_DUCKING_WAKE_EVENTS", "assist_pipeline_run_start,assist_pipeline_wake_word_end"
+    ).split(",")
+    if e.strip())
+SPOTIFY_DUCKING_BUDGET_MS = float(os.getenv("SPOTIFY_DUCKING_BUDGET_MS", "150"))
+# Wake-Event ohne anschließende Spracheingabe (Satellite bleibt idle) → Resume nach
+SPOTIFY_DUCKING_WAKE_GRACE = float(os.getenv("SPOTIFY_DUCKING_WAKE_GRACE", "5"))
+# Resume-Entscheidung beim Pipeline-Ende statt Boolean-Polling; leer = nur Boolean
+SPOTIFY_DUCKING_END_EVENTS = tuple(
+    e.strip() for e in os.getenv("SPOTIFY_DUCKING_END_EVENTS", "assist_pipeline_run_end").split(",")
+    if e.strip())
+# Intents, nach denen die Musik pausiert bleibt (zusätzlich zum Boolean OFF)
+SPOTIFY_DUCKING_STOP_INTENTS = frozenset(
+    e.strip() for e in os.getenv("SPOTIFY_DUCKING_STOP_INTENTS", "HassMediaPause").split(",")
+    if e.strip())
+DUCKING_BOOLEAN = "input_boolean.spotify_ducking_active"
 
 LOG_DIR = "/config/logs"
 LOG_FILE = os.path.join(LOG_DIR, "spotify_monitor.log")
-PID_FILE = "/config/scripts/.spotify_monitor.pid"
 
 # PlaybackState-Konstanten (Android MediaSession)
 STATE_NONE = 0
@@ -122,37 +185,328 @@ log.addHandler(sh)
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from secrets_config import HA_TOKEN
 
+try:
+    import aiohttp
+except ImportError:  # Ohne aiohttp läuft der Monitor wie bisher per REST
+    aiohttp = None
+
+# ============================================================================
+# METRIKEN — Zähler und Latenz-Histogramme für die Status-Datei
+# ============================================================================
+
+def latency_summary(values):
+    """p50/p95/max in ms aus einer Liste von Latenzen (ms)."""
+    values = sorted(values)
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    return {
+        "p50_ms": round(values[len(values) // 2], 1),
+        "p95_ms": round(values[min(int(len(values) * 0.95), len(values) - 1)], 1),
+        "max_ms": round(values[-1], 1),
+    }
+
+
+class Metrics:
+    """Thread-sichere Zähler, Gauges und Latenz-Histogramme.
+
+    Histogramme haben feste Buckets (kumulativ wie bei Prometheus) plus die
+    letzten 200 Werte für p50/p95. snapshot() liefert alles als JSON-fähiges
+    dict für write_status().
+    """
+
+    BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, ms):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = {
+                    "buckets": [0] * (len(self.BUCKETS_MS) + 1),
+                    "count": 0, "sum_ms": 0.0, "last_ms": None,
+                    "recent": collections.deque(maxlen=200),
+                }
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    hist["buckets"][i] += 1
+                    break
+            else:
+                hist["buckets"][-1] += 1
+            hist["count"] += 1
+            hist["sum_ms"] += ms
+            hist["last_ms"] = ms
+            hist["recent"].append(ms)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: dict(v, buckets=list(v["buckets"]), recent=list(v["recent"]))
+                          for k, v in self._histograms.items()}
+        result = {}
+        for name, hist in histograms.items():
+            cumulative, buckets = 0, {}
+            for bound, n in zip(self.BUCKETS_MS + ("inf",), hist["buckets"]):
+                cumulative += n
+                buckets[f"le_{bound}"] = cumulative
+            result[name] = {
+                "count": hist["count"],
+                "sum_ms": round(hist["sum_ms"], 1),
+                "last_ms": round(hist["last_ms"], 1),
+                **latency_summary(hist["recent"]),
+                "buckets": buckets,
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": result}
+
+
+class Stopwatch:
+    """with Stopwatch(metrics, "name"): ... → Dauer landet als Histogramm in metrics."""
+
+    __slots__ = ("metrics", "name", "start", "ms")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+        self.ms = 0.0
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.monotonic() - self.start) * 1000
+        self.metrics.observe(self.name, self.ms)
+        return False
+
+# ============================================================================
+# HTTP HELPERS — persistente Keep-Alive-Verbindungen zu HA
+# ============================================================================
+# Früher baute jeder Aufruf eine neue urllib-Verbindung auf (TCP-Setup pro
+# Poll). Jetzt teilen sich alle Threads einen kleinen Pool von HTTP/1.1-
+# Verbindungen. Verbindungsfehler (z.B. von HA geschlossene Idle-Verbindung)
+# → neue Verbindung + Retry mit Backoff; Timeouts werden NICHT wiederholt,
+# sonst würde ein hängendes HA das Ducking vervielfacht aufhalten.
+
+HTTP_POOL_SIZE = 4
+HTTP_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.1        # Sekunden, verdoppelt sich pro Versuch
+HTTP_STATS_LOG_INTERVAL = 300   # Sekunden zwischen Statistik-Zeilen im Log
+
+# Timeouts pro Endpoint (längster passender Präfix gewinnt)
+HTTP_TIMEOUTS = {
+    "GET /states": 5,
+    "POST /services": 8,
+    "POST /services/media_player": 4,     # Ducking: lieber schnell scheitern
+    "POST /services/input_boolean": 4,
+}
+
+
+def _endpoint(method, path):
+    """'POST /services/media_player/media_pause', 'GET /states' (ohne Entity-ID)."""
+    parts = path.split("?", 1)[0].split("/")
+    if len(parts) > 1 and parts[1] == "api":
+        parts = [""] + parts[2:]
+    depth = 4 if len(parts) > 1 and parts[1] == "services" else 2
+    return f"{method} {'/'.join(parts[:depth])}"
+
+
+class HTTPPool:
+    """Thread-sicherer Pool persistenter HTTP/1.1-Verbindungen zu einem Host."""
+
+    def __init__(self, base_url, size=HTTP_POOL_SIZE, retries=HTTP_RETRIES,
+                 backoff=HTTP_RETRY_BACKOFF):
+        parts = urllib.parse.urlsplit(base_url)
+        self._conn_class = (http.client.HTTPSConnection if parts.scheme == "https"
+                            else http.client.HTTPConnection)
+        self._host = parts.hostname
+        self._port = parts.port
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._retries = retries
+        self._backoff = backoff
+        self._stats_lock = threading.Lock()
+        self.stats = {}        # endpoint → {count, errors, retries, latencies}
+        self.connects = 0
+
+    def timeout_for(self, endpoint):
+        best = ""
+        for prefix in HTTP_TIMEOUTS:
+            if endpoint.startswith(prefix) and len(prefix) > len(best):
+                best = prefix
+        return HTTP_TIMEOUTS.get(best, 8)
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        """Returns (status, raw_bytes). Wirft bei endgültigem Fehler."""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        endpoint = _endpoint(method, parts.path)
+        if timeout is None:
+            timeout = self.timeout_for(endpoint)
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            conn = self._acquire(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                raw = resp.read()
+            except TimeoutError:
+                conn.close()
+                self._record(endpoint, start, attempt, error=True)
+                raise
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if attempt >= self._retries:
+                    self._record(endpoint, start, attempt, error=True)
+                    raise
+                attempt += 1
+                time.sleep(self._backoff * 2 ** (attempt - 1))
+                continue
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            self._record(endpoint, start, attempt, error=resp.status >= 400)
+            return resp.status, raw
+
+    def _acquire(self, timeout):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._conn_class(self._host, self._port, timeout=timeout)
+            self.connects += 1
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _record(self, endpoint, start, retries, error=False):
+        duration_ms = (time.monotonic() - start) * 1000
+        with self._stats_lock:
+            entry = self.stats.get(endpoint)
+            if entry is None:
+                entry = self.stats[endpoint] = {
+                    "count": 0, "errors": 0, "retries": 0,
+                    "latencies": collections.deque(maxlen=200),
+                }
+            entry["count"] += 1
+            entry["retries"] += retries
+            if error:
+                entry["errors"] += 1
+            entry["latencies"].append(duration_ms)
+
+    def summary(self):
+        """Pro Endpoint: count/errors/retries + p50/p95/max in ms."""
+        with self._stats_lock:
+            items = [(k, dict(v, latencies=list(v["latencies"]))) for k, v in self.stats.items()]
+        result = {}
+        for endpoint, entry in items:
+            result[endpoint] = {
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "retries": entry["retries"],
+                **latency_summary(entry["latencies"]),
+            }
+        return result
+
+    def log_stats(self):
+        summary = self.summary()
+        if not summary:
+            return
+        total = sum(e["count"] for e in summary.values())
+        errors = sum(e["errors"] for e in summary.values())
+        retries = sum(e["retries"] for e in summary.values())
+        log.info("HTTP: %d Requests, %d Fehler, %d Retries, %d Verbindungen",
+                 total, errors, retries, self.connects)
+        for endpoint, e in sorted(summary.items(), key=lambda kv: -kv[1]["count"]):
+            log.info("HTTP:   %-45s n=%d p50=%sms p95=%sms max=%sms",
+                     endpoint, e["count"], e["p50_ms"], e["p95_ms"], e["max_ms"])
+
+
+_http_pool = HTTPPool(HA_API)
+
+
 # ============================================================================
-# HTTP HELPERS
+# BACKEND — Außenwelt (ADB-Gerät, HA per HTTP und WebSocket)
 # ============================================================================
+# Alle Zugriffe nach außen laufen über _backend. spotify_replay.py tauscht es
+# zum Aufzeichnen (RecordingBackend) bzw. Abspielen (ReplayBackend) aus.
+
+class LiveBackend:
+    """Echte Echo Shows per adb_shell, echtes HA per HTTPPool/aiohttp."""
+
+    def adb_open(self, dev):
+        """Verbundenes ADB-Gerät (shell, streaming_shell, close); wirft bei Fehler."""
+        from adb_shell.adb_device import AdbDeviceTcp
+        from adb_shell.auth.sign_pythonrsa import PythonRSASigner
+
+        with open(ADB_KEY_PATH) as f:
+            priv = f.read()
+        with open(ADB_KEY_PATH + ".pub") as f:
+            pub = f.read()
+        signer = PythonRSASigner(pub, priv)
+
+        device = AdbDeviceTcp(dev.host, dev.port, default_transport_timeout_s=ADB_TIMEOUT)
+        device.connect(rsa_keys=[signer], auth_timeout_s=ADB_TIMEOUT)
+        return device
+
+    def http_request(self, method, url, body=None, headers=None, timeout=None):
+        """(status, raw bytes) wie HTTPPool.request."""
+        return _http_pool.request(method, url, body=body, headers=headers, timeout=timeout)
+
+    def state_mirror(self, url, token):
+        """HA-Spiegel per WebSocket oder None (aiohttp fehlt)."""
+        if aiohttp is None:
+            return None
+        return HAStateMirror(url, token)
 
-def http_post(url, headers=None, json_data=None, timeout=8):
+
+_backend = LiveBackend()
+
+
+def http_post(url, headers=None, json_data=None, timeout=None):
     body = json.dumps(json_data).encode("utf-8") if json_data else None
-    headers = headers or {}
+    headers = dict(headers or {})
     if json_data:
         headers["Content-Type"] = "application/json"
-    req = urllib.request.Request(url, data=body, method="POST")
-    for k, v in headers.items():
-        req.add_header(k, v)
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            raw = resp.read().decode("utf-8")
-            return (json.loads(raw) if raw else {}), resp.status
-    except urllib.error.HTTPError as e:
-        raw = e.read().decode("utf-8", errors="replace") if e.fp else ""
-        return {"error": raw}, e.code
+        status, raw = _backend.http_request("POST", url, body=body, headers=headers, timeout=timeout)
     except Exception as e:
         return {"error": str(e)}, 0
+    text = raw.decode("utf-8", errors="replace")
+    if status >= 400:
+        return {"error": text}, status
+    try:
+        return (json.loads(text) if text else {}), status
+    except ValueError:
+        return {}, status
 
 
-def http_get(url, headers=None, timeout=5):
-    req = urllib.request.Request(url, method="GET")
-    if headers:
-        for k, v in headers.items():
-            req.add_header(k, v)
+def http_get(url, headers=None, timeout=None):
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode("utf-8")), resp.status
+        status, raw = _backend.http_request("GET", url, headers=headers, timeout=timeout)
+        if status != 200:
+            return {}, status
+        return json.loads(raw.decode("utf-8")), status
     except Exception:
         return {}, 0
 
@@ -188,49 +542,48 @@ def _find_first_entity(states, predicate):
     return ""
 
 
-def autodiscover_entities():
-    global SPOTIFY_ENTITY, SATELLITE_ENTITY, RADIO_ENTITY, VA_DEVICE
-
+def autodiscover_entities(dev):
+    """Fehlende Entities des Geräts in HA suchen (nur ohne Geräte-Datei sinnvoll)."""
     if all([
-        ha_entity_exists(SPOTIFY_ENTITY),
-        ha_entity_exists(SATELLITE_ENTITY),
-        ha_entity_exists(VA_DEVICE),
+        ha_entity_exists(dev.spotify_entity),
+        ha_entity_exists(dev.satellite_entity),
+        ha_entity_exists(dev.va_device),
     ]):
         return
 
     states = ha_list_states()
     if not states:
-        log.warning("Auto-Discovery: keine /states-Daten erhalten")
+        dev.log.warning("Auto-Discovery: keine /states-Daten erhalten")
         return
 
-    if not ha_entity_exists(SPOTIFY_ENTITY):
+    if not ha_entity_exists(dev.spotify_entity):
         discovered = _find_first_entity(
             states,
             lambda entity_id, attrs: entity_id.startswith("media_player.spotify"),
         )
         if discovered:
-            log.info("Auto-Discovery: SPOTIFY_ENTITY %s -> %s", SPOTIFY_ENTITY, discovered)
-            SPOTIFY_ENTITY = discovered
+            dev.log.info("Auto-Discovery: SPOTIFY_ENTITY %s -> %s", dev.spotify_entity, discovered)
+            dev.spotify_entity = discovered
 
-    if not ha_entity_exists(SATELLITE_ENTITY):
+    if not ha_entity_exists(dev.satellite_entity):
         discovered = _find_first_entity(
             states,
             lambda entity_id, attrs: entity_id.startswith("assist_satellite."),
         )
         if discovered:
-            log.info("Auto-Discovery: SATELLITE_ENTITY %s -> %s", SATELLITE_ENTITY, discovered)
-            SATELLITE_ENTITY = discovered
+            dev.log.info("Auto-Discovery: SATELLITE_ENTITY %s -> %s", dev.satellite_entity, discovered)
+            dev.satellite_entity = discovered
 
-    if not ha_entity_exists(RADIO_ENTITY):
+    if not ha_entity_exists(dev.radio_entity):
         discovered = _find_first_entity(
             states,
             lambda entity_id, attrs: entity_id.startswith("media_player.") and "vaca" in entity_id and "mediaplayer" in entity_id,
         )
         if discovered:
-            log.info("Auto-Discovery: RADIO_ENTITY %s -> %s", RADIO_ENTITY, discovered)
-            RADIO_ENTITY = discovered
+            dev.log.info("Auto-Discovery: RADIO_ENTITY %s -> %s", dev.radio_entity, discovered)
+            dev.radio_entity = discovered
 
-    if not ha_entity_exists(VA_DEVICE):
+    if not ha_entity_exists(dev.va_device):
         discovered = _find_first_entity(
             states,
             lambda entity_id, attrs: entity_id.startswith("sensor.") and (
@@ -238,107 +591,527 @@ def autodiscover_entities():
             ),
         )
         if discovered:
-            log.info("Auto-Discovery: VA_DEVICE %s -> %s", VA_DEVICE, discovered)
-            VA_DEVICE = discovered
+            dev.log.info("Auto-Discovery: VA_DEVICE %s -> %s", dev.va_device, discovered)
+            dev.va_device = discovered
 
 # ============================================================================
-# ADB MediaSession — Kern des Monitors
+# HA WEBSOCKET — State-Spiegel statt REST-Polling
 # ============================================================================
 
-_adb_device = None
-_adb_lock = threading.Lock()
-_RE_DESCRIPTION = re.compile(r"description=(.+)")
-_RE_STATE = re.compile(r"state=PlaybackState\s*\{state=(\d+)")
-_RE_ACTIVE_ITEM = re.compile(r"active item id=(\d+)")
+HA_WS_URL = HA_API.replace("http", "ws", 1) + "/websocket"
+HA_WS_RECONNECT_MAX = 60   # Sekunden, exponentielles Backoff
 
 
-def adb_connect():
-    """Stellt ADB-Verbindung zum Echo Show her."""
-    global _adb_device
-    try:
-        from adb_shell.adb_device import AdbDeviceTcp
-        from adb_shell.auth.sign_pythonrsa import PythonRSASigner
+class HAStateMirror:
+    """Lokaler Spiegel der HA-States, gefüttert per WebSocket subscribe_entities.
 
-        with open(ADB_KEY_PATH) as f:
-            priv = f.read()
-        with open(ADB_KEY_PATH + ".pub") as f:
-            pub = f.read()
-        signer = PythonRSASigner(pub, priv)
+    run() läuft als Task in der Event-Loop des Daemons. Solange die
+    Verbindung steht (live), lesen die ha_get_*-Helfer nur noch hier statt
+    per REST — auch aus Worker-Threads, daher der Lock. Über benannte
+    Wake-Kanäle (set_wake) weckt eine Änderung z.B. am Satellite den
+    Ducking-Task oder ein Titelwechsel am Spotify-Entity den MediaSession-Task
+    sofort statt erst nach dem Poll-Intervall. Zusätzlich abonnierte Bus-Events
+    (set_events) gehen direkt an ihren Callback in der Event-Loop.
+    """
+
+    def __init__(self, url, token):
+        self._url = url
+        self._token = token
+        self._entities = ()
+        self._wakers = {}
+        self._event_types = ()
+        self._handlers = {}
+        self._states = {}
+        self._lock = threading.Lock()
+        self._live = False
+        self._ws = None
+        self.events = 0
+        self.reconnects = 0
+
+    @property
+    def live(self):
+        return self._live
+
+    def tracks(self, entity_id):
+        return entity_id in self._entities
+
+    def set_entities(self, entities):
+        """Neue Entity-Liste (Auto-Discovery) → Verbindung neu aufbauen."""
+        entities = tuple(dict.fromkeys(e for e in entities if e))
+        if entities == self._entities:
+            return
+        self._entities = entities
+        self._live = False
+        if self._ws is not None:
+            asyncio.get_running_loop().create_task(self._ws.close())
+
+    def set_events(self, handlers):
+        """Bus-Events abonnieren: {event_type: callback(event_type, data, time_fired, received)}.
+
+        received ist time.monotonic() beim Eintreffen der Nachricht.
+        """
+        self._handlers = dict(handlers)
+        event_types = tuple(self._handlers)
+        if event_types == self._event_types:
+            return
+        self._event_types = event_types
+        self._live = False
+        if self._ws is not None:
+            asyncio.get_running_loop().create_task(self._ws.close())
+
+    def get(self, entity_id):
+        """State im REST-Format ({state, attributes}) oder None."""
+        with self._lock:
+            entry = self._states.get(entity_id)
+            if entry is None:
+                return None
+            return {
+                "entity_id": entity_id,
+                "state": entry["state"],
+                "attributes": dict(entry["attributes"]),
+            }
+
+    def set_wake(self, name, entities, attributes=()):
+        """Wake-Kanal name: State-Änderung (oder eines der attributes) weckt wait(name)."""
+        event = self._wakers[name][2] if name in self._wakers else asyncio.Event()
+        self._wakers[name] = (frozenset(entities), frozenset(attributes), event)
+
+    def wake(self, name):
+        """Wake-Kanal von außen auslösen (z.B. Bus-Event statt State-Änderung)."""
+        if name in self._wakers:
+            self._wakers[name][2].set()
+
+    async def wait(self, name, timeout):
+        """Schläft max. timeout Sekunden, wacht bei Änderung im Kanal name auf."""
+        event = self._wakers[name][2]
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            event.clear()
+
+    async def run(self):
+        backoff = 1
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._async_session(session)
+                    backoff = 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.warning("HA WebSocket getrennt: %s", e)
+                    backoff = min(backoff * 2, HA_WS_RECONNECT_MAX)
+                self._live = False
+                self._ws = None
+                self.reconnects += 1
+                await asyncio.sleep(backoff)
+
+    async def _async_session(self, session):
+        async with session.ws_connect(self._url, heartbeat=30) as ws:
+            self._ws = ws
+            await ws.receive_json()  # auth_required
+            await ws.send_json({"type": "auth", "access_token": self._token})
+            msg = await ws.receive_json()
+            if msg.get("type") != "auth_ok":
+                raise RuntimeError(f"Auth fehlgeschlagen: {msg.get('message', msg.get('type'))}")
+            with self._lock:
+                self._states = {}
+            await ws.send_json({
+                "id": 1,
+                "type": "subscribe_entities",
+                "entity_ids": list(self._entities),
+            })
+            for msg_id, event_type in enumerate(self._event_types, start=2):
+                await ws.send_json({"id": msg_id, "type": "subscribe_events",
+                                    "event_type": event_type})
+            log.info("HA WebSocket verbunden, abonniert: %s",
+                     ", ".join(self._entities + self._event_types))
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                received = time.monotonic()
+                data = json.loads(msg.data)
+                if data.get("type") == "event":
+                    if data.get("id") == 1:
+                        self._apply(data["event"])
+                    else:
+                        event = data["event"]
+                        handler = self._handlers.get(event.get("event_type"))
+                        if handler is not None:
+                            handler(event.get("event_type"), event.get("data") or {},
+                                    event.get("time_fired"), received)
+                elif data.get("type") == "result" and not data.get("success"):
+                    raise RuntimeError(f"subscribe (id {data.get('id')}): {data.get('error')}")
+
+    def _apply(self, event):
+        """Kompaktes subscribe_entities-Format: a=neu, c=Diff (+/-), r=entfernt."""
+        changed = {}  # entity_id → {"state", geänderte Attribut-Namen}
+        with self._lock:
+            for entity_id, new in (event.get("a") or {}).items():
+                old = self._states.get(entity_id)
+                attributes = new.get("a") or {}
+                self._states[entity_id] = {"state": new.get("s"), "attributes": attributes}
+                if old is None or old["state"] != new.get("s"):
+                    changed[entity_id] = {"state"}
+                else:
+                    changed[entity_id] = {
+                        key for key in set(attributes) | set(old["attributes"])
+                        if attributes.get(key) != old["attributes"].get(key)}
+            for entity_id, diff in (event.get("c") or {}).items():
+                entry = self._states.get(entity_id)
+                if entry is None:
+                    continue
+                plus = diff.get("+") or {}
+                keys = changed.setdefault(entity_id, set())
+                if "s" in plus:
+                    if plus["s"] != entry["state"]:
+                        keys.add("state")
+                    entry["state"] = plus["s"]
+                attributes = dict(entry["attributes"])
+                for key, value in (plus.get("a") or {}).items():
+                    if attributes.get(key) != value:
+                        keys.add(key)
+                    attributes[key] = value
+                for key in (diff.get("-") or {}).get("a", []):
+                    attributes.pop(key, None)
+                    keys.add(key)
+                entry["attributes"] = attributes
+            for entity_id in event.get("r") or []:
+                self._states.pop(entity_id, None)
+            self.events += 1
+        self._live = True
+        for entities, attributes, wake in self._wakers.values():
+            for entity_id in entities:
+                keys = changed.get(entity_id)
+                if keys and ("state" in keys or keys & attributes):
+                    wake.set()
+                    break
+
+
+_ha_mirror = None
+
+
+def _mirror_entities():
+    """Entities aller Geräte — eine gemeinsame WebSocket-Verbindung."""
+    entities = []
+    for dev in _devices:
+        entities += [dev.spotify_entity, dev.satellite_entity, dev.radio_entity, dev.ducking_boolean]
+    return entities
+
+
+def ha_mirror_update_entities():
+    """Nach Auto-Discovery: geänderte Entities neu abonnieren."""
+    if _ha_mirror is not None:
+        _ha_mirror.set_entities(_mirror_entities())
+        for dev in _devices:
+            _ha_mirror.set_wake(f"ducking:{dev.name}", (dev.satellite_entity, dev.ducking_boolean))
+            # Titelwechsel am Handy sieht HA (Fast-Refresh) oft vor dem nächsten ADB-Poll
+            _ha_mirror.set_wake(f"media:{dev.name}", (dev.spotify_entity,),
+                                ("media_title", "media_content_id"))
+            _ha_mirror.set_wake(f"volume:{dev.name}", (dev.spotify_entity,),
+                                ("volume_level", "source"))
+        handlers = dict.fromkeys(SPOTIFY_DUCKING_WAKE_EVENTS, ducking_on_wake_event)
+        handlers.update(dict.fromkeys(SPOTIFY_DUCKING_END_EVENTS, ducking_on_pipeline_end))
+        _ha_mirror.set_events(handlers)
+
+
+async def ha_wait(seconds, channel):
+    """Wie asyncio.sleep, wacht aber sofort auf, wenn HA ein Wake-Entity ändert.
+
+    True = vom Kanal geweckt, False = Zeit abgelaufen.
+    """
+    if _ha_mirror is not None and _ha_mirror.live:
+        return await _ha_mirror.wait(channel, seconds)
+    await asyncio.sleep(seconds)
+    return False
+
+
+async def ha_get_entity_async(entity_id):
+    """ha_get_entity ohne die Loop zu blockieren (Spiegel direkt, REST im Thread)."""
+    if _ha_mirror is not None and _ha_mirror.live and _ha_mirror.tracks(entity_id):
+        return _ha_mirror.get(entity_id)
+    return await asyncio.to_thread(ha_get_entity, entity_id)
+
+
+async def ha_call_service(domain, service, data):
+    """HA-Service per REST im Worker-Thread aufrufen."""
+    return await asyncio.to_thread(
+        http_post,
+        f"{HA_API}/services/{domain}/{service}",
+        {"Authorization": f"Bearer {HA_TOKEN}"},
+        data,
+    )
+
+# ============================================================================
+# ADB MediaSession — Kern des Monitors
+# ============================================================================
 
-        dev = AdbDeviceTcp(ECHO_HOST, ECHO_PORT, default_transport_timeout_s=ADB_TIMEOUT)
-        dev.connect(rsa_keys=[signer], auth_timeout_s=ADB_TIMEOUT)
-        _adb_device = dev
-        log.info("ADB verbunden: %s:%d", ECHO_HOST, ECHO_PORT)
+# Pro Gerät: dev.adb_device (AdbDeviceTcp) und dev.adb_lock für
+# Verbindungswechsel + Öffnen des MediaSession-Streams (siehe Device)
+# Alle relevanten Felder in einem finditer-Durchlauf; eine Gruppe pro
+# Alternative (match.lastgroup = Feldname). description= frisst den Rest
+# der Zeile, damit Titeltext nie als Feld erkannt wird.
+_RE_SESSION_FIELDS = re.compile(
+    r"description=(?P<description>[^\n]+)"
+    r"|PlaybackState\s*\{state=(?P<state>\d+)"
+    r"|(?<!buffered )position=(?P<position>-?\d+)"
+    r"|speed=(?P<speed>-?[\d.]+)"
+    r"|updated=(?P<updated>\d+)"
+    r"|active item id=(?P<item>\d+)"
+    r"|\bactive=(?P<active>\w+)"
+)
+
+# Filtert den Spotify-Block aus `dumpsys media_session` (läuft auf dem Echo)
+_MEDIA_SESSION_AWK = (
+    "awk '"
+    "/com\\.spotify\\.music/ {in_sp=1} "
+    "in_sp && /state=PlaybackState/ {print; next} "
+    "in_sp && /description=/ {print; next} "
+    "in_sp && /active=/ {print; next} "
+    "in_sp && /^ +package=/ && $0 !~ /com\\.spotify\\.music/ {in_sp=0} "
+    "'"
+)
+
+
+def adb_connect(dev):
+    """Stellt ADB-Verbindung zum Echo Show her."""
+    try:
+        device = _backend.adb_open(dev)
+        with dev.adb_lock:
+            dev.adb_device = device
+        dev.metrics.inc("adb_connects")
+        dev.log.info("ADB verbunden: %s:%d", dev.host, dev.port)
         return True
     except Exception as e:
-        _adb_device = None
-        log.error("ADB-Verbindung fehlgeschlagen: %s", e)
+        dev.adb_device = None
+        dev.metrics.inc("adb_connect_failures")
+        dev.log.error("ADB-Verbindung fehlgeschlagen: %s", e)
         return False
 
 
-def adb_disconnect():
+def adb_disconnect(dev):
     """ADB-Verbindung trennen."""
-    global _adb_device
-    if _adb_device:
+    with dev.adb_lock:
+        device, dev.adb_device = dev.adb_device, None
+    if device:
         try:
-            _adb_device.close()
+            device.close()
         except Exception:
             pass
-        _adb_device = None
 
 
-def adb_shell(cmd, timeout_s=5):
-    """Führt ADB Shell-Befehl aus. Thread-safe.
-    Returns: str oder None bei Fehler (setzt _adb_device = None)."""
-    global _adb_device
-    with _adb_lock:
-        if not _adb_device:
-            return None
-        try:
-            return _adb_device.shell(cmd, timeout_s=timeout_s)
-        except Exception as e:
-            log.warning("ADB Shell-Fehler: %s", e)
-            _adb_device = None
+# ----------------------------------------------------------------------------
+# ADB-Befehlsqueue mit Prioritäten
+# ----------------------------------------------------------------------------
+# Früher serialisierte ein einziger Lock alle Befehle: ein Keep-Alive mit
+# pidof/monkey/am start blockierte das KEYCODE_MEDIA_PAUSE beim Ducking.
+# Jetzt landen alle Befehle in einer Prioritäts-Queue:
+# - Worker "adb-main" arbeitet alles nach Priorität ab
+# - Worker "adb-urgent" nimmt nur Ducking/Volume → läuft parallel zu einem
+#   gerade laufenden Wartungsbefehl (adb_shell multiplext die Streams)
+# - Befehle mit Deadline verfallen, wenn sie zu spät drankämen
+# - Befehle mit key (z.B. "volume") ersetzen einen noch wartenden Vorgänger
+
+PRIO_DUCKING = 0
+PRIO_VOLUME = 1
+PRIO_SESSION = 2       # dumpsys-Poll (Fallback ohne Stream)
+PRIO_MAINTENANCE = 3   # Keep-Alive, Doze-Whitelist, Settings
+PRIO_NAMES = {0: "ducking", 1: "volume", 2: "session", 3: "maintenance"}
+
+
+class _AdbCommand:
+    __slots__ = ("priority", "seq", "cmd", "timeout_s", "deadline", "key",
+                 "future", "superseded", "queued_at")
+
+    def __init__(self, priority, seq, cmd, timeout_s, deadline, key):
+        self.priority = priority
+        self.seq = seq
+        self.cmd = cmd
+        self.timeout_s = timeout_s
+        self.deadline = deadline
+        self.key = key
+        self.future = concurrent.futures.Future()
+        self.superseded = False
+        self.queued_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdbCommandQueue:
+    """Prioritäts-Queue für ADB-Shell-Befehle eines Geräts mit zwei Worker-Threads."""
+
+    def __init__(self, dev, urgent_max_priority=PRIO_VOLUME):
+        self._dev = dev
+        self._heap = []
+        self._pending = {}          # key → wartender Befehl
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._urgent_max_priority = urgent_max_priority
+        self._started = False
+        self.executed = 0
+        self.dropped_stale = 0
+        self.dropped_deadline = 0
+
+    def submit(self, cmd, priority=PRIO_MAINTENANCE, timeout_s=5, deadline_s=None, key=None):
+        """Befehl einreihen. Returns concurrent.futures.Future (str oder None)."""
+        deadline = time.monotonic() + deadline_s if deadline_s is not None else None
+        entry = _AdbCommand(priority, next(self._seq), cmd, timeout_s, deadline, key)
+        with self._cond:
+            if key is not None:
+                old = self._pending.get(key)
+                if old is not None:
+                    old.superseded = True
+                    self.dropped_stale += 1
+                    _resolve(old.future, None)
+                    self._dev.log.debug("ADB-Queue: '%s' ersetzt durch neueren Befehl", old.cmd)
+                self._pending[key] = entry
+            heapq.heappush(self._heap, entry)
+            if not self._started:
+                self._start_workers()
+            self._cond.notify_all()
+        return entry.future
+
+    def depth(self):
+        with self._cond:
+            return sum(1 for entry in self._heap if not entry.superseded)
+
+    def _start_workers(self):
+        self._started = True
+        for name, max_priority in (("adb-main", PRIO_MAINTENANCE),
+                                   ("adb-urgent", self._urgent_max_priority)):
+            threading.Thread(target=self._worker, args=(max_priority,),
+                             name=f"{name}-{self._dev.name}", daemon=True).start()
+
+    def _pop(self, max_priority):
+        while self._heap and self._heap[0].superseded:
+            heapq.heappop(self._heap)
+        if not self._heap or self._heap[0].priority > max_priority:
             return None
+        entry = heapq.heappop(self._heap)
+        if entry.key is not None and self._pending.get(entry.key) is entry:
+            del self._pending[entry.key]
+        return entry
+
+    def _worker(self, max_priority):
+        while True:
+            with self._cond:
+                entry = self._pop(max_priority)
+                while entry is None:
+                    self._cond.wait()
+                    entry = self._pop(max_priority)
+            if not entry.future.set_running_or_notify_cancel():
+                continue  # Aufrufer wartet nicht mehr
+            if entry.deadline is not None and time.monotonic() > entry.deadline:
+                self.dropped_deadline += 1
+                self._dev.log.info("ADB-Queue: '%s' verworfen (Deadline überschritten, %s)",
+                                   entry.cmd[:60], PRIO_NAMES.get(entry.priority, entry.priority))
+                entry.future.set_result(None)
+                continue
+            waited = time.monotonic() - entry.queued_at
+            if waited > 0.5:
+                self._dev.log.debug("ADB-Queue: '%s' wartete %.0fms", entry.cmd[:60], waited * 1000)
+            result = _adb_exec(self._dev, entry.cmd, entry.timeout_s)
+            self.executed += 1
+            entry.future.set_result(result)
+
+
+def _resolve(future, result):
+    try:
+        future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass
 
 
-def adb_get_media_session():
+def _adb_exec(dev, cmd, timeout_s):
+    """Führt einen Befehl direkt aus (nur aus den Queue-Workern aufrufen)."""
+    device = dev.adb_device
+    if not device:
+        return None
+    try:
+        with Stopwatch(dev.metrics, "adb_exec"):
+            return device.shell(cmd, timeout_s=timeout_s)
+    except Exception as e:
+        dev.metrics.inc("adb_shell_errors")
+        dev.log.warning("ADB Shell-Fehler: %s", e)
+        with dev.adb_lock:
+            if dev.adb_device is device:
+                dev.adb_device = None
+        return None
+
+
+def adb_shell(dev, cmd, timeout_s=5, priority=PRIO_MAINTENANCE, deadline_s=None, key=None):
+    """Führt ADB Shell-Befehl über die Queue aus und wartet auf das Ergebnis.
+    Returns: str oder None bei Fehler/Verfall (setzt dev.adb_device = None)."""
+    return dev.adb_queue.submit(cmd, priority, timeout_s, deadline_s, key).result()
+
+
+async def adb_shell_async(dev, cmd, timeout_s=5, priority=PRIO_MAINTENANCE, deadline_s=None, key=None):
+    """adb_shell für die Event-Loop (blockiert keinen Thread beim Warten)."""
+    return await asyncio.wrap_future(
+        dev.adb_queue.submit(cmd, priority, timeout_s, deadline_s, key))
+
+
+def adb_get_media_session(dev):
     """Liest Spotify MediaSession vom Echo Show.
 
-    Returns dict mit title, artist, album, state, active_item_id, description
-    oder None wenn kein Spotify aktiv / Fehler.
+    Returns MediaSession oder None wenn kein Spotify aktiv / Fehler.
     """
-    raw = adb_shell(
-        "MS=$(dumpsys media_session 2>/dev/null); "
-        "echo \"$MS\" | awk '"
-        "/com\\.spotify\\.music/ {in_sp=1} "
-        "in_sp && /state=PlaybackState/ {print; next} "
-        "in_sp && /description=/ {print; next} "
-        "in_sp && /active=/ {print; next} "
-        "in_sp && /^ +package=/ && $0 !~ /com\\.spotify\\.music/ {in_sp=0} "
-        "'"
-    )
+    with Stopwatch(dev.metrics, "adb_poll"):   # inkl. Wartezeit in der Queue
+        raw = adb_shell(
+            dev,
+            "MS=$(dumpsys media_session 2>/dev/null); "
+            "echo \"$MS\" | " + _MEDIA_SESSION_AWK,
+            priority=PRIO_SESSION,
+            deadline_s=2 * POLL_INTERVAL_IDLE,   # veraltetes Ergebnis nützt niemandem
+        )
+    dev.session_parser.feed(raw)
+    return dev.session_parser.session
+
+
+class MediaSession:
+    """Kompakter MediaSession-Stand von Spotify (ein Objekt pro Änderung)."""
+
+    __slots__ = ("title", "artist", "album", "state", "active_item_id",
+                 "description", "position", "speed", "updated")
+
+    def __init__(self, title, artist, album, state, active_item_id, description,
+                 position=-1, speed=0.0, updated=0):
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.state = state
+        self.active_item_id = active_item_id
+        self.description = description
+        self.position = position      # ms, Stand zum Zeitpunkt updated
+        self.speed = speed
+        self.updated = updated        # Geräte-Uptime (ms)
 
+    def __repr__(self):
+        return (f"MediaSession({self.artist!r} — {self.title!r}, "
+                f"{STATE_NAMES.get(self.state, self.state)}, pos={self.position})")
+
+
+def parse_media_session(raw):
+    """Parst den awk-gefilterten Spotify-Block in einem Durchlauf.
+
+    Returns MediaSession oder None wenn kein Spotify aktiv / Fehler.
+    Bei mehrfach vorkommenden Feldern gewinnt das letzte.
+    """
     if not raw or "description=" not in raw:
         return None
 
-    lines = [line.strip() for line in raw.splitlines() if line.strip()]
-    desc_line = ""
-    state_line = ""
-    active_line = ""
-    for line in lines:
-        if "description=" in line:
-            desc_line = line
-        elif "state=PlaybackState" in line:
-            state_line = line
-        elif "active=" in line:
-            active_line = line
-
-    desc_match = _RE_DESCRIPTION.search(desc_line)
-    if not desc_match:
+    fields = {}
+    for match in _RE_SESSION_FIELDS.finditer(raw):
+        fields[match.lastgroup] = match.group(match.lastgroup)
+
+    if fields.get("active") != "true":
         return None
 
-    description = desc_match.group(1).strip()
+    description = fields["description"].strip()
     desc_parts = [p.strip() for p in description.split(",", 2)]
     title = desc_parts[0] if len(desc_parts) >= 1 else "?"
     artist = desc_parts[1] if len(desc_parts) >= 2 else ""
@@ -346,39 +1119,425 @@ def adb_get_media_session():
     if album and " / " in album:
         album = album.rsplit(" / ", 1)[0].strip()
 
-    state = STATE_NONE
-    state_match = _RE_STATE.search(state_line)
-    if state_match:
-        state = int(state_match.group(1))
+    return MediaSession(
+        title, artist, album,
+        state=int(fields.get("state", STATE_NONE)),
+        active_item_id=int(fields.get("item", -1)),
+        description=description,
+        position=int(fields.get("position", -1)),
+        speed=float(fields.get("speed", 0.0)),
+        updated=int(fields.get("updated", 0)),
+    )
 
-    active_item_id = -1
-    item_match = _RE_ACTIVE_ITEM.search(state_line)
-    if item_match:
-        active_item_id = int(item_match.group(1))
 
-    is_active = "active=true" in active_line
-    if not is_active:
-        return None
+class MediaSessionParser:
+    """parse_media_session mit Änderungserkennung auf dem Rohtext.
 
-    return {
-        "title": title,
-        "artist": artist,
-        "album": album,
-        "state": state,
-        "active_item_id": active_item_id,
-        "description": description,
-    }
+    Bei gleichmäßiger Wiedergabe liefert jeder Poll denselben Block (Position
+    und updated ändern sich nur bei Play/Pause/Seek/Titelwechsel). Ist der
+    Block identisch mit dem vorigen, kostet feed() nur einen Stringvergleich
+    statt Regex-Scan und neuem Objekt.
+    """
+
+    __slots__ = ("_raw", "session", "parsed", "unchanged")
+
+    def __init__(self):
+        self._raw = None
+        self.session = None
+        self.parsed = 0
+        self.unchanged = 0
+
+    def feed(self, raw):
+        """Neuer Rohtext. Returns True, wenn sich der Block geändert hat."""
+        if raw == self._raw:
+            self.unchanged += 1
+            return False
+        self._raw = raw
+        self.session = parse_media_session(raw)
+        self.parsed += 1
+        return True
+
+    def reset(self):
+        self._raw = None
+
+# ============================================================================
+# ADB STREAM — persistenter Shell-Kanal statt neuer Shell pro Poll
+# ============================================================================
+# Statt zweimal pro Sekunde eine neue ADB-Shell zu öffnen, läuft auf dem Echo
+# EINE Shell-Schleife: dumpsys + awk, Ausgabe aber nur bei Änderung (plus
+# Heartbeat). Der Monitor liest den Kanal in einem Thread und hält den letzten
+# Stand im Speicher — kein ADB-Roundtrip mehr pro Poll.
+#
+# dumpsys selbst kostet auf dem Echo weiterhin CPU. Die Schleife taktet daher
+# selbst wie früher der Poll: schnell nur, solange Spotify spielt (oder puffert),
+# sonst im Idle-Intervall. Der adaptive Poll-Takt des Monitors (PollScheduler)
+# liest nur aus dem Speicher und spart auf dem Gerät nichts.
+
+_STREAM_MARKER = "@@JARVIS_MS@@"
+_STREAM_HEARTBEAT_LOOPS = 20     # Block spätestens alle N Durchläufe erneut senden
+_STREAM_READ_TIMEOUT = 30        # Sekunden ohne Daten → Kanal gilt als tot
+_STREAM_RETRY_WAIT = 5
+
+
+def _media_session_stream_cmd(active, idle):
+    return (
+        f"last='{_STREAM_MARKER}'; n=0; "
+        f"while true; do "
+        f"cur=$(dumpsys media_session 2>/dev/null | {_MEDIA_SESSION_AWK}); "
+        f"if [ \"$cur\" != \"$last\" ] || [ $n -ge {_STREAM_HEARTBEAT_LOOPS} ]; then "
+        f"echo \"$cur\"; echo {_STREAM_MARKER}; last=\"$cur\"; n=0; "
+        f"fi; n=$((n+1)); "
+        f"case \"$cur\" in "
+        f"*\"{{state={STATE_PLAYING},\"*|*\"{{state={STATE_BUFFERING},\"*) sleep {active};; "
+        f"*) sleep {idle};; esac; "
+        f"done"
+    )
+
+
+class AdbStream:
+    """Persistenter ADB-Shell-Kanal, gelesen in einem eigenen Thread.
+
+    Unter dev.adb_lock wird nur das aktuelle Gerät gelesen. Öffnen und erster
+    Chunk (wartet auf das erste dumpsys, bei hängender Verbindung bis
+    _STREAM_READ_TIMEOUT) laufen ohne Lock, sonst blockierte ein halb toter
+    Kanal Reconnect und dringende Ducking-Befehle. adb_shell multiplext die
+    Streams auf der einen TCP-Verbindung; tauscht adb_connect das Gerät
+    währenddessen aus, scheitert der Kanal und wird neu geöffnet.
+    Unterklassen liefern _command() und verarbeiten die Ausgabe in _read().
+    """
+
+    label = "ADB"
+
+    def __init__(self, dev, loop):
+        self._dev = dev
+        self._loop = loop
+        self._stopped = threading.Event()
+        self.live = False
+        self.reopens = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"adb-{self.label.lower()}-stream-{self._dev.name}",
+                         daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _command(self):
+        raise NotImplementedError
+
+    def _read(self, first, stream):
+        raise NotImplementedError
+
+    def _set_live(self, live):
+        self.live = live
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._dev.adb_lock:
+                device = self._dev.adb_device
+            stream = None
+            if device is not None:
+                try:
+                    # Generator: adb_shell öffnet den Kanal erst beim ersten next()
+                    stream = device.streaming_shell(
+                        self._command(), read_timeout_s=_STREAM_READ_TIMEOUT)
+                    first = next(stream)
+                except Exception as e:
+                    self._dev.log.warning("ADB-Stream %s: Öffnen fehlgeschlagen: %s",
+                                          self.label, e)
+                    stream = None
+            if stream is None:
+                self._stopped.wait(_STREAM_RETRY_WAIT)
+                continue
+            self.reopens += 1
+            self._dev.log.info("ADB-Stream: %s-Kanal offen", self.label)
+            try:
+                self._read(first, stream)
+            except Exception as e:
+                self._dev.log.warning("ADB-Stream %s unterbrochen: %s", self.label, e)
+            finally:
+                self._loop.call_soon_threadsafe(self._set_live, False)
+                stream.close()
+            self._stopped.wait(_STREAM_RETRY_WAIT)
+
+
+class MediaSessionStream(AdbStream):
+    """Liest den persistenten MediaSession-Kanal und meldet Änderungen an die Loop."""
+
+    label = "MediaSession"
+
+    def __init__(self, dev, loop, active, idle):
+        super().__init__(dev, loop)
+        self._active = active
+        self._idle = idle
+        self._changed = asyncio.Event()
+        self._parser = MediaSessionParser()
+        self.latest = None
+
+    async def wait(self, timeout):
+        """Schläft max. timeout Sekunden, wacht bei MediaSession-Änderung auf."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._changed.clear()
+
+    def _command(self):
+        return _media_session_stream_cmd(self._active, self._idle)
+
+    def _read(self, first, stream):
+        buffer = first
+        while not self._stopped.is_set():
+            while _STREAM_MARKER in buffer:
+                block, buffer = buffer.split(_STREAM_MARKER, 1)
+                self._loop.call_soon_threadsafe(self._publish, block.strip())
+            try:
+                buffer += next(stream)
+            except StopIteration:
+                return
+
+    def _publish(self, raw):
+        self.live = True
+        if not self._parser.feed(raw):
+            return  # Heartbeat
+        self.latest = self._parser.session
+        self._changed.set()
+
+    def _set_live(self, live):
+        self.live = live
+        self._parser.reset()
+
+    @property
+    def parsed(self):
+        return self._parser.parsed
+
+    @property
+    def unchanged(self):
+        return self._parser.unchanged
+
+
+# Prozess-Ereignisse aus dem Event-Log: am_proc_died [User,PID,Name,...],
+# am_proc_start [User,PID,UID,Name,...]. logcat schweigt im Normalbetrieb, daher
+# ein Heartbeat aus derselben Shell, sonst griffe der Lese-Timeout.
+_PROC_HEARTBEAT = 15  # Sekunden, < _STREAM_READ_TIMEOUT
+_RE_PROC_EVENT = re.compile(r"\b(am_proc_died|am_proc_start)\b[^\[]*\[([^\]]*)\]")
+
+
+def _process_watch_cmd():
+    return (
+        f"(while true; do echo {_STREAM_MARKER}; sleep {_PROC_HEARTBEAT}; done) & "
+        f"exec logcat -b events -v brief -T 1 am_proc_died:I am_proc_start:I '*:S'"
+    )
+
+
+class ProcessWatchStream(AdbStream):
+    """Meldet Start/Tod des Spotify-Prozesses aus logcat an den Watchdog.
+
+    Ersetzt das pidof-Polling: solange der Kanal steht, fließt außer dem
+    Heartbeat kein ADB-Verkehr.
+    """
+
+    label = "Prozess"
+
+    def __init__(self, dev, loop, watchdog):
+        super().__init__(dev, loop)
+        self._watchdog = watchdog
+
+    def _command(self):
+        return _process_watch_cmd()
+
+    def _read(self, first, stream):
+        buffer = first
+        self._loop.call_soon_threadsafe(self._set_live, True)
+        while not self._stopped.is_set():
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                match = _RE_PROC_EVENT.search(line)
+                if match is None:
+                    continue
+                fields = [f.strip() for f in match.group(2).split(",")]
+                if SPOTIFY_PACKAGE in fields:
+                    pid = fields[1] if len(fields) > 1 else "?"
+                    self._loop.call_soon_threadsafe(
+                        self._watchdog.process_event, match.group(1), pid)
+            try:
+                buffer += next(stream)
+            except StopIteration:
+                return
+
+    def _set_live(self, live):
+        if live != self.live:
+            self.live = live
+            self._watchdog.wake()  # Kanal neu/weg → Watchdog prüft bzw. fällt auf Polling zurück
+
+
+async def read_media_session(dev):
+    """Letzter Stand aus dem ADB-Stream, sonst klassisch per dumpsys-Poll."""
+    if dev.media_stream is not None and dev.media_stream.live:
+        return dev.media_stream.latest
+    return await asyncio.to_thread(adb_get_media_session, dev)
+
+
+def media_can_wake(dev):
+    """Gibt es eine Quelle, die media_wait bei Änderungen vorzeitig weckt?"""
+    return ((dev.media_stream is not None and dev.media_stream.live)
+            or (_ha_mirror is not None and _ha_mirror.live))
+
+
+async def media_wait(dev, seconds):
+    """Poll-Pause; wacht sofort auf, wenn ADB-Stream oder HA-Spiegel eine Änderung melden."""
+    waits = []
+    if dev.media_stream is not None and dev.media_stream.live:
+        waits.append(dev.media_stream.wait(seconds))
+    if _ha_mirror is not None and _ha_mirror.live:
+        waits.append(_ha_mirror.wait(f"media:{dev.name}", seconds))
+    if not waits:
+        await asyncio.sleep(seconds)
+        return
+    if len(waits) == 1:
+        await waits[0]
+        return
+    tasks = [asyncio.ensure_future(w) for w in waits]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# ============================================================================
+# POLL-SCHEDULER
+# ============================================================================
+
+class PollScheduler:
+    """Poll-Intervall aus Wiedergabe-Prognose statt fester aktiv/idle-Werte.
+
+    Aus PlaybackState (position, speed, updated) und der Titellänge
+    (media_duration vom HA-Spotify-Entity — dumpsys zeigt sie nicht) wird das
+    Titelende geschätzt: mitten im Titel wird selten gepollt, ab end_window
+    Sekunden davor wieder im aktiven Intervall. Ohne Wiedergabe verdoppelt
+    sich das Intervall nach idle_after Sekunden bis idle_max (nur mit
+    Weck-Quelle, sonst bliebe ein Start am Handy bis idle_max unbemerkt).
+
+    Außerplanmäßige Wechsel (Skip, Pause am Handy) wecken ADB-Stream bzw.
+    HA-Spiegel sofort — ohne solche Weck-Quelle bleibt es beim aktiven
+    Intervall, damit die Titelwechsel-Latenz nie schlechter wird.
+    """
+
+    DURATION_RETRY = 2.0   # Sekunden zwischen Längen-Abfragen (HA hinkt kurz hinterher)
+    DURATION_ATTEMPTS = 5
+
+    def __init__(self, active, idle, midtrack_max, end_window, idle_max, idle_after,
+                 adaptive=True):
+        self._active = active
+        self._idle = idle
+        self._midtrack_max = max(midtrack_max, active)
+        self._end_window = end_window
+        self._idle_max = max(idle_max, idle)
+        self._idle_after = idle_after
+        self._adaptive = adaptive
+        self._state = None
+        self._description = None
+        self._playback = None      # (position, updated) des letzten PlaybackState
+        self._anchor = None        # (position_ms, speed, monotonic)
+        self._clock_offset = None  # monotonic - Geräte-Uptime (kleinster gesehener Wert)
+        self._last_updated = 0
+        self._duration = None
+        self._duration_tries = 0
+        self._duration_at = 0.0
+        self._idle_since = 0.0
+        self._idle_interval = idle
+
+    def observe(self, session, now):
+        """Neuer MediaSession-Stand (oder None) zum Zeitpunkt now (monotonic)."""
+        state = session.state if session else STATE_NONE
+        if state != self._state:
+            self._state = state
+            self._idle_since = now
+            self._idle_interval = self._idle
+        if session is None:
+            self._description = None
+            self._playback = None
+            self._anchor = None
+            return
+
+        if session.description != self._description:
+            self._description = session.description
+            self._duration = None
+            self._duration_tries = 0
+            self._duration_at = 0.0
+
+        position, updated = session.position, session.updated
+        if (position, updated) == self._playback:
+            return
+        self._playback = (position, updated)
+        if position < 0 or updated <= 0:
+            self._anchor = None
+            return
+        # Geräte-Uptime → monotonic: der kleinste Versatz stammt von der
+        # frischesten Beobachtung. Uptime rückwärts = Echo neu gestartet.
+        offset = now - updated / 1000
+        if self._clock_offset is None or updated < self._last_updated or offset < self._clock_offset:
+            self._clock_offset = offset
+        self._last_updated = updated
+        self._anchor = (position, session.speed, updated / 1000 + self._clock_offset)
+
+    def wants_duration(self, now):
+        return (self._adaptive and self._state == STATE_PLAYING and self._duration is None
+                and self._duration_tries < self.DURATION_ATTEMPTS
+                and now - self._duration_at >= self.DURATION_RETRY)
+
+    def set_duration(self, seconds, now):
+        self._duration_tries += 1
+        self._duration_at = now
+        if seconds and seconds > 0:
+            self._duration = seconds
+
+    def track_end(self):
+        """Erwartetes Titelende (monotonic) oder None."""
+        if self._state != STATE_PLAYING or self._anchor is None or not self._duration:
+            return None
+        position, speed, at = self._anchor
+        if speed <= 0:
+            return None
+        return at + (self._duration - position / 1000) / speed
+
+    def next_interval(self, now, can_wake):
+        if self._state == STATE_PLAYING:
+            end = self.track_end() if self._adaptive and can_wake else None
+            if end is None:
+                return self._active
+            # Überfälliges Ende (Prognose daneben) → einfach aktiv weiterpollen
+            return min(max(end - self._end_window - now, self._active), self._midtrack_max)
+        if not (self._adaptive and can_wake) or now - self._idle_since < self._idle_after:
+            return self._idle
+        interval = self._idle_interval
+        self._idle_interval = min(interval * 2, self._idle_max)
+        return interval
+
+
+async def spotify_track_duration(dev, title):
+    """media_duration des HA-Spotify-Entities, falls es denselben Titel zeigt."""
+    entity = await ha_get_entity_async(dev.spotify_entity)
+    attrs = (entity or {}).get("attributes") or {}
+    if attrs.get("media_title") != title:
+        return None
+    try:
+        return float(attrs.get("media_duration") or 0)
+    except (TypeError, ValueError):
+        return None
 
 # ============================================================================
 # HOME ASSISTANT ACTIONS
 # ============================================================================
 
-def ha_update_entity():
-    """Erzwingt sofortiges Entity-Update in HA."""
+def ha_update_entity(entity_ids):
+    """Erzwingt sofortiges Entity-Update in HA (ein Aufruf für alle entity_ids)."""
     _, status = http_post(
         f"{HA_API}/services/homeassistant/update_entity",
         headers={"Authorization": f"Bearer {HA_TOKEN}"},
-        json_data={"entity_id": SPOTIFY_ENTITY},
+        json_data={"entity_id": sorted(entity_ids)},
     )
     if status == 200:
         log.debug("Entity update erzwungen")
@@ -386,9 +1545,9 @@ def ha_update_entity():
         log.warning("Entity update fehlgeschlagen: %s", status)
 
 
-def ha_navigate(path, revert_timeout=None):
-    """Navigiert Jarvis-Display."""
-    data = {"device": VA_DEVICE, "path": path}
+def ha_navigate(dev, path, revert_timeout=None):
+    """Navigiert das Jarvis-Display des Geräts."""
+    data = {"device": dev.va_device, "path": path}
     if revert_timeout is not None:
         data["revert_timeout"] = revert_timeout
     _, status = http_post(
@@ -397,7 +1556,7 @@ def ha_navigate(path, revert_timeout=None):
         json_data=data,
     )
     if status == 200:
-        log.info("Display → %s", path)
+        dev.log.info("Display → %s", path)
 
 
 def ha_set_input_text(entity_id, value):
@@ -409,44 +1568,129 @@ def ha_set_input_text(entity_id, value):
     )
 
 
-# Letzter bekannter Satellite-State (Fallback bei HTTP-Fehler)
-_last_known_satellite = "idle"
-
-
-def ha_get_satellite_state():
+# ----------------------------------------------------------------------------
+# Ausgehende HA-Aktionen: koalesziert, dedupliziert, parallel
+# ----------------------------------------------------------------------------
+# Bei einem Titelwechsel feuerten update_entity, set_value und navigate
+# nacheinander, und der Fast-Refresh schob oft Millisekunden später noch ein
+# update_entity hinterher. Jetzt:
+# - update_entity: sofort beim ersten Wunsch; Wünsche während des Aufrufs
+#   und im Fenster danach ergeben genau EINEN weiteren Aufruf
+# - navigate: unterdrückt, wenn das Display gerade erst (wenige Sekunden)
+#   auf diesen Pfad geschickt wurde und seither keine Spracheingabe die
+#   Ansicht gewechselt hat; Navigationen bleiben untereinander in Reihenfolge
+# - ein Scheduler für alle Geräte: teilen sie sich ein Spotify-Entity, gibt
+#   es trotzdem nur einen update_entity-Aufruf
+# - unabhängige Aufrufe laufen parallel (HTTP-Pool), niemand wartet
+
+UPDATE_ENTITY_WINDOW = float(os.getenv("SPOTIFY_UPDATE_ENTITY_WINDOW", "0.5"))
+# Nur unmittelbare Doppel (Titelwechsel + Resume im selben Poll): was das
+# Display danach zeigt (View-Assist-Revert, Nutzer), weiß der Monitor nicht
+NAVIGATE_DEDUP_WINDOW = float(os.getenv("SPOTIFY_NAVIGATE_DEDUP_WINDOW", "5"))
+
+
+class HAActionScheduler:
+    """Fire-and-forget-Aktionen für die Event-Loop."""
+
+    def __init__(self):
+        self._update_requested = asyncio.Event()
+        self._update_entities = set()
+        self._nav_lock = asyncio.Lock()
+        self._nav = {}              # Gerätename → (Pfad, Zeitpunkt)
+        self._input_texts = {}
+        self._pending = set()
+        self.update_calls = 0
+        self.coalesced = 0
+        self.suppressed = 0
+
+    def request_update(self, entity_id):
+        """Spotify-Entity in HA aktualisieren lassen (koalesziert)."""
+        if entity_id in self._update_entities:
+            self.coalesced += 1
+        self._update_entities.add(entity_id)
+        self._update_requested.set()
+
+    def navigate(self, dev, path, revert_timeout=None):
+        now = time.monotonic()
+        last_path, last_ts = self._nav.get(dev.name, (None, 0.0))
+        if path == last_path and now - last_ts < NAVIGATE_DEDUP_WINDOW:
+            self.suppressed += 1
+            dev.log.debug("Display bereits auf %s, navigate unterdrückt", path)
+            return
+        self._nav[dev.name] = (path, now)
+        self._spawn(self._navigate(dev, path, revert_timeout))
+
+    def forget_navigation(self, dev):
+        """Display zeigt womöglich etwas anderes (Assist-Ansicht) → nächstes navigate senden."""
+        self._nav.pop(dev.name, None)
+
+    def set_input_text(self, entity_id, value):
+        if self._input_texts.get(entity_id) == value:
+            self.suppressed += 1
+            return
+        self._input_texts[entity_id] = value
+        self._spawn(asyncio.to_thread(ha_set_input_text, entity_id, value))
+
+    async def run(self):
+        """Worker für update_entity."""
+        while True:
+            await self._update_requested.wait()
+            self._update_requested.clear()
+            entities, self._update_entities = self._update_entities, set()
+            self.update_calls += 1
+            await asyncio.to_thread(ha_update_entity, entities)
+            # Wünsche bis hierher + im Fenster → genau ein weiterer Aufruf
+            await asyncio.sleep(UPDATE_ENTITY_WINDOW)
+
+    async def _navigate(self, dev, path, revert_timeout):
+        async with self._nav_lock:
+            await asyncio.to_thread(ha_navigate, dev, path, revert_timeout)
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("HA-Aktion fehlgeschlagen: %s", task.exception())
+
+
+_ha_actions = None
+
+
+async def ha_get_satellite_state(dev):
     """Liest den State des VACA Assist-Satellite.
 
     WICHTIG: Bei HTTP-Fehler wird der LETZTE bekannte State zurückgegeben,
     NICHT 'idle'. Sonst wird bei einem Timeout fälschlich idle erkannt
     und Ducking-Resume ausgelöst.
     """
-    global _last_known_satellite
-    data, status = http_get(
-        f"{HA_API}/states/{SATELLITE_ENTITY}",
-        headers={"Authorization": f"Bearer {HA_TOKEN}"},
-    )
-    if status == 200:
+    data = await ha_get_entity_async(dev.satellite_entity)
+    if data is not None:
         state = data.get("state", "idle")
-        _last_known_satellite = state
+        dev.last_known_satellite = state
         return state
-    log.debug("Satellite-State nicht lesbar (Status %s), nutze letzten: %s",
-             status, _last_known_satellite)
-    return _last_known_satellite
+    dev.log.debug("Satellite-State nicht lesbar, nutze letzten: %s", dev.last_known_satellite)
+    return dev.last_known_satellite
 
 
-def ha_get_entity_state(entity_id):
+async def ha_get_entity_state(entity_id):
     """Liest den State eines beliebigen HA-Entity."""
-    data, status = http_get(
-        f"{HA_API}/states/{entity_id}",
-        headers={"Authorization": f"Bearer {HA_TOKEN}"},
-    )
-    if status == 200:
+    data = await ha_get_entity_async(entity_id)
+    if data is not None:
         return data.get("state", "")
     return ""
 
 
 def ha_get_entity(entity_id):
-    """Liest ein HA-Entity inkl. attributes."""
+    """Liest ein HA-Entity inkl. attributes.
+
+    Aus dem WebSocket-Spiegel, solange er live ist — sonst per REST.
+    """
+    if _ha_mirror is not None and _ha_mirror.live and _ha_mirror.tracks(entity_id):
+        return _ha_mirror.get(entity_id)
     data, status = http_get(
         f"{HA_API}/states/{entity_id}",
         headers={"Authorization": f"Bearer {HA_TOKEN}"},
@@ -461,26 +1705,26 @@ def _clamp(value, low, high):
     return max(low, min(high, value))
 
 
-def _source_is_jarvis(source_name):
+def _source_is_jarvis(dev, source_name):
     source_l = (source_name or "").strip().lower()
     if not source_l:
         return False
-    if JARVIS_SPOTIFY_NAME:
-        return source_l == JARVIS_SPOTIFY_NAME.lower()
+    if dev.spotify_source:
+        return source_l == dev.spotify_source.lower()
     return ("jarvis" in source_l) or ("echo" in source_l) or ("show" in source_l)
 
 
-def _save_cached_volume_index(index_value):
+def _save_cached_volume_index(dev, index_value):
     try:
-        with open(SPOTIFY_VOLUME_CACHE_FILE, "w", encoding="utf-8") as handle:
+        with open(dev.volume_cache_file, "w", encoding="utf-8") as handle:
             handle.write(str(int(index_value)))
     except Exception:
         pass
 
 
-def _load_cached_volume_index():
+def _load_cached_volume_index(dev):
     try:
-        with open(SPOTIFY_VOLUME_CACHE_FILE, "r", encoding="utf-8") as handle:
+        with open(dev.volume_cache_file, "r", encoding="utf-8") as handle:
             raw = handle.read().strip()
         if raw == "":
             return None
@@ -489,21 +1733,21 @@ def _load_cached_volume_index():
         return None
 
 
-def _set_user_stop_cooldown():
+def _set_user_stop_cooldown(dev):
     if SPOTIFY_USER_STOP_COOLDOWN_SECONDS <= 0:
         return
     try:
         until_ts = int(time.time() + SPOTIFY_USER_STOP_COOLDOWN_SECONDS)
-        with open(SPOTIFY_USER_STOP_MARKER_FILE, "w", encoding="utf-8") as handle:
+        with open(dev.user_stop_marker_file, "w", encoding="utf-8") as handle:
             handle.write(str(until_ts))
-        log.info("Keep-Alive: Nutzer-Stopp erkannt, Cooldown %ds aktiv", SPOTIFY_USER_STOP_COOLDOWN_SECONDS)
+        dev.log.info("Keep-Alive: Nutzer-Stopp erkannt, Cooldown %ds aktiv", SPOTIFY_USER_STOP_COOLDOWN_SECONDS)
     except Exception:
         pass
 
 
-def _get_user_stop_cooldown_remaining():
+def _get_user_stop_cooldown_remaining(dev):
     try:
-        with open(SPOTIFY_USER_STOP_MARKER_FILE, "r", encoding="utf-8") as handle:
+        with open(dev.user_stop_marker_file, "r", encoding="utf-8") as handle:
             raw = handle.read().strip()
         if raw == "":
             return 0
@@ -514,22 +1758,47 @@ def _get_user_stop_cooldown_remaining():
         return 0
 
 
-def _clear_user_stop_cooldown():
+def _clear_user_stop_cooldown(dev):
     try:
-        os.remove(SPOTIFY_USER_STOP_MARKER_FILE)
-        log.info("Keep-Alive: Nutzer-Stopp-Cooldown aufgehoben")
+        os.remove(dev.user_stop_marker_file)
+        dev.log.info("Keep-Alive: Nutzer-Stopp-Cooldown aufgehoben")
     except FileNotFoundError:
         pass
     except Exception:
         pass
 
 
-def sync_volume_from_ha(last_volume_level):
+async def _volume_cache_writer(dev):
+    """Schreibt den Volume-Cache erst, wenn der Index SPOTIFY_VOLUME_CACHE_DELAY ruht."""
+    while True:
+        index = dev.volume_cache_index
+        await asyncio.sleep(SPOTIFY_VOLUME_CACHE_DELAY)
+        if dev.volume_cache_index == index:
+            break
+    await asyncio.to_thread(_save_cached_volume_index, dev, index)
+    dev.volume_cache_saved = index
+
+
+def _schedule_volume_cache_write(dev, index_value):
+    dev.volume_cache_index = index_value
+    if dev.volume_cache_task is None or dev.volume_cache_task.done():
+        dev.volume_cache_task = asyncio.get_running_loop().create_task(
+            _volume_cache_writer(dev), name=f"volume_cache:{dev.name}")
+
+
+def flush_volume_cache(dev):
+    """Beim Beenden: noch nicht geschriebenen Index sofort sichern."""
+    if dev.volume_cache_index is not None and dev.volume_cache_index != dev.volume_cache_saved:
+        _save_cached_volume_index(dev, dev.volume_cache_index)
+        dev.volume_cache_saved = dev.volume_cache_index
+
+
+async def sync_volume_from_ha(dev, last_volume_level):
     """Übernimmt HA-Volume (0..1) auf Echo STREAM_MUSIC via ADB cmd media_session."""
     if not SPOTIFY_VOLUME_SYNC_ENABLED:
         return last_volume_level
 
-    state = ha_get_entity(SPOTIFY_ENTITY)
+    state = await ha_get_entity_async(dev.spotify_entity)
     if not state:
         return last_volume_level
 
@@ -540,7 +1809,7 @@ def sync_volume_from_ha(last_volume_level):
     if SPOTIFY_VOLUME_SYNC_ONLY_WHEN_PLAYING and playback_state != "playing":
         return last_volume_level
 
-    if SPOTIFY_VOLUME_SYNC_REQUIRE_SOURCE_MATCH and not _source_is_jarvis(source_name):
+    if SPOTIFY_VOLUME_SYNC_REQUIRE_SOURCE_MATCH and not _source_is_jarvis(dev, source_name):
         return last_volume_level
 
     raw_level = attrs.get("volume_level")
@@ -560,58 +1829,59 @@ def sync_volume_from_ha(last_volume_level):
     target_index = int(round(level * max_steps))
     target_index = _clamp(target_index, 0, max_steps)
 
-    adb_shell(
+    # Nicht warten: ein neuerer Volume-Befehl ersetzt einen noch wartenden
+    dev.adb_queue.submit(
         f"cmd media_session volume --stream 3 --set {target_index}",
+        priority=PRIO_VOLUME,
         timeout_s=3,
+        deadline_s=5,
+        key="volume",
     )
-    _save_cached_volume_index(target_index)
-    log.info("Volume-Sync: HA %.2f -> Echo index %d/%d", level, target_index, max_steps)
+    _schedule_volume_cache_write(dev, target_index)
+    dev.metrics.inc("volume_writes")
+    dev.log.info("Volume-Sync: HA %.2f -> Echo index %d/%d", level, target_index, max_steps)
     return level
 
 # ============================================================================
 # KEEP-ALIVE: Spotify App permanent im Hintergrund
 # ============================================================================
 
-_keepalive_initialized = False
-_last_keepalive_launch_ts = 0.0
-
-
-def keepalive_init():
+def keepalive_init(dev):
     """Einmaliges Setup: Doze-Whitelist + Spotify im Hintergrund starten."""
-    global _keepalive_initialized
     if not SPOTIFY_KEEPALIVE_ENABLED:
         return
-    if _keepalive_initialized:
+    if dev.keepalive_initialized:
         return
 
     # Spotify in Doze-Whitelist → Android killt es nicht im Deep Sleep
     result = adb_shell(
+        dev,
         f"dumpsys deviceidle whitelist +{SPOTIFY_PACKAGE} 2>/dev/null; "
         f"cmd appops set {SPOTIFY_PACKAGE} RUN_IN_BACKGROUND allow 2>/dev/null; "
         f"cmd appops set {SPOTIFY_PACKAGE} RUN_ANY_IN_BACKGROUND allow 2>/dev/null",
         timeout_s=10,
     )
     if result is not None:
-        log.info("Keep-Alive: Spotify in Doze-Whitelist + Background-Erlaubnis gesetzt")
-        cached_volume = _load_cached_volume_index()
+        dev.log.info("Keep-Alive: Spotify in Doze-Whitelist + Background-Erlaubnis gesetzt")
+        cached_volume = dev.volume_cache_index
+        if cached_volume is None:
+            cached_volume = _load_cached_volume_index(dev)
         if cached_volume is not None:
-            adb_shell(
+            dev.adb_queue.submit(
                 f"cmd media_session volume --stream 3 --set {cached_volume}",
+                priority=PRIO_VOLUME,
                 timeout_s=3,
+                key="volume",
             )
-            log.info("Volume-Restore: Echo index %d aus Cache gesetzt", cached_volume)
-        _keepalive_initialized = True
+            dev.log.info("Volume-Restore: Echo index %d aus Cache gesetzt", cached_volume)
+        dev.keepalive_initialized = True
 
-def _keepalive_should_run_now():
+def _keepalive_should_run_now(dev):
     if not SPOTIFY_KEEPALIVE_ONLY_WHEN_ACTIVE:
         return True
 
-    data, status = http_get(
-        f"{HA_API}/states/{SPOTIFY_ENTITY}",
-        headers={"Authorization": f"Bearer {HA_TOKEN}"},
-        timeout=5,
-    )
-    if status != 200:
+    data = ha_get_entity(dev.spotify_entity)
+    if data is None:
         return False
 
     state = (data.get("state") or "").lower()
@@ -635,356 +1905,752 @@ def _keepalive_should_run_now():
         return False
 
     src_l = source.lower()
-    if JARVIS_SPOTIFY_NAME:
-        return src_l == JARVIS_SPOTIFY_NAME.lower()
+    if dev.spotify_source:
+        return src_l == dev.spotify_source.lower()
 
     return ("echo" in src_l) or ("show" in src_l)
 
 
-def keepalive_check(force=False):
-    """Prüft ob Spotify läuft. Falls nicht: im Hintergrund starten.
+class SpotifyWatchdog:
+    """Keep-Alive als Zustandsmaschine: Spotify-Prozess tot → im Hintergrund neu starten.
 
-    Startet Spotify und bringt sofort VACA wieder in den Vordergrund.
+    Vom Prozess-Tod erfährt der Watchdog über ProcessWatchStream (logcat);
+    ohne Kanal prüft er wie früher alle KEEPALIVE_INTERVAL Sekunden per pidof.
+
+      idle → check → [gap] → launch → foreground → verify → idle
+                                                         ↘ failed (Retry per Poll)
+
+    Alle Wartezeiten sind asyncio.sleep — die übrigen Tasks laufen weiter.
     """
-    if not SPOTIFY_KEEPALIVE_ENABLED:
-        return True
 
-    if not force and not _keepalive_should_run_now():
-        return True
+    def __init__(self, dev):
+        self._dev = dev
+        self._wake = asyncio.Event()
+        self._started = asyncio.Event()
+        self._retry = False
+        self._died_at = None
+        self.state = "idle"
+        self.pid = None
+        self.deaths = 0
+        self.launches = 0
+        self.failures = 0
+
+    def wake(self):
+        self._wake.set()
+
+    def process_event(self, kind, pid):
+        """Vom ProcessWatchStream (in der Loop): am_proc_died / am_proc_start."""
+        if kind == "am_proc_start":
+            self.pid = pid
+            self._started.set()
+            return
+        if pid != self.pid and self.pid is not None:
+            return  # Alter Prozess (z.B. letzte Zeile von logcat -T 1)
+        self.deaths += 1
+        self.pid = None
+        self._died_at = time.monotonic()
+        self._dev.log.warning("Keep-Alive: Spotify-Prozess beendet (PID %s)", pid)
+        self._wake.set()
+
+    def _streamed(self):
+        stream = self._dev.process_stream
+        return stream is not None and stream.live
+
+    async def run(self):
+        while True:
+            timeout = None if self._streamed() and not self._retry else KEEPALIVE_INTERVAL
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._dev.connected:
+                self._retry = True  # Nach dem Reconnect per Poll prüfen
+                continue
+            try:
+                self._retry = not await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._retry = True
+                self.state = "idle"
+                self._dev.log.error("Keep-Alive: Fehler: %s", e)
+
+    async def _pidof(self):
+        result = await adb_shell_async(self._dev, f"pidof {SPOTIFY_PACKAGE}", timeout_s=3)
+        self.pid = result.strip().split()[0] if result and result.strip() else None
+        return self.pid
+
+    async def check(self):
+        """Prüft ob Spotify läuft. Falls nicht: im Hintergrund starten.
+
+        Startet Spotify und bringt sofort VACA wieder in den Vordergrund.
+        False = Start fehlgeschlagen oder aufgeschoben → erneut per Poll.
+        """
+        dev = self._dev
+        if not await asyncio.to_thread(_keepalive_should_run_now, dev):
+            # Prozess unbekannt → später erneut fragen (nur HA, kein ADB)
+            return self.pid is not None
+
+        self.state = "check"
+        if await self._pidof():
+            self.state = "idle"
+            return True  # Spotify läuft
+
+        cooldown_remaining = await asyncio.to_thread(_get_user_stop_cooldown_remaining, dev)
+        if cooldown_remaining > 0 and not SPOTIFY_ALWAYS_REACHABLE:
+            dev.log.info("Keep-Alive: Nutzer-Stopp-Cooldown aktiv (%ds verbleibend), kein Auto-Restart", cooldown_remaining)
+            self.state = "idle"
+            return False  # Nach dem Cooldown per Poll neu starten
+
+        if cooldown_remaining > 0 and SPOTIFY_ALWAYS_REACHABLE:
+            dev.log.info("Keep-Alive: Nutzer-Stopp-Cooldown aktiv (%ds), starte nur App für Connect-Erreichbarkeit", cooldown_remaining)
+
+        if SPOTIFY_KEEPALIVE_MIN_RESTART_GAP_SECONDS > 0 and dev.last_keepalive_launch_ts > 0:
+            wait_left = SPOTIFY_KEEPALIVE_MIN_RESTART_GAP_SECONDS - (time.monotonic() - dev.last_keepalive_launch_ts)
+            if wait_left > 0:
+                # Restart-Gap abwarten statt aufgeben: es kommt kein nächster Poll
+                self.state = "gap"
+                dev.log.info("Keep-Alive: Restart-Backoff aktiv (%ds), Neustart danach", int(wait_left))
+                await asyncio.sleep(wait_left)
+                if await self._pidof():
+                    self.state = "idle"
+                    return True
+
+        self.state = "launch"
+        dev.log.warning("Keep-Alive: Spotify-Prozess nicht gefunden, starte...")
+        dev.last_keepalive_launch_ts = time.monotonic()
+        self.launches += 1
+        self._started.clear()
+        # Restart-Latenz ab Prozess-Tod (logcat), sonst ab Start des Neustarts
+        since = self._died_at or time.monotonic()
+        self._died_at = None
+
+        # Spotify starten — monkey ist der zuverlässigste Weg
+        await adb_shell_async(
+            dev,
+            f"monkey -p {SPOTIFY_PACKAGE} -c android.intent.category.LAUNCHER 1 2>/dev/null",
+            timeout_s=10,
+        )
+        # Warte kurz, dann VACA sofort wieder in den Vordergrund
+        await asyncio.sleep(2)
+        self.state = "foreground"
+        await adb_shell_async(
+            dev,
+            "am start -n com.msp1974.vacompanion/.MainActivity "
+            "-a android.intent.action.MAIN",
+            timeout_s=5,
+        )
+        await asyncio.sleep(0.3)
+        await adb_shell_async(dev, "settings put system screen_off_timeout 86400000", timeout_s=5)
+
+        # Prüfen ob es jetzt läuft (Start-Event aus logcat spart den pidof-Aufruf)
+        self.state = "verify"
+        pid = self.pid if self._started.is_set() else await self._pidof()
+        if pid:
+            self.state = "idle"
+            dev.log.info("Keep-Alive: Spotify gestartet (PID: %s)", pid)
+            dev.metrics.observe("keepalive_restart", (time.monotonic() - since) * 1000)
+            return True
+        self.state = "failed"
+        self.failures += 1
+        dev.log.error("Keep-Alive: Spotify konnte nicht gestartet werden")
+        return False
 
-    result = adb_shell(f"pidof {SPOTIFY_PACKAGE}", timeout_s=3)
-    if result and result.strip():
-        return True  # Spotify läuft
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "pid": self.pid,
+            "streamed": self._streamed(),
+            "deaths": self.deaths,
+            "launches": self.launches,
+            "failures": self.failures,
+        }
 
-    cooldown_remaining = _get_user_stop_cooldown_remaining()
-    if cooldown_remaining > 0 and not SPOTIFY_ALWAYS_REACHABLE:
-        log.info("Keep-Alive: Nutzer-Stopp-Cooldown aktiv (%ds verbleibend), kein Auto-Restart", cooldown_remaining)
-        return True
+# ============================================================================
+# DUCKING: Musik pausieren bei Spracheingabe
+# ============================================================================
 
-    if cooldown_remaining > 0 and SPOTIFY_ALWAYS_REACHABLE:
-        log.info("Keep-Alive: Nutzer-Stopp-Cooldown aktiv (%ds), starte nur App für Connect-Erreichbarkeit", cooldown_remaining)
+async def ducking_pause(dev, trigger):
+    """Pausiert, was gerade läuft (Spotify per ADB-Zustand, Radio per HA).
 
-    global _last_keepalive_launch_ts
+    Gemeinsamer Pfad für Wake-Event und Satellite-Wechsel; wer zuerst kommt,
+    pausiert, der andere sieht dev.ducking_active. True = etwas pausiert.
+    """
+    if dev.ducking_active:
+        return False
+    dev.ducking_active = True  # Sofort belegen, bevor ein await den anderen Pfad durchlässt
+    # Was läuft gerade? Spotify (ADB) und/oder Radio (HA)
+    dev.ducking_was_spotify = (dev.spotify_state == STATE_PLAYING)
+    radio_state = await ha_get_entity_state(dev.radio_entity)
+    dev.ducking_was_radio = (radio_state == "playing")
+    if not (dev.ducking_was_spotify or dev.ducking_was_radio):
+        dev.ducking_active = False
+        return False
 
-    now_mono = time.monotonic()
-    if SPOTIFY_KEEPALIVE_MIN_RESTART_GAP_SECONDS > 0:
-        since_last = now_mono - _last_keepalive_launch_ts
-        if _last_keepalive_launch_ts > 0 and since_last < SPOTIFY_KEEPALIVE_MIN_RESTART_GAP_SECONDS:
-            wait_left = int(SPOTIFY_KEEPALIVE_MIN_RESTART_GAP_SECONDS - since_last)
-            log.info("Keep-Alive: Restart-Backoff aktiv (%ds), überspringe Neustart", wait_left)
-            return False
+    sources = []
+    if dev.ducking_was_spotify:
+        sources.append("Spotify")
+    if dev.ducking_was_radio:
+        sources.append("Radio")
+    dev.log.info("🔇 Ducking: %s, pausiere %s", trigger, "+".join(sources))
+
+    # WICHTIG: Boolean ON spätestens zusammen mit ADB/Radio senden, nie danach!
+    # Race-Condition-Fix: ADB dauert 1-3s. Wenn die Stopp-Automation
+    # Boolean OFF setzt BEVOR unser ON ankommt, überschreiben wir
+    # das OFF und der Monitor denkt "kein Stopp" → falsches Resume.
+    # Parallel statt nacheinander: der Pause-Befehl wartet nicht auf den
+    # Boolean-Roundtrip, das ON ist trotzdem lange vor der Stopp-Automation da.
+    calls = [ha_call_service("input_boolean", "turn_on", {"entity_id": dev.ducking_boolean})]
+
+    # Spotify pausieren (prefer HA service to avoid MEDIA_BUTTON ANR)
+    if dev.ducking_was_spotify and SPOTIFY_DUCKING_CONTROL_VIA_HA:
+        calls.append(ha_call_service("media_player", "media_pause", {"entity_id": dev.spotify_entity}))
+    else:
+        calls.append(adb_shell_async(dev, "input keyevent KEYCODE_MEDIA_PAUSE", timeout_s=3,
+                                     priority=PRIO_DUCKING, deadline_s=3))
 
-    log.warning("Keep-Alive: Spotify-Prozess nicht gefunden, starte...")
-    _last_keepalive_launch_ts = now_mono
+    # Radio zusätzlich via HA pausieren (falls nicht via ADB)
+    if dev.ducking_was_radio:
+        calls.append(ha_call_service("media_player", "media_pause", {"entity_id": dev.radio_entity}))
+    dev.pipeline_end = None
+    await asyncio.gather(*calls)
+    dev.metrics.inc("ducking_pauses")
+    return True
 
-    # Spotify starten — monkey ist der zuverlässigste Weg
-    adb_shell(
-        f"monkey -p {SPOTIFY_PACKAGE} -c android.intent.category.LAUNCHER 1 2>/dev/null",
-        timeout_s=10,
-    )
-    # Warte kurz, dann VACA sofort wieder in den Vordergrund
-    time.sleep(2)
-    adb_shell(
-        "am start -n com.msp1974.vacompanion/.MainActivity "
-        "-a android.intent.action.MAIN",
-        timeout_s=5,
-    )
-    time.sleep(0.3)
-    adb_shell("settings put system screen_off_timeout 86400000", timeout_s=5)
 
-    # Prüfen ob es jetzt läuft
-    result = adb_shell(f"pidof {SPOTIFY_PACKAGE}", timeout_s=3)
-    if result and result.strip():
-        log.info("Keep-Alive: Spotify gestartet (PID: %s)", result.strip())
-        return True
-    else:
-        log.error("Keep-Alive: Spotify konnte nicht gestartet werden")
-        return False
+def _event_timestamp(time_fired):
+    """time_fired (ISO, UTC) → Unix-Zeit oder None."""
+    try:
+        return datetime.fromisoformat(time_fired.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
 
-# ============================================================================
-# DUCKING: Musik pausieren bei Spracheingabe
-# ============================================================================
 
-_ducking_active = False
-_last_satellite_state = "idle"
-_ducking_was_spotify = False
-_ducking_was_radio = False
+def _device_for_event(data):
+    """Zu welchem Gerät gehört ein Pipeline-Event? Ein Gerät → immer dieses."""
+    if len(_devices) == 1:
+        return _devices[0]
+    values = set()
+    for value in data.values():
+        if isinstance(value, str):
+            values.add(value)
+        elif isinstance(value, dict):
+            values.update(v for v in value.values() if isinstance(v, str))
+    for dev in _devices:
+        if values & {dev.satellite_entity, dev.va_device, dev.name}:
+            return dev
+    return None
+
+
+def _wake_detected(data):
+    """Steht das Event für ein erkanntes Wake-Word (nicht nur für Zuhören)?"""
+    if "start_stage" in data:
+        # run-start: "wake_word" heißt nur, dass der Satellite wieder lauscht
+        # (das Wake-Word kommt als eigenes Event), "stt" dagegen, dass es schon
+        # auf dem Gerät erkannt wurde. Getippte Eingaben starten bei intent/tts.
+        return data["start_stage"] == "stt"
+    if "wake_word_output" in data:
+        # wake_word-end ohne Ergebnis: Audio-Stream endete ohne Wake-Word
+        return bool(data["wake_word_output"])
+    return True
+
+
+def ducking_on_wake_event(event_type, data, time_fired, received):
+    """Callback des WebSocket-Spiegels: Wake-Word erkannt → sofort pausieren."""
+    if not _wake_detected(data):
+        return
+    dev = _device_for_event(data)
+    if dev is None:
+        log.debug("Wake-Event %s keinem Gerät zuzuordnen: %s", event_type, data)
+        return
+    if dev.ducking_active or dev.last_satellite_state != "idle":
+        return
+    asyncio.get_running_loop().create_task(
+        _ducking_wake(dev, event_type, _event_timestamp(time_fired), received))
+
+
+def ducking_on_pipeline_end(event_type, data, time_fired, received):
+    """Callback des WebSocket-Spiegels: Pipeline fertig → Resume-Entscheidung wecken."""
+    dev = _device_for_event(data)
+    if dev is None or not dev.ducking_active:
+        return
+    dev.pipeline_end = data
+    if _ha_mirror is not None:
+        _ha_mirror.wake(f"ducking:{dev.name}")
 
 
-def ducking_check(current_spotify_state):
+def _pipeline_intent(data):
+    """Intent-Name aus dem Pipeline-Ende (wie in conversation_logging.yaml)."""
+    intent = (data.get("intent_output") or {}).get("intent") or {}
+    return intent.get("name") if isinstance(intent, dict) else None
+
+
+async def _ducking_wake(dev, event_type, fired_ts, received):
+    try:
+        if not await ducking_pause(dev, f"Wake-Event {event_type}"):
+            return
+    except Exception as e:
+        dev.log.error("Ducking: Fehler bei Wake-Event: %s", e)
+        return
+    dev.ducking_wake_ts = time.monotonic()
+    # Ab Feuern des Events in HA (gleicher Host → gleiche Uhr), sonst ab Empfang
+    if fired_ts is not None:
+        latency_ms = max(time.time() - fired_ts, 0.0) * 1000
+    else:
+        latency_ms = (dev.ducking_wake_ts - received) * 1000
+    dev.metrics.observe("ducking_wake_pause", latency_ms)
+    if latency_ms > SPOTIFY_DUCKING_BUDGET_MS:
+        dev.metrics.inc("ducking_budget_exceeded")
+        dev.log.warning("🔇 Ducking: Wake→Pause %.0fms (Budget %.0fms)",
+                        latency_ms, SPOTIFY_DUCKING_BUDGET_MS)
+    else:
+        dev.log.info("🔇 Ducking: Wake→Pause %.0fms", latency_ms)
+
+
+async def ducking_check(dev):
     """Pausiert ALLES (Spotify + Radio) bei Spracheingabe.
 
-    PAUSE:  ADB KEYCODE_MEDIA_PAUSE (pausiert AudioFocus-Halter, ~100ms)
+    PAUSE:  Meist schon beim Wake-Event (ducking_on_wake_event), sonst
+            sobald der Satellite idle verlässt.
+            ADB KEYCODE_MEDIA_PAUSE (pausiert AudioFocus-Halter, ~100ms)
             + HA media_player.media_pause auf Radio (Backup)
     RESUME: Nur wenn kein Stopp-Intent erkannt wurde.
-            3s Wartezeit + Satellite-Recheck + Boolean-Check.
+            Sobald Satellite idle UND Pipeline fertig (Event): Boolean-
+            und Intent-Check. Wake-Event ohne Spracheingabe → Resume nach SPOTIFY_DUCKING_WAKE_GRACE.
 
     Boolean-Logik:
     - WIR setzen input_boolean → ON beim Ducking-Start
     - Stopp-Automation setzt input_boolean → OFF als ERSTE Aktion
-    - Nach 3s Wartezeit: ON = normales Ducking → Resume,
+    - Nach Pipeline-Ende: ON = normales Ducking → Resume,
                           OFF = Stopp-Intent → kein Resume
     """
-    global _ducking_active, _last_satellite_state
-    global _ducking_was_spotify, _ducking_was_radio
-
-    sat_state = ha_get_satellite_state()
-
-    # Satellite hat sich nicht geändert → nichts zu tun
-    if sat_state == _last_satellite_state:
-        return
-    old_state = _last_satellite_state
-    _last_satellite_state = sat_state
+    sat_state = await ha_get_satellite_state(dev)
+    old_state = dev.last_satellite_state
+    false_wake = False
+
+    # Satellite hat sich nicht geändert → nichts zu tun, außer ein Wake-Event
+    # hat pausiert und der Satellite ist nie aus idle gekommen
+    if sat_state == old_state:
+        if not (sat_state == "idle" and dev.ducking_active and dev.ducking_wake_ts is not None
+                and time.monotonic() - dev.ducking_wake_ts > SPOTIFY_DUCKING_WAKE_GRACE):
+            return
+        false_wake = True
+        dev.log.info("🔊 Ducking: Wake-Event ohne Spracheingabe (%.0fs idle) → Resume",
+                     SPOTIFY_DUCKING_WAKE_GRACE)
+    dev.last_satellite_state = sat_state
+    if sat_state != "idle":
+        dev.ducking_wake_ts = None  # Wake-Event bestätigt
+        if _ha_actions is not None:
+            # View Assist wechselt für die Antwort die Ansicht
+            _ha_actions.forget_navigation(dev)
 
     # === PAUSE: Satellite verlässt idle → Spracheingabe beginnt ===
     if old_state == "idle" and sat_state != "idle":
-        # Was läuft gerade? Spotify (ADB) und/oder Radio (HA)
-        _ducking_was_spotify = (current_spotify_state == STATE_PLAYING)
-        radio_state = ha_get_entity_state(RADIO_ENTITY)
-        _ducking_was_radio = (radio_state == "playing")
-
-        if _ducking_was_spotify or _ducking_was_radio:
-            sources = []
-            if _ducking_was_spotify:
-                sources.append("Spotify")
-            if _ducking_was_radio:
-                sources.append("Radio")
-            log.info("🔇 Ducking: Satellite=%s, pausiere %s",
-                     sat_state, "+".join(sources))
-            _ducking_active = True
-
-            # WICHTIG: Boolean ON ZUERST setzen, BEVOR ADB/Radio!
-            # Race-Condition-Fix: ADB dauert 1-3s. Wenn die Stopp-Automation
-            # Boolean OFF setzt BEVOR unser ON ankommt, überschreiben wir
-            # das OFF und der Monitor denkt "kein Stopp" → falsches Resume.
-            http_post(
-                f"{HA_API}/services/input_boolean/turn_on",
-                headers={"Authorization": f"Bearer {HA_TOKEN}"},
-                json_data={"entity_id": "input_boolean.spotify_ducking_active"},
-            )
-
-            # Spotify pausieren (prefer HA service to avoid MEDIA_BUTTON ANR)
-            if _ducking_was_spotify and SPOTIFY_DUCKING_CONTROL_VIA_HA:
-                http_post(
-                    f"{HA_API}/services/media_player/media_pause",
-                    headers={"Authorization": f"Bearer {HA_TOKEN}"},
-                    json_data={"entity_id": SPOTIFY_ENTITY},
-                )
-            else:
-                adb_shell("input keyevent KEYCODE_MEDIA_PAUSE", timeout_s=3)
-
-            # Radio zusätzlich via HA pausieren (falls nicht via ADB)
-            if _ducking_was_radio:
-                http_post(
-                    f"{HA_API}/services/media_player/media_pause",
-                    headers={"Authorization": f"Bearer {HA_TOKEN}"},
-                    json_data={"entity_id": RADIO_ENTITY},
-                )
+        detected = time.monotonic()
+        if await ducking_pause(dev, f"Satellite={sat_state}"):
+            dev.metrics.observe("ducking_pause", (time.monotonic() - detected) * 1000)
         return
 
     # === RESUME: Satellite kommt zurück zu idle ===
-    if sat_state == "idle" and _ducking_active:
-        # POLLING-ANSATZ: Prüfe Boolean alle 0.5s für max 15s.
+    if sat_state == "idle" and dev.ducking_active:
+        # EVENT-ANSATZ: Entscheidung, sobald die Pipeline fertig ist.
         #
-        # WARUM POLLING statt einmaligem Wait?
-        # Die Stopp-Automation läuft als Sentence-Trigger in der Pipeline.
-        # Je nach HA-Last kann sie VOR oder NACH satellite→idle fertig sein.
-        # Mit Polling erkennen wir den Boolean-Wechsel sofort wenn er kommt,
-        # statt blind 3s zu warten und dann zu spät oder zu früh zu prüfen.
+        # Die Stopp-Automation (und jeder Intent, der selbst Musik startet)
+        # setzt den Boolean OFF — je nach HA-Last VOR oder NACH satellite→idle.
+        # Das Pipeline-Ende (SPOTIFY_DUCKING_END_EVENTS) kommt erst, wenn der
+        # Intent samt Aktionen durch ist; danach steht das Ergebnis fest.
         #
-        # Ablauf:
-        # - Alle 0.5s: Boolean prüfen + Satellite-State prüfen
+        # Ablauf (geweckt von Pipeline-Ende, Boolean- oder Satellite-Änderung):
         # - Boolean OFF → Stopp-Intent erkannt → sofort KEIN Resume
-        # - Boolean ON nach 15s → normales Ducking → Resume
+        # - Pipeline fertig mit Intent aus SPOTIFY_DUCKING_STOP_INTENTS → KEIN Resume
+        # - Pipeline fertig, Boolean ON → sofort Resume
         # - Satellite nicht mehr idle → abbrechen, nächsten Übergang abwarten
+        # - Kein Pipeline-Ende nach 15s → Resume (langsame Pipeline, Event fehlt)
+        # Ohne WebSocket: Boolean + Satellite alle 0.5s per REST wie früher.
         RESUME_POLL_INTERVAL = 0.5
-        RESUME_POLL_MAX = 15.0  # Sekunden (genug für langsame Pipelines)
+        RESUME_MAX = 15.0  # Sekunden (genug für langsame Pipelines)
+        channel = f"ducking:{dev.name}"
         elapsed = 0.0
-        stop_detected = False
+        stop_reason = None
+        resume_reason = "Wake ohne Spracheingabe" if false_wake else "kein Pipeline-Ende"
+        resume_start = time.monotonic()
+
+        # Ohne Spracheingabe gibt es keine Stopp-Automation → sofort Resume
+        while not false_wake:
+            bool_data = await ha_get_entity_async(dev.ducking_boolean)
+            ducking_bool = bool_data.get("state", "unknown") if bool_data else "unknown"
+            if ducking_bool != "on":
+                stop_reason = f"Boolean='{ducking_bool}'"
+                break
+            if dev.pipeline_end is not None:
+                intent = _pipeline_intent(dev.pipeline_end)
+                if intent in SPOTIFY_DUCKING_STOP_INTENTS:
+                    stop_reason = f"Intent {intent}"
+                else:
+                    resume_reason = f"Pipeline fertig ({intent or 'ohne Intent'})"
+                break
+            remaining = RESUME_MAX - elapsed
+            if remaining <= 0:
+                break
 
-        while elapsed < RESUME_POLL_MAX:
-            time.sleep(RESUME_POLL_INTERVAL)
-            elapsed += RESUME_POLL_INTERVAL
+            events = (_ha_mirror is not None and _ha_mirror.live
+                      and bool(SPOTIFY_DUCKING_END_EVENTS))
+            await ha_wait(remaining if events else min(RESUME_POLL_INTERVAL, remaining), channel)
+            elapsed = time.monotonic() - resume_start
 
             # Satellite immer noch idle?
-            sat_recheck = ha_get_satellite_state()
+            sat_recheck = await ha_get_satellite_state(dev)
             if sat_recheck != "idle":
-                log.info("🔇 Ducking: Satellite=%s während Wartezeit → warte weiter",
-                         sat_recheck)
-                _last_satellite_state = sat_recheck
+                dev.log.info("🔇 Ducking: Satellite=%s während Wartezeit → warte weiter",
+                             sat_recheck)
+                dev.last_satellite_state = sat_recheck
+                dev.pipeline_end = None  # Folgefrage: deren Pipeline-Ende zählt
                 return  # Nächster idle-Übergang wird erneut geprüft
-
-            # Boolean prüfen
-            bool_data, bool_status = http_get(
-                f"{HA_API}/states/input_boolean.spotify_ducking_active",
-                headers={"Authorization": f"Bearer {HA_TOKEN}"},
-            )
-            ducking_bool = bool_data.get("state", "unknown") if bool_status == 200 else "unknown"
-
-            if ducking_bool != "on":
-                # OFF → Stopp-Intent erkannt!
-                stop_detected = True
-                log.info("🔇 Ducking: Boolean='%s' nach %.1fs → Stopp erkannt → KEIN Resume",
-                         ducking_bool, elapsed)
-                log.info("🔇 Ducking: Pipeline-Dauer bis Boolean OFF: %.1fs", elapsed)
-                _set_user_stop_cooldown()
-                # Automation hat bereits media_pause gesendet → hier NICHT
-                # nochmal senden, um doppelte Befehle zu vermeiden.
-                log.info("🔇 Ducking: Stopp-Automation hat pausiert, kein erneuter Pause-Befehl nötig")
-                break
-
-        if not stop_detected:
-            # Boolean war die ganze Zeit ON → normales Ducking → Resume
+        elapsed = time.monotonic() - resume_start
+
+        if stop_reason is not None:
+            dev.log.info("🔇 Ducking: %s nach %.1fs → Stopp erkannt → KEIN Resume",
+                         stop_reason, elapsed)
+            dev.log.info("🔇 Ducking: Pipeline-Dauer bis Stopp: %.1fs", elapsed)
+            dev.metrics.inc("ducking_stops")
+            dev.metrics.observe("ducking_pipeline_until_off", elapsed * 1000)
+            await asyncio.to_thread(_set_user_stop_cooldown, dev)
+            # Automation hat bereits media_pause gesendet → hier NICHT
+            # nochmal senden, um doppelte Befehle zu vermeiden.
+            dev.log.info("🔇 Ducking: Stopp-Automation hat pausiert, kein erneuter Pause-Befehl nötig")
+        else:
+            # Boolean blieb ON → normales Ducking → Resume
             sources = "+".join(filter(None, [
-                "Spotify" if _ducking_was_spotify else "",
-                "Radio" if _ducking_was_radio else "",
+                "Spotify" if dev.ducking_was_spotify else "",
+                "Radio" if dev.ducking_was_radio else "",
             ]))
-            log.info("🔊 Ducking Ende: Resume nach %.1fs (%s) — Boolean blieb ON",
-                     elapsed, sources)
-            if _ducking_was_spotify:
+            dev.log.info("🔊 Ducking Ende: Resume nach %.1fs (%s) — %s, Boolean blieb ON",
+                         elapsed, sources, resume_reason)
+            if dev.ducking_was_spotify:
                 if SPOTIFY_DUCKING_CONTROL_VIA_HA:
-                    http_post(
-                        f"{HA_API}/services/media_player/media_play",
-                        headers={"Authorization": f"Bearer {HA_TOKEN}"},
-                        json_data={"entity_id": SPOTIFY_ENTITY},
-                    )
+                    await ha_call_service("media_player", "media_play", {"entity_id": dev.spotify_entity})
                 else:
-                    adb_shell("input keyevent KEYCODE_MEDIA_PLAY", timeout_s=3)
-            if _ducking_was_radio:
-                http_post(
-                    f"{HA_API}/services/media_player/media_play",
-                    headers={"Authorization": f"Bearer {HA_TOKEN}"},
-                    json_data={"entity_id": RADIO_ENTITY},
-                )
+                    await adb_shell_async(dev, "input keyevent KEYCODE_MEDIA_PLAY", timeout_s=3,
+                                          priority=PRIO_DUCKING)
+            if dev.ducking_was_radio:
+                await ha_call_service("media_player", "media_play", {"entity_id": dev.radio_entity})
+            dev.metrics.inc("ducking_resumes")
+            # Ab Satellite idle, inkl. Wartezeit auf die Stopp-Automation
+            dev.metrics.observe("ducking_resume", (time.monotonic() - resume_start) * 1000)
 
         # Aufräumen
-        _ducking_active = False
-        _ducking_was_spotify = False
-        _ducking_was_radio = False
-        http_post(
-            f"{HA_API}/services/input_boolean/turn_off",
-            headers={"Authorization": f"Bearer {HA_TOKEN}"},
-            json_data={"entity_id": "input_boolean.spotify_ducking_active"},
-        )
+        dev.ducking_active = False
+        dev.ducking_was_spotify = False
+        dev.ducking_was_radio = False
+        dev.ducking_wake_ts = None
+        dev.pipeline_end = None
+        await ha_call_service("input_boolean", "turn_off", {"entity_id": dev.ducking_boolean})
 
 # ============================================================================
-# PID FILE
+# GERÄTE — ein Objekt pro Echo Show
 # ============================================================================
+# Alles, was früher ein Modul-Global war (ADB-Verbindung, Queue, Stream,
+# Ducking-/Keep-Alive-Zustand), hängt am Device. HA-Verbindung (HTTP-Pool,
+# WebSocket-Spiegel) und HAActionScheduler teilen sich alle Geräte — die
+# HA-Last wächst nicht mit der Zahl der Räume.
+
+class _DeviceLog(logging.LoggerAdapter):
+    """Log-Zeilen mit [Gerätename] davor (nur bei mehreren Geräten)."""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['device']}] {msg}", kwargs
+
+
+class Device:
+    """Ein Echo Show: Konfiguration, ADB-Sitzung und Zustand seiner Tasks."""
+
+    # Schlüssel in SPOTIFY_DEVICES_FILE (außer name/host alle optional)
+    CONFIG_KEYS = ("name", "host", "port", "spotify_entity", "satellite_entity",
+                   "radio_entity", "va_device", "spotify_source", "ducking_boolean",
+                   "volume_cache_file", "user_stop_marker_file")
+
+    def __init__(self, name, host, port=ECHO_PORT, spotify_entity=SPOTIFY_ENTITY,
+                 satellite_entity=SATELLITE_ENTITY, radio_entity=RADIO_ENTITY,
+                 va_device=VA_DEVICE, spotify_source=JARVIS_SPOTIFY_NAME,
+                 ducking_boolean=DUCKING_BOOLEAN,
+                 volume_cache_file=SPOTIFY_VOLUME_CACHE_FILE,
+                 user_stop_marker_file=SPOTIFY_USER_STOP_MARKER_FILE):
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.spotify_entity = spotify_entity
+        self.satellite_entity = satellite_entity
+        self.radio_entity = radio_entity
+        self.va_device = va_device
+        self.spotify_source = spotify_source
+        self.ducking_boolean = ducking_boolean
+        self.volume_cache_file = volume_cache_file
+        self.user_stop_marker_file = user_stop_marker_file
+        self.log = log
+        self.autodiscover = False
+        self.metrics = Metrics()
+        # ADB
+        self.adb_device = None
+        self.adb_lock = threading.Lock()   # Verbindungswechsel + Öffnen des Streams
+        self.adb_queue = AdbCommandQueue(self)
+        self.session_parser = MediaSessionParser()
+        self.media_stream = None
+        self.process_stream = None         # logcat-Kanal für den Keep-Alive-Watchdog
+        # Zustand der Tasks
+        self.spotify_state = STATE_NONE    # vom Session-Task, gelesen von Ducking/Refresh
+        self.ducking_active = False
+        self.ducking_was_spotify = False
+        self.ducking_was_radio = False
+        self.ducking_wake_ts = None        # monotonic: per Wake-Event pausiert, noch unbestätigt
+        self.pipeline_end = None           # Daten des Pipeline-Endes während des Duckings
+        self.last_satellite_state = "idle"
+        self.last_known_satellite = "idle"  # Fallback bei HTTP-Fehler
+        self.keepalive_initialized = False
+        self.watchdog = None
+        self.last_keepalive_launch_ts = 0.0
+        self.last_ha_volume_level = None
+        self.volume_cache_index = None     # zuletzt gesetzter Index, Datei folgt verzögert
+        self.volume_cache_saved = None
+        self.volume_cache_task = None
+
+    @property
+    def connected(self):
+        return self.adb_device is not None
+
+
+_devices = []
+
+
+def load_devices(path=SPOTIFY_DEVICES_FILE):
+    """Geräte aus der JSON-Datei; ohne Datei ein Gerät aus den ENV-Werten.
+
+    Auto-Discovery nur im Ein-Geräte-Modus ohne Datei — bei mehreren
+    Geräten wäre "erstes passendes Entity" falsch.
+    """
+    if not path or not os.path.exists(path):
+        dev = Device("echo", ECHO_HOST)
+        dev.autodiscover = True
+        return [dev]
+
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries.get("devices", [])
+    devices = []
+    for entry in entries:
+        unknown = set(entry) - set(Device.CONFIG_KEYS)
+        if unknown:
+            log.warning("Geräte-Datei: unbekannte Schlüssel %s ignoriert", ", ".join(sorted(unknown)))
+        config = {k: v for k, v in entry.items() if k in Device.CONFIG_KEYS}
+        if len(entries) > 1:
+            # Eigene Cache-/Marker-Dateien pro Gerät, sofern nicht angegeben
+            config.setdefault("volume_cache_file", f"{SPOTIFY_VOLUME_CACHE_FILE}.{config.get('name')}")
+            config.setdefault("user_stop_marker_file", f"{SPOTIFY_USER_STOP_MARKER_FILE}.{config.get('name')}")
+        devices.append(Device(**config))
+    names = [dev.name for dev in devices]
+    if not devices or len(set(names)) != len(names):
+        raise ValueError(f"Geräte-Datei {path}: leer oder doppelte Namen ({', '.join(names)})")
+    if len(devices) > 1:
+        for dev in devices:
+            dev.log = _DeviceLog(log, {"device": dev.name})
+    return devices
 
-def write_pid():
-    try:
-        os.makedirs(os.path.dirname(PID_FILE), exist_ok=True)
-        with open(PID_FILE, "w") as f:
-            f.write(str(os.getpid()))
-    except Exception:
-        pass
+# ============================================================================
+# TASKS — jeder Teil mit eigenem Takt
+# ============================================================================
+# Blockierende ADB-/HTTP-Aufrufe laufen per asyncio.to_thread. Ein langsamer
+# ADB-Befehl oder die Resume-Wartezeit beim Ducking hält so nur den eigenen
+# Task auf, nie die Titelwechsel-Erkennung. Session-, Ducking-, Keep-Alive-
+# und Volume-Task laufen pro Gerät.
+
+async def run_periodic(name, interval, func, *args):
+    """func(*args) alle interval Sekunden; Fehler loggen statt den Task zu beenden."""
+    while True:
+        try:
+            await func(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error("%s: Fehler: %s", name, e)
+        await asyncio.sleep(interval)
 
 
-def kill_old_instance():
-    try:
-        with open(PID_FILE, "r") as f:
-            old_pid = int(f.read().strip())
-        if old_pid != os.getpid():
-            os.kill(old_pid, signal.SIGTERM)
-            log.info("Alte Instanz (PID %d) SIGTERM gesendet", old_pid)
-            time.sleep(2)
-            # Prüfen ob noch am Leben → SIGKILL
-            try:
-                os.kill(old_pid, 0)  # Existenz prüfen
-                os.kill(old_pid, signal.SIGKILL)
-                log.warning("Alte Instanz (PID %d) SIGKILL gesendet", old_pid)
-                time.sleep(1)
-            except ProcessLookupError:
-                pass  # Bereits beendet
-    except (FileNotFoundError, ValueError, ProcessLookupError, PermissionError):
-        pass
+async def volume_sync_loop(dev):
+    """Volume-Sync, getrieben von Änderungen an volume_level/source am Spotify-Entity.
+
+    Mit WebSocket: warten bis HA etwas meldet, weitere Änderungen eines
+    Slider-Zugs sammeln (Ruhe SPOTIFY_VOLUME_DEBOUNCE, spätestens nach
+    SPOTIFY_VOLUME_DEBOUNCE_MAX), dann ein einziger ADB-Befehl.
+    Ohne WebSocket: REST-Poll alle SPOTIFY_VOLUME_SYNC_INTERVAL wie bisher.
+    """
+    channel = f"volume:{dev.name}"
+    while True:
+        if _ha_mirror is not None and _ha_mirror.live:
+            # Gelegentlich auch ohne Event prüfen (z.B. nach Reconnect des Echo)
+            if await ha_wait(60, channel):
+                deadline = time.monotonic() + SPOTIFY_VOLUME_DEBOUNCE_MAX
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not await ha_wait(
+                            min(SPOTIFY_VOLUME_DEBOUNCE, remaining), channel):
+                        break
+                    dev.metrics.inc("volume_coalesced")
+        else:
+            await asyncio.sleep(SPOTIFY_VOLUME_SYNC_INTERVAL)
+        if not dev.connected:
+            continue
+        try:
+            dev.last_ha_volume_level = await sync_volume_from_ha(dev, dev.last_ha_volume_level)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            dev.log.error("Volume-Sync: Fehler: %s", e)
+
+
+def _clear_cooldown_if_set(dev):
+    if _get_user_stop_cooldown_remaining(dev) > 0:
+        _clear_user_stop_cooldown(dev)
+
+
+async def fast_refresh_tick():
+    for dev in _devices:
+        if dev.spotify_state == STATE_PLAYING:
+            await asyncio.to_thread(_clear_cooldown_if_set, dev)
+            _ha_actions.request_update(dev.spotify_entity)
+
+
+async def http_stats_tick():
+    _http_pool.log_stats()
+
 
+_started_at = time.monotonic()
 
-def cleanup_pid(*_):
-    adb_disconnect()
+
+def device_status(dev):
+    """Zustand + Metriken eines Geräts."""
+    parser = dev.session_parser
+    status = {
+        "host": dev.host,
+        "adb_connected": dev.connected,
+        "spotify_state": STATE_NAMES.get(dev.spotify_state, str(dev.spotify_state)),
+        "ducking_active": dev.ducking_active,
+        **dev.metrics.snapshot(),
+        "adb_queue": {
+            "depth": dev.adb_queue.depth(),
+            "executed": dev.adb_queue.executed,
+            "dropped_stale": dev.adb_queue.dropped_stale,
+            "dropped_deadline": dev.adb_queue.dropped_deadline,
+        },
+        "session_parser": {"parsed": parser.parsed, "unchanged": parser.unchanged},
+    }
+    if dev.media_stream is not None:
+        status["media_stream"] = {"live": dev.media_stream.live, "reopens": dev.media_stream.reopens}
+        status["session_parser"]["parsed"] += dev.media_stream.parsed
+        status["session_parser"]["unchanged"] += dev.media_stream.unchanged
+    if dev.watchdog is not None:
+        status["keepalive"] = dev.watchdog.as_dict()
+    return status
+
+
+def collect_status():
+    """Aktueller Zustand + Metriken als JSON-fähiges dict."""
+    status = {
+        "pid": os.getpid(),
+        "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "uptime_s": round(time.monotonic() - _started_at),
+        "devices": {dev.name: device_status(dev) for dev in _devices},
+        "ha_http": {"connects": _http_pool.connects, "endpoints": _http_pool.summary()},
+    }
+    if _ha_mirror is not None:
+        status["ha_websocket"] = {
+            "live": _ha_mirror.live,
+            "events": _ha_mirror.events,
+            "reconnects": _ha_mirror.reconnects,
+        }
+    if _ha_actions is not None:
+        status["ha_actions"] = {
+            "update_calls": _ha_actions.update_calls,
+            "coalesced": _ha_actions.coalesced,
+            "suppressed": _ha_actions.suppressed,
+        }
+    return status
+
+
+def write_status(path):
+    """Status-Datei atomar schreiben (HA liest nie eine halbe Datei)."""
+    tmp = f"{path}.tmp"
     try:
-        os.remove(PID_FILE)
-    except Exception:
-        pass
-    sys.exit(0)
+        with open(tmp, "w") as f:
+            json.dump(collect_status(), f, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning("Status-Datei %s nicht schreibbar: %s", path, e)
 
-# ============================================================================
-# HAUPTSCHLEIFE
-# ============================================================================
 
-def main():
-    kill_old_instance()
-    write_pid()
-    signal.signal(signal.SIGTERM, cleanup_pid)
-    signal.signal(signal.SIGINT, cleanup_pid)
+async def status_tick():
+    await asyncio.to_thread(write_status, SPOTIFY_METRICS_FILE)
 
-    log.info("=" * 50)
-    log.info("Spotify Monitor v3 gestartet (PID %d)", os.getpid())
-    log.info("Modus: ADB MediaSession + Keep-Alive + Ducking")
-    log.info("Echo Show: %s:%d", ECHO_HOST, ECHO_PORT)
-    log.info("Poll: %.1fs aktiv, %ds idle", POLL_INTERVAL, POLL_INTERVAL_IDLE)
-    if SPOTIFY_KEEPALIVE_ENABLED:
-        log.info("Keep-Alive: aktiv (Intervall %ds)", KEEPALIVE_INTERVAL)
-    else:
-        log.info("Keep-Alive: deaktiviert (HA-only Modus)")
-    log.info("=" * 50)
 
-    autodiscover_entities()
-    log.info("Entities: spotify=%s satellite=%s radio=%s display=%s",
-             SPOTIFY_ENTITY, SATELLITE_ENTITY, RADIO_ENTITY, VA_DEVICE)
+async def ducking_loop(dev):
+    """Reagiert auf Satellite-Wechsel (WebSocket-Event oder Poll-Intervall)."""
+    while True:
+        try:
+            await ducking_check(dev)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            dev.log.error("Ducking: Fehler: %s", e)
+        await ha_wait(POLL_INTERVAL, f"ducking:{dev.name}")
+
+
+async def media_session_loop(dev):
+    """ADB-Verbindung halten, MediaSession pollen, Titelwechsel an HA melden."""
 
     # State-Tracking
     last_description = None
     last_state = None
     last_active_item = None
     consecutive_errors = 0
-    consecutive_none = 0          # Session-Flicker-Debounce
-    SESSION_NONE_THRESHOLD = 3    # N aufeinanderfolgende None-Polls nötig
+    consecutive_none = 0          # Session-Flicker-Debounce (SESSION_NONE_THRESHOLD)
     display_on_music = False
-    last_keepalive_check = 0
-    last_volume_sync_check = 0.0
-    last_ha_volume_level = None
-    last_fast_refresh_check = 0.0
+    scheduler = PollScheduler(
+        POLL_INTERVAL, POLL_INTERVAL_IDLE, POLL_INTERVAL_MIDTRACK_MAX, POLL_TRACK_END_WINDOW,
+        POLL_INTERVAL_IDLE_MAX, POLL_IDLE_BACKOFF_AFTER, adaptive=SPOTIFY_ADAPTIVE_POLL_ENABLED)
 
     while True:
         try:
             # ============================================================
             # ADB-Verbindung sicherstellen
             # ============================================================
-            if not _adb_device:
-                if not adb_connect():
+            if not dev.connected:
+                if not await asyncio.to_thread(adb_connect, dev):
                     consecutive_errors += 1
+                    dev.metrics.set("consecutive_errors", consecutive_errors)
                     wait = min(ADB_RECONNECT_WAIT * consecutive_errors, 120)
-                    log.warning("ADB Reconnect in %ds...", wait)
-                    time.sleep(wait)
+                    dev.log.warning("ADB Reconnect in %ds...", wait)
+                    await asyncio.sleep(wait)
                     continue
                 consecutive_errors = 0
-                autodiscover_entities()
+                dev.metrics.set("consecutive_errors", 0)
+                if dev.autodiscover:
+                    await asyncio.to_thread(autodiscover_entities, dev)
+                    ha_mirror_update_entities()  # neu abonnieren, falls Discovery Entities geändert hat
                 # Einmaliges Setup bei erster Verbindung
-                keepalive_init()
+                await asyncio.to_thread(keepalive_init, dev)
+                if SPOTIFY_ADB_STREAM_ENABLED and dev.media_stream is None:
+                    dev.media_stream = MediaSessionStream(
+                        dev, asyncio.get_running_loop(), POLL_INTERVAL, POLL_INTERVAL_IDLE)
+                    dev.media_stream.start()
+                if SPOTIFY_ADB_STREAM_ENABLED and dev.watchdog is not None and dev.process_stream is None:
+                    dev.process_stream = ProcessWatchStream(dev, asyncio.get_running_loop(), dev.watchdog)
+                    dev.process_stream.start()
 
             # ============================================================
-            # Keep-Alive Check (alle 30s)
+            # MediaSession auslesen (Stream: ~0ms, dumpsys-Poll: ~94ms)
             # ============================================================
-            now = time.monotonic()
-            if SPOTIFY_KEEPALIVE_ENABLED and now - last_keepalive_check > KEEPALIVE_INTERVAL:
-                keepalive_check()
-                last_keepalive_check = now
-
-            if SPOTIFY_VOLUME_SYNC_ENABLED and now - last_volume_sync_check > SPOTIFY_VOLUME_SYNC_INTERVAL:
-                last_ha_volume_level = sync_volume_from_ha(last_ha_volume_level)
-                last_volume_sync_check = now
-
-            # ============================================================
-            # MediaSession auslesen (~94ms)
-            # ============================================================
-            current = adb_get_media_session()
-
-            # ============================================================
-            # Ducking Check (bei jedem Poll!)
-            # ============================================================
-            current_state = current["state"] if current else STATE_NONE
-            ducking_check(current_state)
+            current = await read_media_session(dev)
+            dev.spotify_state = current.state if current else STATE_NONE
 
             # ============================================================
             # FALL 1: Kein Spotify aktiv (mit Flicker-Debounce)
@@ -993,40 +2659,35 @@ def main():
                 consecutive_none += 1
                 if consecutive_none < SESSION_NONE_THRESHOLD:
                     # Noch nicht sicher ob wirklich weg → kurzer Poll
-                    time.sleep(POLL_INTERVAL)
+                    await media_wait(dev, POLL_INTERVAL)
                     continue
                 # Sicher: Session ist wirklich weg
                 if last_state is not None and last_state == STATE_PLAYING:
-                    log.info("Spotify gestoppt (keine aktive Session)")
-                    ha_update_entity()
+                    dev.log.info("Spotify gestoppt (keine aktive Session)")
+                    _ha_actions.request_update(dev.spotify_entity)
                     if display_on_music:
-                        ha_navigate(VA_HOME_PATH)
+                        _ha_actions.navigate(dev, VA_HOME_PATH)
                         display_on_music = False
 
                 last_description = None
                 last_state = None
                 last_active_item = None
-                time.sleep(POLL_INTERVAL_IDLE)
+                now = time.monotonic()
+                scheduler.observe(None, now)
+                interval = scheduler.next_interval(now, media_can_wake(dev))
+                dev.metrics.set("poll_interval_s", interval)
+                await media_wait(dev, interval)
                 continue
 
-            title = current["title"]
-            artist = current["artist"]
-            state = current["state"]
-            description = current["description"]
-            active_item = current["active_item_id"]
+            title = current.title
+            artist = current.artist
+            state = current.state
+            description = current.description
+            active_item = current.active_item_id
             consecutive_errors = 0
+            dev.metrics.set("consecutive_errors", 0)
             consecutive_none = 0  # Session da → Flicker-Zähler zurücksetzen
 
-            if (
-                SPOTIFY_HA_FAST_REFRESH_ENABLED
-                and state == STATE_PLAYING
-                and now - last_fast_refresh_check > SPOTIFY_HA_FAST_REFRESH_INTERVAL
-            ):
-                if _get_user_stop_cooldown_remaining() > 0:
-                    _clear_user_stop_cooldown()
-                ha_update_entity()
-                last_fast_refresh_check = now
-
             # ============================================================
             # FALL 2: Titelwechsel erkannt!
             # ============================================================
@@ -1036,23 +2697,25 @@ def main():
                 title_changed = description != last_description
 
             if title_changed:
+                dev.metrics.inc("track_changes")
                 if last_description is not None:
-                    log.info("▶ Titelwechsel: %s — %s", artist, title)
+                    dev.log.info("▶ Titelwechsel: %s — %s", artist, title)
                 else:
-                    log.info("▶ Erster Titel: %s — %s", artist, title)
+                    dev.log.info("▶ Erster Titel: %s — %s", artist, title)
 
+                # Alle drei Aktionen laufen parallel (HAActionScheduler)
                 # 1) HA Entity sofort aktualisieren
                 #    (Während Ducking auch OK — wir nutzen den input_boolean
                 #    als Signal, nicht den HA Spotify State)
-                ha_update_entity()
+                _ha_actions.request_update(dev.spotify_entity)
 
                 # 2) last_played Input-Text updaten
                 display_text = f"{artist} - {title}" if artist else title
-                ha_set_input_text("input_text.spotify_last_played", display_text)
+                _ha_actions.set_input_text("input_text.spotify_last_played", display_text)
 
                 # 3) Display auf Music-View (nicht wenn Ducking aktiv)
-                if state == STATE_PLAYING and not _ducking_active:
-                    ha_navigate(VA_MUSIC_PATH, revert_timeout=3600)
+                if state == STATE_PLAYING and not dev.ducking_active:
+                    _ha_actions.navigate(dev, VA_MUSIC_PATH, revert_timeout=3600)
                     display_on_music = True
 
                 last_description = description
@@ -1064,48 +2727,183 @@ def main():
             if state != last_state:
                 if last_state is not None:
                     # Bei Ducking: State-Wechsel nicht navigieren
-                    if _ducking_active:
-                        log.debug("State-Wechsel während Ducking: %s → %s",
-                                  STATE_NAMES.get(last_state, "?"),
-                                  STATE_NAMES.get(state, "?"))
+                    if dev.ducking_active:
+                        dev.log.debug("State-Wechsel während Ducking: %s → %s",
+                                      STATE_NAMES.get(last_state, "?"),
+                                      STATE_NAMES.get(state, "?"))
                     elif state == STATE_PLAYING:
-                        log.info("▶ Wiedergabe fortgesetzt: %s — %s", artist, title)
-                        ha_update_entity()
-                        ha_navigate(VA_MUSIC_PATH, revert_timeout=3600)
+                        dev.log.info("▶ Wiedergabe fortgesetzt: %s — %s", artist, title)
+                        _ha_actions.request_update(dev.spotify_entity)
+                        _ha_actions.navigate(dev, VA_MUSIC_PATH, revert_timeout=3600)
                         display_on_music = True
                     elif state == STATE_PAUSED:
-                        log.info("⏸ Pausiert: %s — %s", artist, title)
-                        ha_update_entity()
+                        dev.log.info("⏸ Pausiert: %s — %s", artist, title)
+                        _ha_actions.request_update(dev.spotify_entity)
                         if display_on_music:
-                            ha_navigate(VA_HOME_PATH)
+                            _ha_actions.navigate(dev, VA_HOME_PATH)
                             display_on_music = False
                     elif state == STATE_STOPPED:
-                        log.info("⏹ Gestoppt")
-                        ha_update_entity()
+                        dev.log.info("⏹ Gestoppt")
+                        _ha_actions.request_update(dev.spotify_entity)
                         if display_on_music:
-                            ha_navigate(VA_HOME_PATH)
+                            _ha_actions.navigate(dev, VA_HOME_PATH)
                             display_on_music = False
 
                 last_state = state
 
-            # Adaptive Polling — SCHNELL während Ducking!
-            if _ducking_active:
-                time.sleep(POLL_INTERVAL)       # 0.5s — muss satellite→idle schnell erkennen
-            elif state == STATE_PLAYING:
-                time.sleep(POLL_INTERVAL)
-            else:
-                time.sleep(POLL_INTERVAL_IDLE)
-
-        except KeyboardInterrupt:
-            break
+            # Adaptive Polling (Ducking hat seinen eigenen Task)
+            now = time.monotonic()
+            scheduler.observe(current, now)
+            if scheduler.wants_duration(now):
+                scheduler.set_duration(await spotify_track_duration(dev, title), now)
+            interval = scheduler.next_interval(now, media_can_wake(dev))
+            dev.metrics.set("poll_interval_s", interval)
+            await media_wait(dev, interval)
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             consecutive_errors += 1
-            log.error("Fehler (#%d): %s", consecutive_errors, e)
-            adb_disconnect()
+            dev.metrics.set("consecutive_errors", consecutive_errors)
+            dev.log.error("Fehler (#%d): %s", consecutive_errors, e)
+            await asyncio.to_thread(adb_disconnect, dev)
             wait = min(10 * consecutive_errors, 120)
-            time.sleep(wait)
+            await asyncio.sleep(wait)
 
-    cleanup_pid()
+# ============================================================================
+# HAUPTPROGRAMM
+# ============================================================================
+
+async def main_async(stop=None, devices=None):
+    """Daemon-Hauptteil; stop (asyncio.Event) beendet ihn, sonst SIGTERM/SIGINT.
+
+    devices: fertige Geräteliste (Replay), sonst load_devices().
+    """
+    global _ha_mirror, _ha_actions, _devices
+
+    if stop is None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+    log.info("=" * 50)
+    log.info("Spotify Monitor v4 gestartet (PID %d)", os.getpid())
+    log.info("Modus: asyncio — ADB MediaSession + Keep-Alive + Ducking + HA WebSocket")
+    _devices = devices if devices is not None else load_devices()
+    for dev in _devices:
+        log.info("Echo Show %s: %s:%d", dev.name, dev.host, dev.port)
+    log.info("Poll: %.1fs aktiv, %.1fs idle", POLL_INTERVAL, POLL_INTERVAL_IDLE)
+    if SPOTIFY_ADAPTIVE_POLL_ENABLED:
+        log.info("Poll adaptiv: mitten im Titel bis %.0fs, idle bis %.0fs",
+                 POLL_INTERVAL_MIDTRACK_MAX, POLL_INTERVAL_IDLE_MAX)
+    if SPOTIFY_KEEPALIVE_ENABLED:
+        log.info("Keep-Alive: aktiv (logcat-Watchdog, Fallback-Intervall %ds)", KEEPALIVE_INTERVAL)
+    else:
+        log.info("Keep-Alive: deaktiviert (HA-only Modus)")
+    log.info("=" * 50)
+
+    for dev in _devices:
+        if dev.autodiscover:
+            await asyncio.to_thread(autodiscover_entities, dev)
+        dev.log.info("Entities: spotify=%s satellite=%s radio=%s display=%s",
+                     dev.spotify_entity, dev.satellite_entity, dev.radio_entity, dev.va_device)
+
+    _ha_actions = HAActionScheduler()
+    tasks = [
+        asyncio.create_task(_ha_actions.run(), name="ha_actions"),
+        asyncio.create_task(
+            run_periodic("HTTP-Stats", HTTP_STATS_LOG_INTERVAL, http_stats_tick), name="http_stats"),
+    ]
+    for dev in _devices:
+        tasks.append(asyncio.create_task(media_session_loop(dev), name=f"media_session:{dev.name}"))
+        tasks.append(asyncio.create_task(ducking_loop(dev), name=f"ducking:{dev.name}"))
+        if SPOTIFY_KEEPALIVE_ENABLED:
+            dev.watchdog = SpotifyWatchdog(dev)
+            tasks.append(asyncio.create_task(dev.watchdog.run(), name=f"keepalive:{dev.name}"))
+        if SPOTIFY_VOLUME_SYNC_ENABLED:
+            tasks.append(asyncio.create_task(volume_sync_loop(dev), name=f"volume_sync:{dev.name}"))
+    if SPOTIFY_METRICS_FILE:
+        tasks.append(asyncio.create_task(
+            run_periodic("Status", SPOTIFY_METRICS_INTERVAL, status_tick), name="status"))
+    if not SPOTIFY_HA_WEBSOCKET_ENABLED:
+        log.info("HA WebSocket: deaktiviert, nutze REST-Polling")
+    else:
+        _ha_mirror = _backend.state_mirror(HA_WS_URL, HA_TOKEN)
+        if _ha_mirror is None:
+            log.warning("HA WebSocket: aiohttp nicht installiert, nutze REST-Polling")
+        else:
+            ha_mirror_update_entities()
+            tasks.append(asyncio.create_task(_ha_mirror.run(), name="ha_websocket"))
+    if SPOTIFY_HA_FAST_REFRESH_ENABLED:
+        tasks.append(asyncio.create_task(
+            run_periodic("Fast-Refresh", SPOTIFY_HA_FAST_REFRESH_INTERVAL, fast_refresh_tick),
+            name="fast_refresh"))
+
+    await stop.wait()
+
+    # Sauber beenden: Tasks abbrechen und auf sie warten. Laufende ADB-/HTTP-
+    # Aufrufe in Worker-Threads enden spätestens nach ihrem Timeout.
+    log.info("Signal empfangen, beende %d Tasks...", len(tasks))
+    for dev in _devices:
+        for stream in (dev.media_stream, dev.process_stream):
+            if stream is not None:
+                stream.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for dev in _devices:
+        flush_volume_cache(dev)
+    _http_pool.log_stats()
+
+
+BENCH_FIXTURES = ("media_session_playing.txt", "media_session_paused.txt")
+
+
+def bench_parser(paths, rounds=10000):
+    """Mikro-Benchmark des MediaSession-Parsers auf mitgeschnittenen Ausgaben.
+
+    Mitschnitt: adb shell dumpsys media_session > capture.txt
+    Rohe Mitschnitte filtert lokal derselbe awk wie auf dem Echo; bereits
+    gefilterte Blöcke (ohne Paketnamen) werden direkt verwendet. Ohne Pfade:
+    die Blöcke aus fixtures/ (Spotify spielt bzw. pausiert).
+    """
+    import subprocess
+    import timeit
+
+    if not paths:
+        base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+        paths = [os.path.join(base, name) for name in BENCH_FIXTURES]
+    for path in paths:
+        with open(path) as f:
+            dump = f.read()
+        if "com.spotify.music" in dump:
+            block = subprocess.run(["sh", "-c", _MEDIA_SESSION_AWK], input=dump,
+                                   capture_output=True, text=True, check=True).stdout
+        else:
+            block = dump
+        # Jeder Poll liefert ein neues String-Objekt → Kopien statt Identität
+        copies = [(block + " ")[:-1] for _ in range(rounds)]
+        full = timeit.timeit(lambda: parse_media_session(copies[0]), number=rounds)
+        parser = MediaSessionParser()
+        parser.feed(block)
+        steady_iter = iter(copies)
+        steady = timeit.timeit(lambda: parser.feed(next(steady_iter)), number=rounds)
+        print(f"{path}: dumpsys {len(dump)} B → Block {len(block)} B → {parse_media_session(block)}")
+        print(f"  voll geparst:  {full / rounds * 1e6:8.2f} µs/Poll")
+        print(f"  unverändert:   {steady / rounds * 1e6:8.2f} µs/Poll")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-parser":
+        bench_parser(sys.argv[2:])
+        return
+    try:
+        asyncio.run(main_async())
+    finally:
+        for dev in _devices:
+            adb_disconnect(dev)
+        log.info("Spotify Monitor beendet")
 
 
 if __name__ == "__main__":
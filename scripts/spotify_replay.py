@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+Spotify Monitor Replay — Aufzeichnen und Abspielen ohne Echo Show und HA
+========================================================================
+Tauscht das Backend von spotify_monitor.py (ADB-Gerät, HA-HTTP, HA-WebSocket)
+aus und treibt die unveränderte Zustandsmaschine (Track-Monitor, Ducking,
+Keep-Alive, Volume-Sync) mit aufgezeichneten Daten.
+
+record: läuft wie der normale Daemon (vorher den Supervisor beenden, sonst
+        steuern zwei Instanzen dasselbe Echo) und schreibt dabei alle
+        ADB-Ausgaben, HA-States und HA-Events mit Zeitstempel in eine Fixture
+        (JSON-Lines). Der HA-Token wird nicht aufgezeichnet, die States
+        (inkl. Attribute) schon.
+replay: spielt die Fixture mit beschleunigter Zeit ab. Die Event-Loop und
+        time.monotonic/time.time des Monitors laufen um --speed schneller,
+        ADB und HA antworten mit dem zum jeweiligen Zeitpunkt aufgezeichneten
+        Stand. Ausgabe: Bericht (JSON) mit Entscheidungs-Latenzen, Aktionen
+        und — gegen --baseline — Regressionen (Exit-Code 1).
+
+Verwendung:
+  python3 spotify_replay.py record /config/scripts/fixtures/abend.jsonl
+  python3 spotify_replay.py replay abend.jsonl --speed 20 --out base.json
+  python3 spotify_replay.py replay abend.jsonl --set SESSION_NONE_THRESHOLD=5 \\
+      --set POLL_INTERVAL_IDLE=2 --baseline base.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import collections
+import json
+import logging
+import os
+import selectors
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import spotify_monitor as monitor
+
+log = monitor.log
+
+# Regression: p95 muss um mehr als Faktor UND absolut zulegen
+P95_TOLERANCE = 0.2
+P95_MIN_DELTA_MS = 5.0
+
+
+def _service_key(method, path):
+    """/api/services/media_player/media_pause → media_player.media_pause."""
+    if method == "POST" and path.startswith("/api/services/"):
+        return path[len("/api/services/"):].replace("/", ".", 1)
+    return f"{method} {path}"
+
+
+def _adb_action_key(cmd):
+    """Schreibende ADB-Befehle zählen als Aktion, Abfragen nicht (None)."""
+    if cmd.startswith("input keyevent"):
+        return f"adb {cmd}"
+    if "media_session volume" in cmd and "--set" in cmd:
+        return "adb volume"
+    for prefix in ("monkey", "am start", "settings put"):
+        if cmd.startswith(prefix):
+            return f"adb {prefix}"
+    return None
+
+
+# ============================================================================
+# RECORD
+# ============================================================================
+
+class Recorder:
+    """Schreibt Fixture-Zeilen {t, kind, ...}; t = Sekunden seit Start (monotonic)."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+
+    def write(self, kind, **fields):
+        line = json.dumps({"t": round(time.monotonic() - self._t0, 4), "kind": kind, **fields},
+                          ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingDevice:
+    """Echtes ADB-Gerät, zeichnet jede Shell-Ausgabe und jeden Stream-Chunk auf."""
+
+    def __init__(self, device, name, recorder):
+        self._device = device
+        self._name = name
+        self._recorder = recorder
+
+    def shell(self, cmd, timeout_s=None):
+        try:
+            out = self._device.shell(cmd, timeout_s=timeout_s)
+        except Exception as e:
+            self._recorder.write("adb", dev=self._name, cmd=cmd, out=None, error=str(e))
+            raise
+        self._recorder.write("adb", dev=self._name, cmd=cmd, out=out)
+        return out
+
+    def streaming_shell(self, cmd, **kwargs):
+        stream = self._device.streaming_shell(cmd, **kwargs)
+        try:
+            for chunk in stream:
+                self._recorder.write("stream", dev=self._name, cmd=cmd, data=chunk)
+                yield chunk
+        finally:
+            stream.close()
+
+    def close(self):
+        self._device.close()
+
+
+class RecordingMirror(monitor.HAStateMirror):
+    """WebSocket-Spiegel, der State-Diffs und Bus-Events mitschreibt."""
+
+    def __init__(self, url, token, recorder):
+        super().__init__(url, token)
+        self._recorder = recorder
+
+    def _apply(self, event):
+        self._recorder.write("ws_state", event=event)
+        super()._apply(event)
+
+    def set_events(self, handlers):
+        def recording(handler):
+            def wrapper(event_type, data, time_fired, received):
+                fired = monitor._event_timestamp(time_fired)
+                self._recorder.write("ws_event", event_type=event_type, data=data,
+                                     delay=round(time.time() - fired, 4) if fired else 0.0)
+                handler(event_type, data, time_fired, received)
+            return wrapper
+        super().set_events({k: recording(v) for k, v in handlers.items()})
+
+
+class RecordingBackend(monitor.LiveBackend):
+    """LiveBackend + Aufzeichnung aller Antworten von außen."""
+
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    def adb_open(self, dev):
+        return RecordingDevice(super().adb_open(dev), dev.name, self._recorder)
+
+    def http_request(self, method, url, body=None, headers=None, timeout=None):
+        path = urllib.parse.urlsplit(url).path
+        request = json.loads(body) if body else None
+        try:
+            status, raw = super().http_request(method, url, body=body, headers=headers, timeout=timeout)
+        except Exception:
+            self._recorder.write("http", method=method, path=path, request=request, status=0)
+            raise
+        self._recorder.write("http", method=method, path=path, request=request, status=status,
+                             body=raw.decode("utf-8", errors="replace") if method == "GET" else None)
+        return status, raw
+
+    def state_mirror(self, url, token):
+        if monitor.aiohttp is None:
+            return None
+        return RecordingMirror(url, token, self._recorder)
+
+
+def record(path):
+    recorder = Recorder(path)
+    monitor._backend = RecordingBackend(recorder)
+    devices = monitor.load_devices()
+    try:
+        # Discovery vorab, damit die Fixture die endgültigen Entities enthält
+        for dev in devices:
+            if dev.autodiscover:
+                monitor.autodiscover_entities(dev)
+                dev.autodiscover = False
+        recorder.write("meta", devices=[{key: getattr(dev, key) for key in monitor.Device.CONFIG_KEYS}
+                                        for dev in devices])
+        log.info("Replay: zeichne auf nach %s", path)
+        asyncio.run(monitor.main_async(devices=devices))
+    finally:
+        for dev in devices:
+            monitor.adb_disconnect(dev)
+        recorder.close()
+        log.info("Replay: Aufzeichnung beendet")
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class ScaledClock:
+    """time-Ersatz für den Monitor: monotonic/time laufen speed-mal schneller."""
+
+    def __init__(self, speed):
+        self.speed = speed
+        self._mono0 = time.monotonic()
+        self._wall0 = time.time()
+
+    def monotonic(self):
+        return self._mono0 + (time.monotonic() - self._mono0) * self.speed
+
+    def time(self):
+        return self._wall0 + (time.monotonic() - self._mono0) * self.speed
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class _ScaledSelector(selectors.BaseSelector):
+    """Selector, dessen Timeouts (in skalierter Zeit) real speed-mal kürzer sind."""
+
+    def __init__(self, speed):
+        self._selector = selectors.DefaultSelector()
+        self._speed = speed
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def select(self, timeout=None):
+        return self._selector.select(None if timeout is None else timeout / self._speed)
+
+    def close(self):
+        self._selector.close()
+
+    def get_map(self):
+        return self._selector.get_map()
+
+
+class ScaledEventLoop(asyncio.SelectorEventLoop):
+    """Event-Loop auf der ScaledClock: sleep/wait_for/call_later laufen beschleunigt."""
+
+    def __init__(self, clock):
+        super().__init__(_ScaledSelector(clock.speed))
+        self._clock = clock
+
+    def time(self):
+        return self._clock.monotonic()
+
+
+class ReplayDevice:
+    """ADB-Gerät aus der Fixture: Antwort = letzte Aufzeichnung bis jetzt."""
+
+    def __init__(self, backend, name):
+        self._backend = backend
+        self._name = name
+
+    def shell(self, cmd, timeout_s=None):
+        return self._backend.adb_output(self._name, cmd)
+
+    def streaming_shell(self, cmd, read_timeout_s=None):
+        chunks = self._backend.streams.get((self._name, cmd))
+        if not chunks:
+            raise RuntimeError("Stream nicht aufgezeichnet")
+        media = self._name if "dumpsys media_session" in cmd else None
+        return self._backend.replay_stream(chunks, media)
+
+    def close(self):
+        pass
+
+
+class ReplayMirror(monitor.HAStateMirror):
+    """WebSocket-Spiegel, gefüttert aus den aufgezeichneten ws_state/ws_event-Zeilen."""
+
+    def __init__(self, backend):
+        super().__init__("replay", "")
+        self._backend = backend
+
+    async def run(self):
+        for entry in self._backend.ws:
+            delay = self._backend.at(entry["t"]) - self._backend.clock.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if entry["kind"] == "ws_state":
+                self._apply(entry["event"])
+                continue
+            handler = self._handlers.get(entry["event_type"])
+            if handler is not None:
+                # Abstand Feuern → Empfang wie bei der Aufzeichnung
+                fired = datetime.fromtimestamp(
+                    self._backend.clock.time() - entry.get("delay", 0.0), timezone.utc)
+                handler(entry["event_type"], entry["data"], fired.isoformat(),
+                        self._backend.clock.monotonic())
+        await asyncio.Event().wait()  # Fixture zu Ende: Spiegel bleibt stehen
+
+
+class ReplayBackend:
+    """Beantwortet ADB und HA aus einer Fixture und zählt, was der Monitor tut."""
+
+    def __init__(self, path, clock):
+        self.clock = clock
+        self.t0 = clock.monotonic()
+        self.done = threading.Event()
+        self.meta = None
+        self.adb = collections.defaultdict(list)      # (dev, cmd) → [(t, out, error)]
+        self.streams = collections.defaultdict(list)  # (dev, cmd) → [(t, chunk)]
+        self.states = collections.defaultdict(list)   # path → [(t, status, body)]
+        self.ws = []
+        self.recorded_actions = collections.Counter()
+        self.duration = 0.0
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    self._load(json.loads(line))
+        self._lock = threading.Lock()
+        self.actions = collections.Counter()
+        self.reads = collections.Counter()
+        self.media_detect = []                         # Latenz Änderung → Monitor liest sie (ms)
+        self._last_media = {}
+        self._media_chunk = {}                         # Gerät → Fixture-Zeit des letzten Stream-Chunks
+        self._stream_media = {}                        # Gerät → zuletzt gelesener Stream-Stand
+
+    def _load(self, entry):
+        t = entry["t"]
+        self.duration = max(self.duration, t)
+        kind = entry["kind"]
+        if kind == "meta":
+            self.meta = entry
+        elif kind == "adb":
+            self.adb[(entry["dev"], entry["cmd"])].append((t, entry["out"], entry.get("error")))
+            key = _adb_action_key(entry["cmd"])
+            if key:
+                self.recorded_actions[key] += 1
+        elif kind == "stream":
+            self.streams[(entry["dev"], entry["cmd"])].append((t, entry["data"]))
+        elif kind == "http":
+            if entry["method"] == "GET":
+                self.states[entry["path"]].append((t, entry["status"], entry.get("body") or ""))
+            else:
+                self.recorded_actions[_service_key(entry["method"], entry["path"])] += 1
+        elif kind in ("ws_state", "ws_event"):
+            self.ws.append(entry)
+
+    def at(self, t):
+        """Fixture-Zeit → Zeit der ScaledClock."""
+        return self.t0 + t
+
+    def now(self):
+        """Aktuelle Fixture-Zeit."""
+        return self.clock.monotonic() - self.t0
+
+    @staticmethod
+    def _latest(entries, now):
+        """Index der letzten Aufzeichnung bis now (vorher: die erste)."""
+        return max(bisect.bisect_right(entries, now, key=lambda entry: entry[0]) - 1, 0)
+
+    def adb_output(self, name, cmd):
+        now = self.now()
+        key = _adb_action_key(cmd)
+        with self._lock:
+            if key:
+                self.actions[key] += 1
+            else:
+                self.reads["adb"] += 1
+        entries = self.adb.get((name, cmd))
+        if not entries:
+            return ""
+        index = self._latest(entries, now)
+        t, out, error = entries[index]
+        if "dumpsys media_session" in cmd:
+            with self._lock:
+                last = self._last_media.get(name)
+                if last is not None and last[1] != out and index != last[0]:
+                    self.media_detect.append(max(now - t, 0.0) * 1000)
+                self._last_media[name] = (index, out)
+        if error is not None:
+            raise RuntimeError(f"aufgezeichneter ADB-Fehler: {error}")
+        return out
+
+    def replay_stream(self, chunks, media=None):
+        """Generator wie adb_shell.streaming_shell: Chunks zu ihrer Fixture-Zeit.
+
+        media: Gerätename beim MediaSession-Kanal, dessen Chunk-Zeiten
+        media_stream_read() für die Erkennungs-Latenz braucht.
+        """
+        start = self._latest(chunks, self.now())
+        for t, chunk in chunks[start:]:
+            while self.now() < t:
+                if self.done.is_set():
+                    return
+                time.sleep(min(0.05, (t - self.now()) / self.clock.speed + 0.001))
+            if media is not None:
+                with self._lock:
+                    self._media_chunk[media] = t
+            yield chunk
+        self.done.wait()
+
+    def media_stream_read(self, name, session):
+        """Track-Monitor hat den Stream-Stand gelesen: Latenz Chunk → Reaktion.
+
+        Beim Stream fragt der Monitor nicht per dumpsys, adb_output() sieht
+        die Änderung also nie. Gemessen wird vom Chunk, der den neuen Block
+        abgeschlossen hat, bis die Poll-Schleife ihn verarbeitet.
+        """
+        key = None if session is None else (
+            session.description, session.state, session.position, session.updated)
+        with self._lock:
+            known = name in self._stream_media
+            last = self._stream_media.get(name)
+            self._stream_media[name] = key
+            t = self._media_chunk.get(name)
+            if known and key != last and t is not None:
+                self.media_detect.append(max(self.now() - t, 0.0) * 1000)
+
+    # --- Backend-Schnittstelle (wie monitor.LiveBackend) ---
+
+    def adb_open(self, dev):
+        return ReplayDevice(self, dev.name)
+
+    def http_request(self, method, url, body=None, headers=None, timeout=None):
+        path = urllib.parse.urlsplit(url).path
+        if method != "GET":
+            with self._lock:
+                self.actions[_service_key(method, path)] += 1
+            return 200, b"[]"
+        with self._lock:
+            self.reads["http"] += 1
+        entries = self.states.get(path)
+        if not entries:
+            return 404, b"{}"
+        _, status, text = entries[self._latest(entries, self.now())]
+        return status, text.encode("utf-8")
+
+    def state_mirror(self, url, token):
+        return ReplayMirror(self) if self.ws else None
+
+
+def _override(name, value):
+    """--set NAME=VALUE auf eine Modul-Konstante des Monitors, Typ wie bisher."""
+    if not hasattr(monitor, name):
+        raise SystemExit(f"Unbekannte Einstellung: {name}")
+    current = getattr(monitor, name)
+    if isinstance(current, bool):
+        converted = value.strip().lower() in ("1", "true", "yes", "on")
+    elif isinstance(current, tuple):
+        converted = tuple(v.strip() for v in value.split(",") if v.strip())
+    elif isinstance(current, frozenset):
+        converted = frozenset(v.strip() for v in value.split(",") if v.strip())
+    else:
+        converted = type(current)(value)
+    setattr(monitor, name, converted)
+    return converted
+
+
+def _device_report(dev):
+    snapshot = dev.metrics.snapshot()
+    return {
+        "counters": snapshot["counters"],
+        "histograms": {
+            name: {key: hist[key] for key in ("count", "p50_ms", "p95_ms", "max_ms")}
+            for name, hist in snapshot["histograms"].items()
+        },
+    }
+
+
+def replay(path, speed, overrides, tail):
+    clock = ScaledClock(speed)
+    backend = ReplayBackend(path, clock)
+    settings = {name: _override(name, value) for name, value in overrides}
+    monitor.time = clock
+    monitor._backend = backend
+    read_media_session = monitor.read_media_session
+
+    async def read_media_session_measured(dev):
+        streamed = dev.media_stream is not None and dev.media_stream.live
+        session = await read_media_session(dev)
+        if streamed:
+            backend.media_stream_read(dev.name, session)
+        return session
+
+    monitor.read_media_session = read_media_session_measured
+    monitor.SPOTIFY_METRICS_FILE = ""
+    # Ohne aufgezeichnete Streams pollt der Monitor wie ohne Stream-Support
+    monitor.SPOTIFY_ADB_STREAM_ENABLED = monitor.SPOTIFY_ADB_STREAM_ENABLED and bool(backend.streams)
+    if backend.meta is not None:
+        devices = [monitor.Device(**config) for config in backend.meta["devices"]]
+    else:
+        devices = None
+    duration = backend.duration + tail
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(duration, stop.set)
+        await monitor.main_async(stop, devices)
+        # Stream-Threads beenden, solange die Loop ihr call_soon_threadsafe
+        # noch annimmt (replay_stream prüft done alle 50ms)
+        backend.done.set()
+        await asyncio.to_thread(time.sleep, 0.2)
+
+    loop = ScaledEventLoop(clock)
+    started = time.monotonic()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        backend.done.set()
+        loop.close()
+
+    actions = dict(sorted(backend.actions.items()))
+    return {
+        "fixture": os.path.basename(path),
+        "speed": speed,
+        "duration_s": round(duration, 1),
+        "wall_s": round(time.monotonic() - started, 1),
+        "settings": {k: list(v) if isinstance(v, (tuple, frozenset)) else v for k, v in settings.items()},
+        "actions": actions,
+        "recorded_actions": dict(sorted(backend.recorded_actions.items())),
+        "reads": dict(backend.reads),
+        "media_detect": {"count": len(backend.media_detect),
+                         **monitor.latency_summary(backend.media_detect)},
+        "devices": {dev.name: _device_report(dev) for dev in monitor._devices},
+    }
+
+
+def compare(report, baseline):
+    """Regressionen gegenüber einem früheren Bericht (Liste von Texten)."""
+    regressions = []
+    for key in sorted(set(report["actions"]) | set(baseline.get("actions", {}))):
+        now, before = report["actions"].get(key, 0), baseline.get("actions", {}).get(key, 0)
+        if now != before:
+            regressions.append(f"Aktion {key}: {before} → {now}")
+    latencies = [("media_detect", report["media_detect"], baseline.get("media_detect", {}))]
+    for name, device in report["devices"].items():
+        before_hists = baseline.get("devices", {}).get(name, {}).get("histograms", {})
+        for hist, values in device["histograms"].items():
+            latencies.append((f"{name}.{hist}", values, before_hists.get(hist, {})))
+    for label, values, before in latencies:
+        now, old = values.get("p95_ms"), before.get("p95_ms")
+        if now is None or old is None:
+            continue
+        if now > old * (1 + P95_TOLERANCE) and now - old > P95_MIN_DELTA_MS:
+            regressions.append(f"Latenz {label} p95: {old}ms → {now}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spotify Monitor: Aufzeichnen und Abspielen")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Daemon starten und ADB/HA in eine Fixture aufzeichnen")
+    rec.add_argument("fixture")
+    rep = sub.add_parser("replay", help="Fixture beschleunigt abspielen, Bericht als JSON")
+    rep.add_argument("fixture")
+    rep.add_argument("--speed", type=float, default=20.0, help="Zeitraffer-Faktor (Standard 20)")
+    rep.add_argument("--set", action="append", default=[], metavar="NAME=WERT",
+                     help="Einstellung des Monitors überschreiben, z.B. SESSION_NONE_THRESHOLD=5")
+    rep.add_argument("--tail", type=float, default=5.0,
+                     help="Sekunden nach dem letzten Fixture-Eintrag weiterlaufen")
+    rep.add_argument("--baseline", help="Früherer Bericht; Abweichungen → Exit-Code 1")
+    rep.add_argument("--out", help="Bericht in Datei statt stdout")
+    rep.add_argument("--log", help="Monitor-Log des Replays (Standard: <fixture>.replay.log)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.fixture)
+        return
+
+    # Replay schreibt nicht ins Log des laufenden Daemons
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    file_handler = logging.FileHandler(args.log or args.fixture + ".replay.log", mode="w")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log.addHandler(file_handler)
+
+    overrides = []
+    for item in args.set:
+        name, sep, value = item.partition("=")
+        if not sep:
+            parser.error(f"--set erwartet NAME=WERT: {item}")
+        overrides.append((name.strip(), value))
+
+    report = replay(args.fixture, args.speed, overrides, args.tail)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(report, json.load(handle))
+        report["regressions"] = regressions
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    for line in regressions:
+        print(f"REGRESSION: {line}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()